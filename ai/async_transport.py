@@ -0,0 +1,381 @@
+"""
+Minimal asyncio HTTP/1.1 transport for the AI proxy client.
+
+Mirrors :mod:`ai.transport` for coroutines: idle keep-alive streams are kept
+per host, and a per-host semaphore caps how many requests are on the wire at
+once so hundreds of concurrent ``aawait_response`` polls share a bounded set
+of sockets instead of opening one each.  Streams belong to the event loop that
+created them, so every running loop gets its own pool.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import re
+import time
+import weakref
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+from . import instrumentation
+from .transport import IDEMPOTENT_METHODS, ssl_context
+
+__all__ = [
+    "AsyncConnectionPool",
+    "AsyncPooledResponse",
+    "get_async_pool",
+]
+
+_POOLS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncConnectionPool]" = weakref.WeakKeyDictionary()
+
+# The checks http.client.putheader() and putrequest() apply.
+_LEGAL_HEADER_NAME = re.compile(r"[^:\s][^:\r\n]*")
+_ILLEGAL_HEADER_VALUE = re.compile(r"\n(?![ \t])|\r(?![ \t\n])")
+_ILLEGAL_TARGET = re.compile(r"[\x00-\x20\x7f]")
+
+PoolKey = Tuple[str, str, int, bool]
+Stream = Tuple[asyncio.StreamReader, asyncio.StreamWriter]
+
+
+class AsyncConnectionPool:
+    """Keep-alive stream pool bound to a single event loop."""
+
+    def __init__(self, max_per_host: int = 32, idle_timeout: float = 30.0) -> None:
+        # One limit serves both purposes: at most ``max_per_host`` requests on
+        # the wire, and therefore at most that many streams worth keeping idle.
+        self.max_per_host = max(1, int(max_per_host))
+        self.idle_timeout = float(idle_timeout)
+        self._idle: Dict[PoolKey, Deque[Tuple[Stream, float]]] = {}
+        self._slots: Dict[PoolKey, asyncio.Semaphore] = {}
+        self._stats = {
+            "requests": 0,
+            "handshakes": 0,
+            "reused": 0,
+            "stale_retries": 0,
+            "evicted_idle": 0,
+            "discarded": 0,
+        }
+
+    async def request(self, method: str, url: str, body: Optional[bytes], headers: Dict[str, str],
+                      timeout: float, verify_tls: bool) -> Tuple[int, Dict[str, str], bytes]:
+        """Send a request and return ``(status, headers, body)``; raises on network errors."""
+        key, target, netloc = _split(url, verify_tls)
+        raw = _encode_request(method, target, netloc, body, headers)
+
+        self._stats["requests"] += 1
+        slots = self._slots.setdefault(key, asyncio.Semaphore(self.max_per_host))
+        async with slots:
+            return await asyncio.wait_for(self._exchange(key, raw, method, timeout), timeout)
+
+    async def open(self, method: str, url: str, body: Optional[bytes], headers: Dict[str, str],
+                   timeout: float, verify_tls: bool) -> "AsyncPooledResponse":
+        """Send a request and return once headers arrive; the body is read incrementally."""
+        key, target, netloc = _split(url, verify_tls)
+        raw = _encode_request(method, target, netloc, body, headers)
+
+        self._stats["requests"] += 1
+        slots = self._slots.setdefault(key, asyncio.Semaphore(self.max_per_host))
+        await slots.acquire()
+        stream = None
+        try:
+            stream, reused = await self._acquire(key, timeout)
+            sent = False
+            try:
+                await _write(stream, raw)
+                sent = True
+                status, version, resp_headers = await _start(stream, timeout)
+            except (ConnectionError, asyncio.IncompleteReadError, _EmptyResponse):
+                stream[1].close()
+                if not reused or (sent and method.upper() not in IDEMPOTENT_METHODS):
+                    raise
+                self._stats["stale_retries"] += 1
+                stream = await self._connect(key, timeout)
+                await _write(stream, raw)
+                status, version, resp_headers = await _start(stream, timeout)
+        except BaseException:
+            if stream is not None:
+                stream[1].close()
+            slots.release()
+            raise
+        return AsyncPooledResponse(self, key, stream, slots, status, version, resp_headers, timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        snapshot: Dict[str, Any] = dict(self._stats)
+        snapshot["idle"] = sum(len(bucket) for bucket in self._idle.values())
+        snapshot["hosts"] = len(self._idle)
+        snapshot["max_per_host"] = self.max_per_host
+        return snapshot
+
+    def close(self) -> None:
+        buckets = list(self._idle.values())
+        self._idle.clear()
+        for bucket in buckets:
+            for (_, writer), _ in bucket:
+                writer.close()
+
+    async def _exchange(self, key: PoolKey, raw: bytes, method: str,
+                        timeout: float) -> Tuple[int, Dict[str, str], bytes]:
+        stream, reused = await self._acquire(key, timeout)
+        sent = False
+        try:
+            await _write(stream, raw)
+            sent = True
+            status, headers, payload, keep_alive = await _receive(stream, method)
+        except (ConnectionError, asyncio.IncompleteReadError, _EmptyResponse):
+            stream[1].close()
+            # Same rule as ai.transport: after the request was written, only an
+            # idempotent method is sent again; a POST may already be queued.
+            if not reused or (sent and method.upper() not in IDEMPOTENT_METHODS):
+                raise
+            self._stats["stale_retries"] += 1
+            stream = await self._connect(key, timeout)
+            try:
+                await _write(stream, raw)
+                status, headers, payload, keep_alive = await _receive(stream, method)
+            except BaseException:
+                stream[1].close()
+                raise
+        except BaseException:
+            stream[1].close()
+            raise
+        self._release(key, stream, keep_alive)
+        return status, headers, payload
+
+    async def _acquire(self, key: PoolKey, timeout: float) -> Tuple[Stream, bool]:
+        now = time.monotonic()
+        bucket = self._idle.get(key)
+        while bucket and now - bucket[0][1] > self.idle_timeout:
+            bucket.popleft()[0][1].close()
+            self._stats["evicted_idle"] += 1
+        while bucket:
+            stream = bucket.pop()[0]
+            if stream[0].at_eof() or stream[1].is_closing():
+                stream[1].close()
+                self._stats["evicted_idle"] += 1
+                continue
+            self._stats["reused"] += 1
+            return stream, True
+        return await self._connect(key, timeout), False
+
+    async def _connect(self, key: PoolKey, timeout: float) -> Stream:
+        scheme, host, port, verify_tls = key
+        context = ssl_context(verify_tls) if scheme == "https" else None
+        started = time.perf_counter()
+        stream = await asyncio.wait_for(asyncio.open_connection(host, port, ssl=context), timeout)
+        instrumentation.observe("connect", time.perf_counter() - started)
+        self._stats["handshakes"] += 1
+        return stream
+
+    def _release(self, key: PoolKey, stream: Stream, keep_alive: bool) -> None:
+        if not keep_alive or stream[1].is_closing():
+            stream[1].close()
+            return
+        bucket = self._idle.setdefault(key, deque())
+        if len(bucket) < self.max_per_host:
+            bucket.append((stream, time.monotonic()))
+            return
+        self._stats["discarded"] += 1
+        stream[1].close()
+
+
+class AsyncPooledResponse:
+    """Response whose body is consumed incrementally; ``aclose()`` frees its slot."""
+
+    def __init__(self, pool: AsyncConnectionPool, key: PoolKey, stream: Stream, slot: asyncio.Semaphore,
+                 status: int, version: str, headers: Dict[str, str], timeout: float) -> None:
+        self._pool = pool
+        self._key = key
+        self._stream: Optional[Stream] = stream
+        self._slot = slot
+        self._timeout = timeout
+        self._complete = False
+        self.status = status
+        self.headers = headers
+        connection = headers.get("connection", "").lower()
+        self._reusable = connection != "close" and (version != "HTTP/1.0" or connection == "keep-alive")
+
+    async def iter_chunks(self) -> AsyncIterator[bytes]:
+        """Yield body bytes as they arrive, undoing chunked transfer encoding."""
+        if self._stream is None:
+            return
+        reader = self._stream[0]
+        timeout = self._timeout
+        if "chunked" in self.headers.get("transfer-encoding", "").lower():
+            while True:
+                size_line = await asyncio.wait_for(reader.readline(), timeout)
+                size = int(size_line.split(b";", 1)[0].strip() or b"0", 16)
+                if size == 0:
+                    while (await asyncio.wait_for(reader.readline(), timeout)) not in (b"\r\n", b"\n", b""):
+                        pass
+                    break
+                yield await asyncio.wait_for(reader.readexactly(size), timeout)
+                await asyncio.wait_for(reader.readline(), timeout)
+            self._complete = True
+            return
+        length = self.headers.get("content-length")
+        if length is not None:
+            remaining = int(length)
+            while remaining > 0:
+                chunk = await asyncio.wait_for(reader.read(min(remaining, 65536)), timeout)
+                if not chunk:
+                    raise asyncio.IncompleteReadError(b"", remaining)
+                remaining -= len(chunk)
+                yield chunk
+            self._complete = True
+            return
+        while True:
+            chunk = await asyncio.wait_for(reader.read(65536), timeout)
+            if not chunk:
+                break
+            yield chunk
+        self._reusable = False
+
+    async def iter_lines(self) -> AsyncIterator[bytes]:
+        """Yield complete lines (including the line terminator) from the body."""
+        pending = b""
+        async for chunk in self.iter_chunks():
+            pending += chunk
+            while True:
+                index = pending.find(b"\n")
+                if index < 0:
+                    break
+                line, pending = pending[:index + 1], pending[index + 1:]
+                yield line
+        if pending:
+            yield pending
+
+    async def read(self) -> bytes:
+        return b"".join([chunk async for chunk in self.iter_chunks()])
+
+    async def aclose(self) -> None:
+        stream, self._stream = self._stream, None
+        if stream is None:
+            return
+        # Abandoned mid-body the socket is in an unknown state, so only drained streams go back.
+        self._pool._release(self._key, stream, self._complete and self._reusable)  # pylint: disable=protected-access
+        self._slot.release()
+
+    async def __aenter__(self) -> "AsyncPooledResponse":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
+
+
+class _EmptyResponse(Exception):
+    """The peer closed the connection before sending a status line."""
+
+
+def _split(url: str, verify_tls: bool) -> Tuple[PoolKey, str, str]:
+    parts = urlsplit(url)
+    scheme = (parts.scheme or "http").lower()
+    port = parts.port or (443 if scheme == "https" else 80)
+    key: PoolKey = (scheme, parts.hostname or "", port, bool(verify_tls) if scheme == "https" else True)
+    target = parts.path or "/"
+    if parts.query:
+        target = f"{target}?{parts.query}"
+    return key, target, parts.netloc
+
+
+def _encode_request(method: str, target: str, netloc: str, body: Optional[bytes],
+                    headers: Dict[str, str]) -> bytes:
+    if _ILLEGAL_TARGET.search(target):
+        raise ValueError(f"URL can't contain control characters: {target!r}")
+    lines = [f"{method.upper()} {target} HTTP/1.1", f"Host: {netloc}"]
+    names = {name.lower() for name in headers}
+    for name, value in headers.items():
+        name, value = str(name), str(value)
+        if not name.isascii() or not _LEGAL_HEADER_NAME.fullmatch(name):
+            raise ValueError(f"Invalid header name {name!r}")
+        if _ILLEGAL_HEADER_VALUE.search(value):
+            raise ValueError(f"Invalid header value {value!r}")
+        try:
+            value.encode("latin-1")
+        except UnicodeEncodeError:
+            raise ValueError(f"Header {name!r} is not Latin-1 encodable") from None
+        lines.append(f"{name}: {value}")
+    if body is not None and "content-length" not in names:
+        lines.append(f"Content-Length: {len(body)}")
+    if "connection" not in names:
+        lines.append("Connection: keep-alive")
+    head = ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+    return head + (body or b"")
+
+
+async def _read_head(reader: asyncio.StreamReader) -> Tuple[int, str, Dict[str, str]]:
+    status_line = await reader.readline()
+    if not status_line:
+        raise _EmptyResponse("connection closed before response")
+    parts = status_line.decode("latin-1").strip().split(" ", 2)
+    if len(parts) < 2 or not parts[0].startswith("HTTP/"):
+        raise ConnectionError(f"malformed status line: {status_line!r}")
+    headers: Dict[str, str] = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    return int(parts[1]), parts[0], headers
+
+
+async def _read_body(reader: asyncio.StreamReader, headers: Dict[str, str]) -> Tuple[bytes, bool]:
+    """Return ``(body, complete)``; ``complete`` is False when the body ran to EOF."""
+    if "chunked" in headers.get("transfer-encoding", "").lower():
+        chunks = []
+        while True:
+            size_line = await reader.readline()
+            size = int(size_line.split(b";", 1)[0].strip() or b"0", 16)
+            if size == 0:
+                while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+                break
+            chunks.append(await reader.readexactly(size))
+            await reader.readline()
+        return b"".join(chunks), True
+    length = headers.get("content-length")
+    if length is not None:
+        return await reader.readexactly(int(length)), True
+    return await reader.read(), False
+
+
+async def _write(stream: Stream, raw: bytes) -> None:
+    writer = stream[1]
+    writer.write(raw)
+    await writer.drain()
+
+
+async def _start(stream: Stream, timeout: float) -> Tuple[int, str, Dict[str, str]]:
+    reader = stream[0]
+    status, version, headers = await asyncio.wait_for(_read_head(reader), timeout)
+    while 100 <= status < 200:
+        status, version, headers = await asyncio.wait_for(_read_head(reader), timeout)
+    return status, version, headers
+
+
+async def _receive(stream: Stream, method: str) -> Tuple[int, Dict[str, str], bytes, bool]:
+    reader = stream[0]
+    status, version, headers = await _read_head(reader)
+    while 100 <= status < 200:
+        status, version, headers = await _read_head(reader)
+    if method.upper() == "HEAD" or status in (204, 304):
+        payload, complete = b"", True
+    else:
+        payload, complete = await _read_body(reader, headers)
+    connection = headers.get("connection", "").lower()
+    keep_alive = complete and connection != "close" and (version != "HTTP/1.0" or connection == "keep-alive")
+    return status, headers, payload, keep_alive
+
+
+def get_async_pool(max_per_host: Optional[int] = None, idle_timeout: Optional[float] = None) -> AsyncConnectionPool:
+    """Return the pool for the running event loop, creating it on first use."""
+    loop = asyncio.get_running_loop()
+    pool = _POOLS.get(loop)
+    if pool is None:
+        pool = AsyncConnectionPool(
+            max_per_host if max_per_host is not None else 32,
+            idle_timeout if idle_timeout is not None else 30.0,
+        )
+        _POOLS[loop] = pool
+    return pool
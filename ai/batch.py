@@ -0,0 +1,151 @@
+"""
+Fan-out runner for large batches of AI requests.
+
+    from ai.batch import BatchRunner
+
+    runner = BatchRunner(concurrency=16, rate=5, checkpoint_path="enrich.ckpt")
+    for result in runner.run(payloads):
+        save(result["key"], result["response"])
+        runner.mark_done(result["key"], result["response"].get("success"))
+
+Each payload is POSTed as soon as a concurrency slot and a rate-limit token
+are free; queued requests are then handed to the shared poll scheduler, so a
+run of thousands of items costs one poll loop, not one per item.  Results
+come back in completion order.  The caller appends each key to the
+checkpoint file with ``mark_done`` once it has stored the result, and keys
+that already succeeded are skipped when a run is restarted with the same
+checkpoint.  A run killed between receiving a result and saving it then
+repeats that item instead of losing it.
+
+A payload may carry a ``custom_id`` used as its key (it is not sent to the
+proxy); otherwise the key is the item's position in the input.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, Optional, Set
+
+from .local_ai_api import submit_response
+
+__all__ = [
+    "BatchRunner",
+    "TokenBucket",
+]
+
+
+class TokenBucket:
+    """Thread-safe token bucket: ``rate`` tokens per second, bursts up to ``burst``."""
+
+    def __init__(self, rate: float, burst: Optional[float] = None) -> None:
+        self.rate = float(rate)
+        self.capacity = float(burst if burst is not None else max(1.0, rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class BatchRunner:
+    """Submit many payloads with bounded concurrency and stream results as they finish."""
+
+    def __init__(self, concurrency: int = 8, rate: Optional[float] = None, burst: Optional[float] = None,
+                 checkpoint_path: Optional[str] = None, options: Optional[Dict[str, Any]] = None,
+                 submit_workers: int = 4) -> None:
+        self.concurrency = max(1, int(concurrency))
+        self.bucket = TokenBucket(rate, burst) if rate else None
+        self.checkpoint_path = checkpoint_path
+        self.options = dict(options or {})
+        self.submit_workers = max(1, min(int(submit_workers), self.concurrency))
+        self.stats: Dict[str, Any] = {}
+
+    def run(self, payloads: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """Yield ``{"key", "response"}`` dicts in completion order."""
+        done = self._load_checkpoint()
+        self.stats = {"submitted": 0, "succeeded": 0, "failed": 0, "skipped": 0, "started": time.time()}
+        results: "queue.Queue[Dict[str, Any]]" = queue.Queue()
+        slots = threading.BoundedSemaphore(self.concurrency)
+        outstanding = 0
+
+        try:
+            with ThreadPoolExecutor(self.submit_workers, thread_name_prefix="ai-batch") as executor:
+                for index, item in enumerate(payloads):
+                    payload = dict(item)
+                    key = str(payload.pop("custom_id", index))
+                    if key in done:
+                        self.stats["skipped"] += 1
+                        continue
+                    # Hand back finished results while waiting for a free slot.
+                    while not slots.acquire(timeout=0.05):
+                        while not results.empty():
+                            outstanding -= 1
+                            yield self._finish(results.get())
+                    executor.submit(self._start, key, payload, results, slots)
+                    outstanding += 1
+                    self.stats["submitted"] += 1
+                    while not results.empty():
+                        outstanding -= 1
+                        yield self._finish(results.get())
+
+                while outstanding:
+                    outstanding -= 1
+                    yield self._finish(results.get())
+        finally:
+            self.stats["elapsed"] = round(time.time() - self.stats["started"], 3)
+
+    def _start(self, key: str, payload: Dict[str, Any], results: "queue.Queue[Dict[str, Any]]",
+               slots: threading.BoundedSemaphore) -> None:
+        def finish(response: Dict[str, Any]) -> None:
+            results.put({"key": key, "response": response})
+            slots.release()
+
+        try:
+            if self.bucket is not None:
+                self.bucket.acquire()
+            future = submit_response(payload, self.options)
+        except Exception as exc:  # pylint: disable=broad-except
+            finish({"success": False, "error": "request_failed", "message": str(exc)})
+            return
+        future.add_done_callback(lambda done_future: finish(done_future.result()))
+
+    def mark_done(self, key: str, success: Any = True) -> None:
+        """Checkpoint ``key``; call it only after the result has been persisted."""
+        if not self.checkpoint_path:
+            return
+        with open(self.checkpoint_path, "a", encoding="utf-8") as checkpoint:
+            checkpoint.write(json.dumps({"key": str(key), "success": bool(success)}) + "\n")
+
+    def _finish(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        success = bool(result["response"].get("success"))
+        self.stats["succeeded" if success else "failed"] += 1
+        return result
+
+    def _load_checkpoint(self) -> Set[str]:
+        done: Set[str] = set()
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return done
+        with open(self.checkpoint_path, "r", encoding="utf-8") as handle:
+            for line in handle:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # torn final line from an interrupted run
+                if entry.get("success"):
+                    done.add(str(entry.get("key")))
+        return done
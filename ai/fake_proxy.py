@@ -0,0 +1,229 @@
+"""
+Local stand-in for the Flatlogic AI proxy, for benchmarks and offline development.
+
+Implements the two endpoints the client uses:
+
+* ``POST /projects/{id}/ai-request`` — queues the request and answers
+  ``{"ai_request_id": n}``;
+* ``GET /projects/{id}/ai-request/{n}/status`` (and the bare
+  ``/ai-request/{n}/status`` fallback) — ``pending`` until ``queue_delay``
+  seconds have passed, then ``success`` with a Responses-style payload;
+
+plus ``POST .../batch-status`` (``{"ids": [...]}``) for AI_STATUS_BATCH_PATH
+and ``POST /projects/{id}/ai-embeddings``, which answers synchronously with
+deterministic hashed character-trigram vectors (``embedding_dim`` wide), so
+texts sharing spelling land near each other.
+
+    from ai.fake_proxy import FakeProxy
+
+    with FakeProxy(queue_delay=0.2, error_rate=0.01, response_size=2048) as proxy:
+        os.environ["AI_PROXY_BASE_URL"] = proxy.url
+        ...
+
+or from a shell: ``python -m ai.fake_proxy --port 8765 --queue-delay 0.5``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import itertools
+import json
+import math
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+__all__ = [
+    "FakeProxy",
+]
+
+_STATUS_RE = re.compile(r"/ai-request/(?P<id>[^/]+)/status/?$")
+
+
+class FakeProxy:
+    """
+    Threaded HTTP server that behaves like the AI proxy.
+
+    ``queue_delay`` (± ``delay_jitter``) is how long a request stays pending;
+    ``error_rate`` is the fraction of calls answered with 503; the model
+    output is a JSON object padded to roughly ``response_size`` bytes.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, queue_delay: float = 0.5,
+                 delay_jitter: float = 0.0, error_rate: float = 0.0, response_size: int = 256,
+                 seed: Optional[int] = None, embedding_dim: int = 64) -> None:
+        self.queue_delay = float(queue_delay)
+        self.delay_jitter = float(delay_jitter)
+        self.error_rate = float(error_rate)
+        self.response_size = max(0, int(response_size))
+        self.embedding_dim = max(1, int(embedding_dim))
+        self._random = random.Random(seed)
+        self._ids = itertools.count(1)
+        self._ready_at: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self.stats = {"posts": 0, "polls": 0, "batch_polls": 0, "embeddings": 0, "errors": 0}
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeProxy":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-ai-proxy", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "FakeProxy":
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+    def serve_forever(self) -> None:
+        self._server.serve_forever()
+
+    def _queue(self) -> str:
+        delay = self.queue_delay
+        with self._lock:
+            if self.delay_jitter:
+                delay = max(0.0, delay + self._random.uniform(-self.delay_jitter, self.delay_jitter))
+            ai_request_id = str(next(self._ids))
+            self._ready_at[ai_request_id] = time.monotonic() + delay
+            self.stats["posts"] += 1
+        return ai_request_id
+
+    def _status(self, ai_request_id: str) -> Optional[Dict[str, Any]]:
+        ready_at = self._ready_at.get(ai_request_id)
+        if ready_at is None:
+            return None
+        if time.monotonic() < ready_at:
+            return {"status": "pending"}
+        return {"status": "success", "response": self._payload()}
+
+    def _payload(self) -> Dict[str, Any]:
+        text = json.dumps({"ok": True, "padding": "x" * max(0, self.response_size - 32)})
+        return {
+            "id": "resp_fake",
+            "status": "completed",
+            "model": "fake-model",
+            "output": [{"type": "message", "content": [{"type": "output_text", "text": text}]}],
+            "usage": {"input_tokens": 16, "output_tokens": max(1, len(text) // 4)},
+        }
+
+    def _embed(self, text: str) -> List[float]:
+        vector = [0.0] * self.embedding_dim
+        padded = f"  {text.lower()} "
+        for start in range(len(padded) - 2):
+            digest = hashlib.blake2b(padded[start:start + 3].encode("utf-8"), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], "little") % self.embedding_dim
+            vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+        norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+        return [round(value / norm, 6) for value in vector]
+
+    def _should_fail(self) -> bool:
+        if not self.error_rate:
+            return False
+        with self._lock:
+            failed = self._random.random() < self.error_rate
+            if failed:
+                self.stats["errors"] += 1
+        return failed
+
+    def _handler(self):
+        proxy = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):  # noqa: A002  pylint: disable=redefined-builtin
+                pass
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                raw = self.rfile.read(length) if length else b""
+                if proxy._should_fail():
+                    return self._send(503, {"error": "overloaded"}, {"Retry-After": "0"})
+                try:
+                    body = json.loads(raw or b"{}")
+                except json.JSONDecodeError:
+                    return self._send(400, {"error": "invalid_json"})
+                if self.path.rstrip("/").endswith("/ai-embeddings"):
+                    texts = body.get("input")
+                    if isinstance(texts, str):
+                        texts = [texts]
+                    if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+                        return self._send(422, {"error": "input_missing"})
+                    with proxy._lock:
+                        proxy.stats["embeddings"] += len(texts)
+                    data = [{"object": "embedding", "index": i, "embedding": proxy._embed(text)}
+                            for i, text in enumerate(texts)]
+                    return self._send(200, {"object": "list", "model": "fake-embedding", "data": data})
+                if self.path.rstrip("/").endswith("/batch-status"):
+                    with proxy._lock:
+                        proxy.stats["batch_polls"] += 1
+                    statuses = {str(i): proxy._status(str(i)) for i in body.get("ids", [])}
+                    return self._send(200, {"statuses": {k: v for k, v in statuses.items() if v is not None}})
+                if not isinstance(body.get("input"), list):
+                    return self._send(422, {"error": "input_missing"})
+                return self._send(200, {"ai_request_id": proxy._queue()})
+
+            def do_GET(self):
+                match = _STATUS_RE.search(self.path)
+                if not match:
+                    return self._send(404, {"error": "not_found"})
+                with proxy._lock:
+                    proxy.stats["polls"] += 1
+                if proxy._should_fail():
+                    return self._send(503, {"error": "overloaded"}, {"Retry-After": "0"})
+                status = proxy._status(match.group("id"))
+                if status is None:
+                    return self._send(404, {"error": "unknown_request"})
+                return self._send(200, status)
+
+            def _send(self, code: int, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None):
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+
+def main(argv: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(description="Run a local fake AI proxy.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--queue-delay", type=float, default=0.5)
+    parser.add_argument("--delay-jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--response-size", type=int, default=256)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--embedding-dim", type=int, default=64)
+    args = parser.parse_args(argv)
+
+    proxy = FakeProxy(args.host, args.port, args.queue_delay, args.delay_jitter,
+                      args.error_rate, args.response_size, args.seed, args.embedding_dim)
+    print(f"Fake AI proxy on {proxy.url} (AI_PROXY_BASE_URL={proxy.url})", flush=True)
+    try:
+        proxy.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+"""
+Latency, poll and token accounting for the AI proxy client.
+
+Every ``create_response`` / ``acreate_response`` / ``submit_response`` /
+streaming call is timed per phase:
+
+* ``connect``     — opening a new socket (TCP + TLS) in the connection pools;
+* ``post``        — the initial POST round trip;
+* ``queue_wait``  — from the POST being accepted to the final status poll;
+* ``first_token`` — streams only: time until the first text delta;
+* ``total``       — the whole call as seen by the caller.
+
+The number of status polls per request and the ``usage`` token counts per
+model are recorded too.  :func:`render_prometheus` renders everything in the
+Prometheus text format (``ai.views.metrics`` serves it), and :func:`add_hook`
+registers callables that receive one event dict per finished request:
+
+    from ai import instrumentation
+
+    def log_slow(event):
+        if event["phases"]["total"] > 20:
+            logger.warning("slow AI call: %s", event)
+
+    instrumentation.add_hook(log_slow)
+
+Set AI_METRICS=0 to turn recording off; each call site then costs a single
+flag check.
+"""
+
+from __future__ import annotations
+
+import bisect
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from config.env import env
+
+__all__ = [
+    "Histogram",
+    "Trace",
+    "add_hook",
+    "enabled",
+    "observe",
+    "remove_hook",
+    "render_prometheus",
+    "reset",
+    "set_enabled",
+    "snapshot",
+    "start_trace",
+]
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+POLL_BUCKETS = (1, 2, 3, 5, 8, 13, 21, 34, 55)
+
+# Keys of the component stats dicts (pools, poll scheduler, response cache,
+# resilience) that only ever grow; everything else is a point-in-time gauge.
+COUNTER_KEYS = frozenset({
+    "requests", "handshakes", "reused", "stale_retries", "evicted_idle", "discarded",
+    "submitted", "polls", "batches", "batched_ids", "resolved", "timeouts", "poll_errors",
+    "hits", "misses", "stores", "shared", "rejected", "evictions",
+    "retries", "hedges", "hedge_wins",
+})
+
+_ENABLED = env.bool("AI_METRICS", True)
+_HOOKS: List[Callable[[Dict[str, Any]], None]] = []
+_LOCK = threading.Lock()
+
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by a label value, Prometheus style."""
+
+    def __init__(self, buckets: Iterable[float]) -> None:
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[str, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, label: str, value: float) -> None:
+        series = self._series.get(label)
+        if series is None:
+            series = self._series[label] = ([0] * (len(self.buckets) + 1), [0.0])
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1][0] += value
+
+    def series(self) -> Dict[str, Dict[str, Any]]:
+        result = {}
+        for label, (counts, total) in self._series.items():
+            cumulative, running = [], 0
+            for count in counts:
+                running += count
+                cumulative.append(running)
+            result[label] = {"buckets": cumulative, "sum": total[0], "count": running}
+        return result
+
+
+class _Registry:
+    def __init__(self) -> None:
+        self.phases = Histogram(LATENCY_BUCKETS)
+        self.polls = Histogram(POLL_BUCKETS)
+        self.requests: Dict[Tuple[str, str], int] = {}
+        self.tokens: Dict[Tuple[str, str], int] = {}
+
+
+_REGISTRY = _Registry()
+
+
+def enabled() -> bool:
+    return _ENABLED
+
+
+def set_enabled(flag: bool) -> None:
+    global _ENABLED  # noqa: PLW0603
+    _ENABLED = bool(flag)
+
+
+def add_hook(hook: Callable[[Dict[str, Any]], None]) -> None:
+    """Call ``hook(event)`` after every traced request; exceptions are logged and ignored."""
+    with _LOCK:
+        if hook not in _HOOKS:
+            _HOOKS.append(hook)
+
+
+def remove_hook(hook: Callable[[Dict[str, Any]], None]) -> None:
+    with _LOCK:
+        if hook in _HOOKS:
+            _HOOKS.remove(hook)
+
+
+def observe(phase: str, seconds: float) -> None:
+    """Record one timing for ``phase`` (used by the transports for ``connect``)."""
+    if not _ENABLED:
+        return
+    with _LOCK:
+        _REGISTRY.phases.observe(phase, seconds)
+
+
+def start_trace(model: Any) -> Optional["Trace"]:
+    """A :class:`Trace` for one request, or None while instrumentation is off."""
+    if not _ENABLED:
+        return None
+    return Trace(str(model or "unknown"))
+
+
+class Trace:
+    """Timestamps and counters for a single request; :meth:`finish` records them."""
+
+    __slots__ = ("model", "started", "posted", "first_token", "polls")
+
+    def __init__(self, model: str) -> None:
+        self.model = model
+        self.started = time.perf_counter()
+        self.posted: Optional[float] = None
+        self.first_token: Optional[float] = None
+        self.polls = 0
+
+    def mark_posted(self) -> None:
+        self.posted = time.perf_counter()
+
+    def mark_first_token(self) -> None:
+        if self.first_token is None:
+            self.first_token = time.perf_counter()
+
+    def finish(self, response: Dict[str, Any]) -> None:
+        ended = time.perf_counter()
+        phases = {"total": ended - self.started}
+        if self.posted is not None:
+            phases["post"] = self.posted - self.started
+            if self.polls:
+                phases["queue_wait"] = ended - self.posted
+        if self.first_token is not None:
+            phases["first_token"] = self.first_token - self.started
+
+        cache = response.get("cache")
+        cached = isinstance(cache, dict) and bool(cache.get("hit"))
+        data = response.get("data") if isinstance(response.get("data"), dict) else {}
+        model = str(data.get("model") or self.model)
+        usage = {} if cached else _usage(data.get("usage"))
+        if response.get("success"):
+            outcome = "cached" if cached else "success"
+        else:
+            outcome = "timeout" if response.get("error") == "timeout" else "error"
+
+        with _LOCK:
+            for phase, seconds in phases.items():
+                _REGISTRY.phases.observe(phase, seconds)
+            if self.polls:
+                _REGISTRY.polls.observe("", self.polls)
+            _REGISTRY.requests[(model, outcome)] = _REGISTRY.requests.get((model, outcome), 0) + 1
+            for kind, count in usage.items():
+                _REGISTRY.tokens[(model, kind)] = _REGISTRY.tokens.get((model, kind), 0) + count
+            hooks = list(_HOOKS)
+
+        if not hooks:
+            return
+        event = {
+            "model": model,
+            "outcome": outcome,
+            "error": response.get("error"),
+            "phases": phases,
+            "polls": self.polls,
+            "usage": usage,
+        }
+        for hook in hooks:
+            try:
+                hook(event)
+            except Exception:  # pylint: disable=broad-except
+                logger.exception("AI instrumentation hook %r failed", hook)
+
+
+def _usage(usage: Any) -> Dict[str, int]:
+    """Input/output token counts from a Responses or chat-completions ``usage`` block."""
+    if not isinstance(usage, dict):
+        return {}
+    counts = {}
+    for kind, keys in (("input", ("input_tokens", "prompt_tokens")), ("output", ("output_tokens", "completion_tokens"))):
+        for key in keys:
+            value = usage.get(key)
+            if isinstance(value, int):
+                counts[kind] = value
+                break
+    return counts
+
+
+def snapshot() -> Dict[str, Any]:
+    """Plain-dict copy of every series, for tests and ad-hoc inspection."""
+    with _LOCK:
+        return {
+            "phases": _REGISTRY.phases.series(),
+            "polls": _REGISTRY.polls.series().get("", {"buckets": [], "sum": 0, "count": 0}),
+            "requests": {f"{model}:{outcome}": n for (model, outcome), n in _REGISTRY.requests.items()},
+            "tokens": {f"{model}:{kind}": n for (model, kind), n in _REGISTRY.tokens.items()},
+        }
+
+
+def reset() -> None:
+    global _REGISTRY  # noqa: PLW0603
+    with _LOCK:
+        _REGISTRY = _Registry()
+
+
+def render_prometheus(gauges: Optional[Dict[str, Dict[str, Any]]] = None) -> str:
+    """
+    Prometheus text exposition of the recorded series.
+
+    ``gauges`` maps a metric prefix to a flat stats dict (e.g. ``pool_stats()``);
+    each numeric value is exported as the gauge ``<prefix>_<key>``, or as the
+    counter ``<prefix>_<key>_total`` if ``key`` is in :data:`COUNTER_KEYS`.
+    """
+    with _LOCK:
+        phases = _REGISTRY.phases.series()
+        polls = _REGISTRY.polls.series()
+        requests = dict(_REGISTRY.requests)
+        tokens = dict(_REGISTRY.tokens)
+
+    lines: List[str] = []
+    _histogram(lines, "ai_client_phase_seconds", "Time spent per request phase.", "phase", phases, LATENCY_BUCKETS)
+    _histogram(lines, "ai_client_polls", "Status polls needed per queued request.", None, polls, POLL_BUCKETS)
+
+    lines.append("# HELP ai_client_requests_total Finished requests by model and outcome.")
+    lines.append("# TYPE ai_client_requests_total counter")
+    for (model, outcome), count in sorted(requests.items()):
+        lines.append(f'ai_client_requests_total{{model="{_escape(model)}",outcome="{outcome}"}} {count}')
+
+    lines.append("# HELP ai_client_tokens_total Tokens reported in usage blocks, by model and kind.")
+    lines.append("# TYPE ai_client_tokens_total counter")
+    for (model, kind), count in sorted(tokens.items()):
+        lines.append(f'ai_client_tokens_total{{model="{_escape(model)}",kind="{kind}"}} {count}')
+
+    for prefix, stats in (gauges or {}).items():
+        for key, value in sorted(stats.items()):
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                continue
+            if key in COUNTER_KEYS:
+                lines.append(f"# TYPE {prefix}_{key}_total counter")
+                lines.append(f"{prefix}_{key}_total {value}")
+            else:
+                lines.append(f"# TYPE {prefix}_{key} gauge")
+                lines.append(f"{prefix}_{key} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def _histogram(lines: List[str], name: str, help_text: str, label: Optional[str],
+               series: Dict[str, Dict[str, Any]], buckets: Tuple[float, ...]) -> None:
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} histogram")
+    for value, data in sorted(series.items()):
+        base = f'{label}="{_escape(value)}",' if label else ""
+        for bound, count in zip(buckets, data["buckets"]):
+            lines.append(f'{name}_bucket{{{base}le="{bound}"}} {count}')
+        lines.append(f'{name}_bucket{{{base}le="+Inf"}} {data["count"]}')
+        suffix = f"{{{base.rstrip(',')}}}" if label else ""
+        lines.append(f"{name}_sum{suffix} {round(data['sum'], 6)}")
+        lines.append(f"{name}_count{suffix} {data['count']}")
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
@@ -17,6 +17,10 @@ Usage (inside the Django workspace):
         data = LocalAIApi.decode_json_from_response(response)
         # ...
 
+    # From async views / ASGI code the same calls are awaitable and poll
+    # without tying up a thread:
+    response = await LocalAIApi.acreate_response({...})
+
 # Typical successful payload (truncated):
 # {
 #   "id": "resp_xxx",
@@ -28,19 +32,67 @@ Usage (inside the Django workspace):
 #   "usage": { "input_tokens": 123, "output_tokens": 456 }
 # }
 
-The helper automatically injects the project UUID header and falls back to
-reading executor/.env if environment variables are missing.
+The helper automatically injects the project UUID header.  Settings are read
+through ``config.env`` (environment variables and the .env files), once, and
+again after a SIGHUP reload.
+
+Requests share a keep-alive connection pool (see ``ai.transport``); tune it
+with AI_POOL_SIZE (idle sockets kept per host) and AI_POOL_IDLE_TIMEOUT
+(seconds before an idle socket is dropped). ``LocalAIApi.pool_stats()``
+reports handshakes vs. reused connections. The async helpers use a per-loop
+pool (``ai.async_transport``) that keeps at most AI_ASYNC_MAX_CONNECTIONS
+sockets per host, however many requests are awaiting.
+
+Outstanding requests are polled by one process-wide scheduler
+(``ai.poll_scheduler``): first poll after AI_POLL_FIRST_DELAY seconds, then
+exponential backoff (AI_POLL_BACKOFF, ±AI_POLL_JITTER) up to ``poll_interval``.
+Set AI_STATUS_BATCH_PATH if the proxy accepts ``{"ids": [...]}`` status
+batches.  The async helpers poll on the event loop instead, through the
+async transport and with the same backoff; those polls are not batched.
+
+Pass ``{"cache": True}`` in options (or set AI_RESPONSE_CACHE=locmem /
+django[:alias] to default it on) to serve repeated prompts from
+``ai.response_cache``; AI_RESPONSE_CACHE_TTL and AI_RESPONSE_CACHE_MAX_BYTES
+bound it.
+
+Failed calls are retried with backoff (AI_RETRY_ATTEMPTS, honouring
+Retry-After), a per-host circuit breaker fails fast after AI_BREAKER_THRESHOLD
+consecutive failures for AI_BREAKER_RESET seconds, status polls tolerate
+AI_POLL_MAX_ERRORS transient failures, and AI_HEDGE_DELAY > 0 hedges slow
+status polls. ``resilience_stats()`` reports retries and breaker transitions.
+
+Per-phase latency, polls per request and ``usage`` tokens per model are
+recorded by ``ai.instrumentation`` (AI_METRICS=0 turns it off); mount
+``ai.views.metrics`` for a Prometheus scrape endpoint.
+
+``stream_response`` / ``astream_response`` yield text deltas over SSE instead
+of waiting for the whole answer; see ``ai.streaming`` for the incremental JSON
+decoder and the ``StreamingHttpResponse`` helper.
+
+``create_embeddings(["text", ...])`` returns one vector per text from
+AI_EMBEDDINGS_PATH (default ``/projects/{PROJECT_ID}/ai-embeddings``) using
+AI_EMBEDDING_MODEL.
 """
 
 from __future__ import annotations
 
+import asyncio
 import json
-import os
+import threading
 import time
-import ssl
-from typing import Any, Dict, Iterable, Optional
-from urllib import error as urlerror
-from urllib import request as urlrequest
+from concurrent.futures import Future
+from urllib.parse import urlsplit
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from config.env import env
+
+from .async_transport import get_async_pool
+from .instrumentation import start_trace
+from .poll_scheduler import PollScheduler, backoff_delay
+from .resilience import RetryPolicy, ahedged_call, breaker_for, hedged_call, record, resilience_stats
+from .response_cache import DjangoCacheBackend, LocMemLRUBackend, ResponseCache, cache_key
+from .streaming import AIStreamError, aiter_sse_events, event_text, iter_sse_events
+from .transport import get_pool
 
 __all__ = [
     "LocalAIApi",
@@ -48,12 +100,29 @@ __all__ = [
     "request",
     "fetch_status",
     "await_response",
+    "submit_response",
+    "acreate_response",
+    "arequest",
+    "afetch_status",
+    "aawait_response",
+    "stream_response",
+    "astream_response",
+    "create_embeddings",
+    "acreate_embeddings",
     "extract_text",
     "decode_json_from_response",
+    "pool_stats",
+    "poll_stats",
+    "cache_stats",
+    "resilience_stats",
 ]
 
 
 _CONFIG_CACHE: Optional[Dict[str, Any]] = None
+_CONFIG_GENERATION = -1
+_SCHEDULER: Optional[PollScheduler] = None
+_SCHEDULER_LOCK = threading.Lock()
+_RESPONSE_CACHE: Optional[ResponseCache] = None
 
 
 class LocalAIApi:
@@ -68,6 +137,43 @@ class LocalAIApi:
                 options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         return request(path, payload or {}, options or {})
 
+    @staticmethod
+    def submit_response(params: Dict[str, Any], options: Optional[Dict[str, Any]] = None) -> Future:
+        return submit_response(params, options or {})
+
+    @staticmethod
+    async def acreate_response(params: Dict[str, Any], options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        return await acreate_response(params, options or {})
+
+    @staticmethod
+    async def arequest(path: Optional[str] = None, payload: Optional[Dict[str, Any]] = None,
+                       options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        return await arequest(path, payload or {}, options or {})
+
+    @staticmethod
+    async def afetch_status(ai_request_id: Any, options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        return await afetch_status(ai_request_id, options or {})
+
+    @staticmethod
+    async def aawait_response(ai_request_id: Any, options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        return await aawait_response(ai_request_id, options or {})
+
+    @staticmethod
+    def stream_response(params: Dict[str, Any], options: Optional[Dict[str, Any]] = None) -> Iterator[str]:
+        return stream_response(params, options or {})
+
+    @staticmethod
+    def astream_response(params: Dict[str, Any], options: Optional[Dict[str, Any]] = None) -> AsyncIterator[str]:
+        return astream_response(params, options or {})
+
+    @staticmethod
+    def create_embeddings(texts: List[str], options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        return create_embeddings(texts, options or {})
+
+    @staticmethod
+    async def acreate_embeddings(texts: List[str], options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        return await acreate_embeddings(texts, options or {})
+
     @staticmethod
     def extract_text(response: Dict[str, Any]) -> str:
         return extract_text(response)
@@ -76,165 +182,288 @@ class LocalAIApi:
     def decode_json_from_response(response: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         return decode_json_from_response(response)
 
+    @staticmethod
+    def pool_stats() -> Dict[str, Any]:
+        return pool_stats()
+
+    @staticmethod
+    def poll_stats() -> Dict[str, Any]:
+        return poll_stats()
+
+    @staticmethod
+    def cache_stats() -> Dict[str, Any]:
+        return cache_stats()
+
+    @staticmethod
+    def resilience_stats() -> Dict[str, Any]:
+        return resilience_stats()
+
 
 def create_response(params: Dict[str, Any], options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     """Signature compatible with the OpenAI Responses API."""
     options = options or {}
-    payload = dict(params)
+    payload = _prepare_payload(params)
+    if payload.get("success") is False:
+        return payload
 
-    if not isinstance(payload.get("input"), list) or not payload["input"]:
-        return {
-            "success": False,
-            "error": "input_missing",
-            "message": 'Parameter "input" is required and must be a non-empty list.',
-        }
+    trace = start_trace(payload["model"])
+    cache = _response_cache(options)
+    if cache is not None:
+        response = cache.get_or_create(
+            cache_key(payload),
+            lambda: _create_response(payload, options, trace),
+            options.get("cache_ttl"),
+        )
+    else:
+        response = _create_response(payload, options, trace)
+    if trace is not None:
+        trace.finish(response)
+    return response
+
+
+def submit_response(params: Dict[str, Any], options: Optional[Dict[str, Any]] = None) -> Future:
+    """
+    Send the request and return a Future for the final response without waiting on it.
 
-    cfg = _config()
-    if not payload.get("model"):
-        payload["model"] = cfg["default_model"]
+    Queued requests are polled by the shared scheduler, so thousands of these
+    can be outstanding at once; the Future never raises.
+    """
+    options = options or {}
+    payload = _prepare_payload(params)
+    future: Future = Future()
+    if payload.get("success") is False:
+        future.set_result(payload)
+        return future
+
+    trace = start_trace(payload["model"])
+    initial = request(options.get("path"), payload, options)
+    if trace is not None:
+        trace.mark_posted()
+    ai_request_id = _queued_request_id(initial) if initial.get("success") else None
+    if ai_request_id is None:
+        if trace is not None:
+            trace.finish(initial)
+        future.set_result(initial)
+        return future
+
+    future = _submit_poll(ai_request_id, _await_options(options), trace)
+    if trace is not None:
+        future.add_done_callback(lambda done: trace.finish(done.result()))
+    return future
+
+
+async def acreate_response(params: Dict[str, Any], options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Async twin of :func:`create_response`; polls without blocking the event loop."""
+    options = options or {}
+    payload = _prepare_payload(params)
+    if payload.get("success") is False:
+        return payload
 
+    trace = start_trace(payload["model"])
+    cache = _response_cache(options)
+    if cache is not None:
+        response = await cache.aget_or_create(
+            cache_key(payload),
+            lambda: _acreate_response(payload, options, trace),
+            options.get("cache_ttl"),
+        )
+    else:
+        response = await _acreate_response(payload, options, trace)
+    if trace is not None:
+        trace.finish(response)
+    return response
+
+
+def _create_response(payload: Dict[str, Any], options: Dict[str, Any], trace: Any = None) -> Dict[str, Any]:
     initial = request(options.get("path"), payload, options)
+    if trace is not None:
+        trace.mark_posted()
     if not initial.get("success"):
         return initial
 
-    data = initial.get("data")
-    if isinstance(data, dict) and "ai_request_id" in data:
-        ai_request_id = data["ai_request_id"]
-        poll_timeout = int(options.get("poll_timeout", 300))
-        poll_interval = int(options.get("poll_interval", 5))
-        return await_response(ai_request_id, {
-            "interval": poll_interval,
-            "timeout": poll_timeout,
-            "headers": options.get("headers"),
-            "timeout_per_call": options.get("timeout"),
-        })
+    ai_request_id = _queued_request_id(initial)
+    if ai_request_id is not None:
+        return _submit_poll(ai_request_id, _await_options(options), trace).result()
 
     return initial
 
 
-def request(path: Optional[str], payload: Dict[str, Any], options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
-    """Perform a raw request to the AI proxy."""
-    cfg = _config()
-    options = options or {}
+async def _acreate_response(payload: Dict[str, Any], options: Dict[str, Any], trace: Any = None) -> Dict[str, Any]:
+    initial = await arequest(options.get("path"), payload, options)
+    if trace is not None:
+        trace.mark_posted()
+    if not initial.get("success"):
+        return initial
 
-    resolved_path = path or options.get("path") or cfg["responses_path"]
-    if not resolved_path:
-        return {
-            "success": False,
-            "error": "project_id_missing",
-            "message": "PROJECT_ID is not defined; cannot resolve AI proxy endpoint.",
-        }
+    ai_request_id = _queued_request_id(initial)
+    if ai_request_id is not None:
+        return await _apoll(ai_request_id, _await_options(options), trace)
 
-    project_uuid = cfg["project_uuid"]
-    if not project_uuid:
-        return {
-            "success": False,
-            "error": "project_uuid_missing",
-            "message": "PROJECT_UUID is not defined; aborting AI request.",
-        }
+    return initial
 
-    if "project_uuid" not in payload and project_uuid:
-        payload["project_uuid"] = project_uuid
 
-    url = _build_url(resolved_path, cfg["base_url"])
-    opt_timeout = options.get("timeout")
-    timeout = int(cfg["timeout"] if opt_timeout is None else opt_timeout)
-    verify_tls = options.get("verify_tls", cfg["verify_tls"])
+def request(path: Optional[str], payload: Dict[str, Any], options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Perform a raw request to the AI proxy."""
+    prepared = _prepare_request(path, payload, options or {})
+    if prepared.get("success") is False:
+        return prepared
+    return _http_request(**prepared)
 
-    headers: Dict[str, str] = {
-        "Content-Type": "application/json",
-        "Accept": "application/json",
-        cfg["project_header"]: project_uuid,
-    }
-    extra_headers = options.get("headers")
-    if isinstance(extra_headers, Iterable):
-        for header in extra_headers:
-            if isinstance(header, str) and ":" in header:
-                name, value = header.split(":", 1)
-                headers[name.strip()] = value.strip()
 
-    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
-    return _http_request(url, "POST", body, headers, timeout, verify_tls)
+async def arequest(path: Optional[str], payload: Dict[str, Any],
+                   options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Async twin of :func:`request`."""
+    prepared = _prepare_request(path, payload, options or {})
+    if prepared.get("success") is False:
+        return prepared
+    return await _ahttp_request(**prepared)
 
 
 def fetch_status(ai_request_id: Any, options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     """Fetch status for a queued AI request."""
-    cfg = _config()
-    options = options or {}
+    prepared = _prepare_status_request(ai_request_id, options or {})
+    if prepared.get("success") is False:
+        return prepared
+    return _http_request(**prepared)
 
-    project_uuid = cfg["project_uuid"]
-    if not project_uuid:
-        return {
-            "success": False,
-            "error": "project_uuid_missing",
-            "message": "PROJECT_UUID is not defined; aborting status check.",
-        }
 
-    status_path = _resolve_status_path(ai_request_id, cfg)
-    url = _build_url(status_path, cfg["base_url"])
+async def afetch_status(ai_request_id: Any, options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Async twin of :func:`fetch_status`."""
+    prepared = _prepare_status_request(ai_request_id, options or {})
+    if prepared.get("success") is False:
+        return prepared
+    return await _ahttp_request(**prepared)
 
-    opt_timeout = options.get("timeout")
-    timeout = int(cfg["timeout"] if opt_timeout is None else opt_timeout)
-    verify_tls = options.get("verify_tls", cfg["verify_tls"])
 
-    headers: Dict[str, str] = {
-        "Accept": "application/json",
-        cfg["project_header"]: project_uuid,
-    }
-    extra_headers = options.get("headers")
-    if isinstance(extra_headers, Iterable):
-        for header in extra_headers:
-            if isinstance(header, str) and ":" in header:
-                name, value = header.split(":", 1)
-                headers[name.strip()] = value.strip()
+def await_response(ai_request_id: Any, options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Wait until the request is complete or timed out, via the shared poll scheduler."""
+    return _submit_poll(ai_request_id, options or {}).result()
 
-    return _http_request(url, "GET", None, headers, timeout, verify_tls)
 
+async def aawait_response(ai_request_id: Any, options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Async twin of :func:`await_response`; many of these can share one event loop."""
+    return await _apoll(ai_request_id, options or {})
 
-def await_response(ai_request_id: Any, options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
-    """Poll status endpoint until the request is complete or timed out."""
+
+def stream_response(params: Dict[str, Any], options: Optional[Dict[str, Any]] = None) -> Iterator[str]:
+    """
+    Yield text deltas as the model produces them.
+
+    Asks the proxy for Server-Sent Events; if it answers with a plain JSON
+    (queued) response instead, the full text is yielded once it is ready.
+    Errors are raised as :class:`ai.streaming.AIStreamError`.
+    """
     options = options or {}
-    timeout = int(options.get("timeout", 300))
-    interval = int(options.get("interval", 5))
-    if interval <= 0:
-        interval = 5
-    per_call_timeout = options.get("timeout_per_call")
+    prepared = _prepare_stream_request(params, options)
+    trace = start_trace(params.get("model") or _config()["default_model"])
+    try:
+        try:
+            resp = _pool().open(**prepared)
+        except Exception as exc:  # pylint: disable=broad-except
+            raise AIStreamError({"success": False, "error": "request_failed", "message": str(exc)}) from exc
+        if trace is not None:
+            trace.mark_posted()
+
+        with resp:
+            if "text/event-stream" not in resp.headers.get("content-type", ""):
+                final = _decode_http_response(resp.status, resp.read())
+                ai_request_id = _queued_request_id(final) if final.get("success") else None
+                if ai_request_id is not None:
+                    final = _submit_poll(ai_request_id, _await_options(options), trace).result()
+                text = _unstreamed_text(final)
+                if trace is not None:
+                    trace.finish(final)
+                yield text
+                return
+
+            lines = resp.iter_lines()
+            for event, data in iter_sse_events(lines):
+                text = event_text(event, data)
+                if text is None:
+                    break
+                if text:
+                    if trace is not None:
+                        trace.mark_first_token()
+                    yield text
+            for _ in lines:
+                pass  # drain so the connection can be reused
+        if trace is not None:
+            trace.finish({"success": True})
+    except AIStreamError as exc:
+        if trace is not None:
+            trace.finish(exc.response)
+        raise
+
+
+async def astream_response(params: Dict[str, Any], options: Optional[Dict[str, Any]] = None) -> AsyncIterator[str]:
+    """Async-iterator twin of :func:`stream_response`."""
+    options = options or {}
+    prepared = _prepare_stream_request(params, options)
+    trace = start_trace(params.get("model") or _config()["default_model"])
+    try:
+        try:
+            resp = await _async_pool().open(**prepared)
+        except Exception as exc:  # pylint: disable=broad-except
+            raise AIStreamError({
+                "success": False,
+                "error": "request_failed",
+                "message": str(exc) or exc.__class__.__name__,
+            }) from exc
+        if trace is not None:
+            trace.mark_posted()
+
+        async with resp:
+            if "text/event-stream" not in resp.headers.get("content-type", ""):
+                final = _decode_http_response(resp.status, await resp.read())
+                ai_request_id = _queued_request_id(final) if final.get("success") else None
+                if ai_request_id is not None:
+                    final = await _apoll(ai_request_id, _await_options(options), trace)
+                text = _unstreamed_text(final)
+                if trace is not None:
+                    trace.finish(final)
+                yield text
+                return
+
+            lines = resp.iter_lines()
+            async for event, data in aiter_sse_events(lines):
+                text = event_text(event, data)
+                if text is None:
+                    break
+                if text:
+                    if trace is not None:
+                        trace.mark_first_token()
+                    yield text
+            async for _ in lines:
+                pass  # drain so the connection can be reused
+        if trace is not None:
+            trace.finish({"success": True})
+    except AIStreamError as exc:
+        if trace is not None:
+            trace.finish(exc.response)
+        raise
+
+
+def create_embeddings(texts: List[str], options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Embed ``texts`` in one call.
 
-    deadline = time.time() + max(timeout, interval)
+    Returns ``{"success": True, "embeddings": [[float, ...], ...], "model": ...}``
+    in input order, or the usual error dict.
+    """
+    options = options or {}
+    path = _embeddings_path(options)
+    if path is None:
+        return _embeddings_path_missing()
+    return _decode_embeddings(request(path, _embeddings_payload(texts, options), options), len(texts))
 
-    while True:
-        status_resp = fetch_status(ai_request_id, {
-            "headers": options.get("headers"),
-            "timeout": per_call_timeout,
-            "verify_tls": options.get("verify_tls"),
-        })
-        if status_resp.get("success"):
-            data = status_resp.get("data") or {}
-            if isinstance(data, dict):
-                status_value = data.get("status")
-                if status_value == "success":
-                    return {
-                        "success": True,
-                        "status": 200,
-                        "data": data.get("response", data),
-                    }
-                if status_value == "failed":
-                    return {
-                        "success": False,
-                        "status": 500,
-                        "error": str(data.get("error") or "AI request failed"),
-                        "data": data,
-                    }
-        else:
-            return status_resp
 
-        if time.time() >= deadline:
-            return {
-                "success": False,
-                "error": "timeout",
-                "message": "Timed out waiting for AI response.",
-            }
-        time.sleep(interval)
+async def acreate_embeddings(texts: List[str], options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Async twin of :func:`create_embeddings`."""
+    options = options or {}
+    path = _embeddings_path(options)
+    if path is None:
+        return _embeddings_path_missing()
+    return _decode_embeddings(await arequest(path, _embeddings_payload(texts, options), options), len(texts))
 
 
 def extract_text(response: Dict[str, Any]) -> str:
@@ -244,6 +473,10 @@ def extract_text(response: Dict[str, Any]) -> str:
 
 def decode_json_from_response(response: Dict[str, Any]) -> Optional[Dict[str, Any]]:
     """Attempt to decode JSON emitted by the model (handles markdown fences)."""
+    cached = response.get("cache")
+    if isinstance(cached, dict) and "json" in cached:
+        return cached["json"]
+
     text = _extract_text(response)
     if text == "":
         return None
@@ -271,6 +504,21 @@ def decode_json_from_response(response: Dict[str, Any]) -> Optional[Dict[str, An
     return None
 
 
+def pool_stats() -> Dict[str, Any]:
+    """Connection pool counters (handshakes, reused connections, idle sockets, ...)."""
+    return _pool().stats()
+
+
+def poll_stats() -> Dict[str, Any]:
+    """Poll scheduler counters (polls sent, batches, outstanding requests, ...); async polls are not counted."""
+    return _scheduler().stats()
+
+
+def cache_stats() -> Dict[str, Any]:
+    """Response cache counters (hits, misses, shared in-flight calls, bytes, ...)."""
+    return _shared_response_cache().stats()
+
+
 def _extract_text(response: Dict[str, Any]) -> str:
     payload = response.get("data") if response.get("success") else response.get("response")
     if isinstance(payload, dict):
@@ -295,32 +543,416 @@ def _extract_text(response: Dict[str, Any]) -> str:
     return ""
 
 
+def _embeddings_path(options: Dict[str, Any]) -> Optional[str]:
+    return options.get("path") or _config()["embeddings_path"]
+
+
+def _embeddings_path_missing() -> Dict[str, Any]:
+    return {
+        "success": False,
+        "error": "project_id_missing",
+        "message": "PROJECT_ID is not defined; cannot resolve AI embeddings endpoint.",
+    }
+
+
+def _embeddings_payload(texts: List[str], options: Dict[str, Any]) -> Dict[str, Any]:
+    return {"model": options.get("model") or _config()["embedding_model"], "input": list(texts)}
+
+
+def _decode_embeddings(response: Dict[str, Any], expected: int) -> Dict[str, Any]:
+    if not response.get("success"):
+        return response
+    data = response.get("data")
+    items = data.get("data") if isinstance(data, dict) else None
+    if not isinstance(items, list) or len(items) != expected:
+        return {
+            "success": False,
+            "error": "invalid_embeddings",
+            "message": f"Expected {expected} embeddings from the AI proxy.",
+            "response": data,
+        }
+    ordered = sorted(items, key=lambda item: item.get("index", 0))
+    return {
+        "success": True,
+        "embeddings": [item.get("embedding") for item in ordered],
+        "model": data.get("model"),
+        "usage": data.get("usage"),
+    }
+
+
+def _prepare_payload(params: Dict[str, Any]) -> Dict[str, Any]:
+    payload = dict(params)
+
+    if not isinstance(payload.get("input"), list) or not payload["input"]:
+        return {
+            "success": False,
+            "error": "input_missing",
+            "message": 'Parameter "input" is required and must be a non-empty list.',
+        }
+
+    if not payload.get("model"):
+        payload["model"] = _config()["default_model"]
+    return payload
+
+
+def _prepare_stream_request(params: Dict[str, Any], options: Dict[str, Any]) -> Dict[str, Any]:
+    payload = _prepare_payload(params)
+    if payload.get("success") is False:
+        raise AIStreamError(payload)
+    payload["stream"] = True
+
+    prepared = _prepare_request(options.get("path"), payload, options)
+    if prepared.get("success") is False:
+        raise AIStreamError(prepared)
+    prepared["headers"]["Accept"] = "text/event-stream, application/json"
+    return prepared
+
+
+def _unstreamed_text(final: Dict[str, Any]) -> str:
+    """Whole text of a reply the proxy did not stream."""
+    if not final.get("success"):
+        raise AIStreamError(final)
+    return _extract_text(final)
+
+
+def _queued_request_id(initial: Dict[str, Any]) -> Any:
+    data = initial.get("data")
+    if isinstance(data, dict) and "ai_request_id" in data:
+        return data["ai_request_id"]
+    return None
+
+
+def _await_options(options: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "interval": int(options.get("poll_interval", 5)),
+        "timeout": int(options.get("poll_timeout", 300)),
+        "headers": options.get("headers"),
+        "timeout_per_call": options.get("timeout"),
+    }
+
+
+def _status_options(options: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "headers": options.get("headers"),
+        "timeout": options.get("timeout_per_call"),
+        "verify_tls": options.get("verify_tls"),
+    }
+
+
+def _submit_poll(ai_request_id: Any, options: Dict[str, Any], trace: Any = None) -> Future:
+    """Hand ``ai_request_id`` to the shared scheduler; ``options`` are in :func:`_await_options` form."""
+    timeout, interval = _poll_window(options)
+    return _scheduler().submit(ai_request_id, _status_options(options), timeout, interval, trace)
+
+
+async def _apoll(ai_request_id: Any, options: Dict[str, Any], trace: Any = None) -> Dict[str, Any]:
+    """
+    Event-loop counterpart of :func:`_submit_poll`, on the async transport.
+
+    Same schedule and error tolerance as :class:`PollScheduler`, without its
+    thread pool, so concurrent awaits are bounded only by the transport's
+    per-host connection limit.
+    """
+    cfg = _config()
+    timeout, interval = _poll_window(options)
+    status_options = _status_options(options)
+    ceiling = max(float(interval), cfg["poll_first_delay"], 0.01)
+    deadline = time.monotonic() + max(float(timeout), ceiling)
+    attempt = errors = 0
+    while True:
+        delay = backoff_delay(attempt, cfg["poll_first_delay"], ceiling, cfg["poll_backoff"], cfg["poll_jitter"])
+        await asyncio.sleep(max(0.0, min(delay, deadline - time.monotonic())))
+        try:
+            response = await afetch_status(ai_request_id, status_options)
+        except Exception as exc:  # pylint: disable=broad-except
+            response = {"success": False, "error": "request_failed", "message": str(exc)}
+        final = _final_status(response)
+        if response.get("success"):
+            errors = 0
+        elif errors < cfg["poll_max_errors"] and _is_transient(response):
+            errors += 1
+            final = None
+        if final is None and time.monotonic() >= deadline:
+            final = _timeout_error()
+        if final is not None:
+            if trace is not None:
+                trace.polls = attempt + 1
+            return final
+        attempt += 1
+
+
+def _poll_window(options: Dict[str, Any]) -> Tuple[int, int]:
+    timeout = int(options.get("timeout", 300))
+    interval = int(options.get("interval", 5))
+    if interval <= 0:
+        interval = 5
+    return timeout, interval
+
+
+def _final_status(status_resp: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Map a status poll onto the final result, or None while the request is still pending."""
+    if not status_resp.get("success"):
+        return status_resp
+    data = status_resp.get("data") or {}
+    if isinstance(data, dict):
+        status_value = data.get("status")
+        if status_value == "success":
+            return {
+                "success": True,
+                "status": 200,
+                "data": data.get("response", data),
+            }
+        if status_value == "failed":
+            return {
+                "success": False,
+                "status": 500,
+                "error": str(data.get("error") or "AI request failed"),
+                "data": data,
+            }
+    return None
+
+
+def _timeout_error() -> Dict[str, Any]:
+    return {
+        "success": False,
+        "error": "timeout",
+        "message": "Timed out waiting for AI response.",
+    }
+
+
+def _prepare_request(path: Optional[str], payload: Dict[str, Any], options: Dict[str, Any]) -> Dict[str, Any]:
+    """Resolve URL, headers and body for a POST; returns an error dict on misconfiguration."""
+    cfg = _config()
+
+    resolved_path = path or options.get("path") or cfg["responses_path"]
+    if not resolved_path:
+        return {
+            "success": False,
+            "error": "project_id_missing",
+            "message": "PROJECT_ID is not defined; cannot resolve AI proxy endpoint.",
+        }
+
+    project_uuid = cfg["project_uuid"]
+    if not project_uuid:
+        return {
+            "success": False,
+            "error": "project_uuid_missing",
+            "message": "PROJECT_UUID is not defined; aborting AI request.",
+        }
+
+    if "project_uuid" not in payload and project_uuid:
+        payload["project_uuid"] = project_uuid
+
+    headers: Dict[str, str] = {
+        "Content-Type": "application/json",
+        "Accept": "application/json",
+        cfg["project_header"]: project_uuid,
+    }
+    _merge_headers(headers, options.get("headers"))
+
+    return {
+        "url": _build_url(resolved_path, cfg["base_url"]),
+        "method": "POST",
+        "body": json.dumps(payload, ensure_ascii=False).encode("utf-8"),
+        "headers": headers,
+        "timeout": _call_timeout(options, cfg),
+        "verify_tls": _verify_tls(options, cfg),
+    }
+
+
+def _prepare_status_request(ai_request_id: Any, options: Dict[str, Any]) -> Dict[str, Any]:
+    """Resolve URL and headers for a status GET; returns an error dict on misconfiguration."""
+    cfg = _config()
+
+    project_uuid = cfg["project_uuid"]
+    if not project_uuid:
+        return {
+            "success": False,
+            "error": "project_uuid_missing",
+            "message": "PROJECT_UUID is not defined; aborting status check.",
+        }
+
+    headers: Dict[str, str] = {
+        "Accept": "application/json",
+        cfg["project_header"]: project_uuid,
+    }
+    _merge_headers(headers, options.get("headers"))
+
+    return {
+        "url": _build_url(_resolve_status_path(ai_request_id, cfg), cfg["base_url"]),
+        "method": "GET",
+        "body": None,
+        "headers": headers,
+        "timeout": _call_timeout(options, cfg),
+        "verify_tls": _verify_tls(options, cfg),
+        "hedge": True,
+    }
+
+
+def _fetch_status_batch(ai_request_ids: List[Any], options: Dict[str, Any]) -> Optional[Dict[str, Dict[str, Any]]]:
+    """Poll several requests in one POST to AI_STATUS_BATCH_PATH; None when the proxy lacks it."""
+    cfg = _config()
+    if not cfg["status_batch_path"]:
+        return None
+    prepared = _prepare_request(cfg["status_batch_path"], {"ids": list(ai_request_ids)}, options)
+    if prepared.get("success") is False:
+        return None
+    resp = _http_request(**prepared)
+    if resp.get("status") in (404, 405, 501):
+        return None
+    if not resp.get("success"):
+        return {}
+
+    # Accept {"statuses": {id: {...}}}, {"results": [{"ai_request_id": id, ...}]} or a bare map/list.
+    data = resp.get("data")
+    if isinstance(data, dict):
+        data = data.get("statuses", data.get("results", data))
+    if isinstance(data, list):
+        data = {item.get("ai_request_id"): item for item in data if isinstance(item, dict)}
+    if not isinstance(data, dict):
+        return {}
+    return {
+        str(key): {"success": True, "status": 200, "data": value}
+        for key, value in data.items()
+        if key is not None and isinstance(value, dict)
+    }
+
+
+def _merge_headers(headers: Dict[str, str], extra_headers: Any) -> None:
+    if isinstance(extra_headers, Iterable):
+        for header in extra_headers:
+            if isinstance(header, str) and ":" in header:
+                name, value = header.split(":", 1)
+                headers[name.strip()] = value.strip()
+
+
+def _verify_tls(options: Dict[str, Any], cfg: Dict[str, Any]) -> bool:
+    verify_tls = options.get("verify_tls")
+    return cfg["verify_tls"] if verify_tls is None else bool(verify_tls)
+
+
+def _call_timeout(options: Dict[str, Any], cfg: Dict[str, Any]) -> int:
+    opt_timeout = options.get("timeout")
+    return int(cfg["timeout"] if opt_timeout is None else opt_timeout)
+
+
 def _config() -> Dict[str, Any]:
-    global _CONFIG_CACHE  # noqa: PLW0603
-    if _CONFIG_CACHE is not None:
+    """Client settings from the environment; rebuilt after ``config.env`` reloads (SIGHUP)."""
+    global _CONFIG_CACHE, _CONFIG_GENERATION  # noqa: PLW0603
+    generation = env.refresh()
+    if _CONFIG_CACHE is not None and _CONFIG_GENERATION == generation:
         return _CONFIG_CACHE
 
-    _ensure_env_loaded()
-
-    base_url = os.getenv("AI_PROXY_BASE_URL", "https://flatlogic.com")
-    project_id = os.getenv("PROJECT_ID") or None
-    responses_path = os.getenv("AI_RESPONSES_PATH")
+    base_url = env.get("AI_PROXY_BASE_URL", "https://flatlogic.com")
+    project_id = env.get("PROJECT_ID") or None
+    responses_path = env.get("AI_RESPONSES_PATH")
     if not responses_path and project_id:
         responses_path = f"/projects/{project_id}/ai-request"
+    embeddings_path = env.get("AI_EMBEDDINGS_PATH")
+    if not embeddings_path and project_id:
+        embeddings_path = f"/projects/{project_id}/ai-embeddings"
 
+    _CONFIG_GENERATION = generation
     _CONFIG_CACHE = {
         "base_url": base_url,
         "responses_path": responses_path,
+        "embeddings_path": embeddings_path,
+        "embedding_model": env.get("AI_EMBEDDING_MODEL", "text-embedding-3-small"),
         "project_id": project_id,
-        "project_uuid": os.getenv("PROJECT_UUID"),
-        "project_header": os.getenv("AI_PROJECT_HEADER", "project-uuid"),
-        "default_model": os.getenv("AI_DEFAULT_MODEL", "gpt-5-mini"),
-        "timeout": int(os.getenv("AI_TIMEOUT", "30")),
-        "verify_tls": os.getenv("AI_VERIFY_TLS", "true").lower() not in {"0", "false", "no"},
+        "project_uuid": env.get("PROJECT_UUID"),
+        "project_header": env.get("AI_PROJECT_HEADER", "project-uuid"),
+        "default_model": env.get("AI_DEFAULT_MODEL", "gpt-5-mini"),
+        "timeout": env.int("AI_TIMEOUT", 30),
+        "verify_tls": env.bool("AI_VERIFY_TLS", True),
+        "pool_size": env.int("AI_POOL_SIZE", 4),
+        "pool_idle_timeout": env.float("AI_POOL_IDLE_TIMEOUT", 30),
+        "async_max_connections": env.int("AI_ASYNC_MAX_CONNECTIONS", 32),
+        "status_batch_path": env.get("AI_STATUS_BATCH_PATH") or None,
+        "poll_first_delay": env.float("AI_POLL_FIRST_DELAY", 0.5),
+        "poll_backoff": env.float("AI_POLL_BACKOFF", 2),
+        "poll_jitter": env.float("AI_POLL_JITTER", 0.2),
+        "poll_workers": env.int("AI_POLL_WORKERS", 4),
+        "response_cache": env.str("AI_RESPONSE_CACHE").strip().lower(),
+        "response_cache_ttl": env.float("AI_RESPONSE_CACHE_TTL", 3600),
+        "response_cache_max_bytes": env.int("AI_RESPONSE_CACHE_MAX_BYTES", 32 * 1024 * 1024),
+        "retry_attempts": env.int("AI_RETRY_ATTEMPTS", 3),
+        "retry_base_delay": env.float("AI_RETRY_BASE_DELAY", 0.5),
+        "retry_max_delay": env.float("AI_RETRY_MAX_DELAY", 8),
+        "breaker_threshold": env.int("AI_BREAKER_THRESHOLD", 5),
+        "breaker_reset": env.float("AI_BREAKER_RESET", 30),
+        "hedge_delay": env.float("AI_HEDGE_DELAY", 0),
+        "poll_max_errors": env.int("AI_POLL_MAX_ERRORS", 3),
     }
     return _CONFIG_CACHE
 
 
+def _pool():
+    cfg = _config()
+    return get_pool(cfg["pool_size"], cfg["pool_idle_timeout"])
+
+
+def _async_pool():
+    cfg = _config()
+    return get_async_pool(cfg["async_max_connections"], cfg["pool_idle_timeout"])
+
+
+def _scheduler() -> PollScheduler:
+    global _SCHEDULER  # noqa: PLW0603
+    if _SCHEDULER is not None:
+        return _SCHEDULER
+    with _SCHEDULER_LOCK:
+        if _SCHEDULER is None:
+            cfg = _config()
+            _SCHEDULER = PollScheduler(
+                fetch_status,
+                _final_status,
+                batch_fetch=_fetch_status_batch if cfg["status_batch_path"] else None,
+                first_delay=cfg["poll_first_delay"],
+                factor=cfg["poll_backoff"],
+                jitter=cfg["poll_jitter"],
+                workers=cfg["poll_workers"],
+                timeout_result=_timeout_error,
+                transient=_is_transient,
+                max_errors=cfg["poll_max_errors"],
+            )
+    return _SCHEDULER
+
+
+def _response_cache(options: Dict[str, Any]) -> Optional[ResponseCache]:
+    """The shared cache if this call opted in (``options["cache"]`` or AI_RESPONSE_CACHE)."""
+    enabled = options.get("cache")
+    if enabled is None:
+        enabled = _config()["response_cache"] not in {"", "0", "off", "false", "no"}
+    return _shared_response_cache() if enabled else None
+
+
+def _shared_response_cache() -> ResponseCache:
+    global _RESPONSE_CACHE  # noqa: PLW0603
+    if _RESPONSE_CACHE is not None:
+        return _RESPONSE_CACHE
+    with _SCHEDULER_LOCK:
+        if _RESPONSE_CACHE is None:
+            cfg = _config()
+            # AI_RESPONSE_CACHE=django[:alias] shares entries between workers; anything else is in-process.
+            backend_name, _, alias = cfg["response_cache"].partition(":")
+            if backend_name == "django":
+                backend: Any = DjangoCacheBackend(alias or "default", cfg["response_cache_max_bytes"])
+            else:
+                backend = LocMemLRUBackend(max_bytes=cfg["response_cache_max_bytes"])
+            _RESPONSE_CACHE = ResponseCache(backend, cfg["response_cache_ttl"], decode_json_from_response)
+    return _RESPONSE_CACHE
+
+
+def _retry_policy() -> RetryPolicy:
+    cfg = _config()
+    return RetryPolicy(cfg["retry_attempts"], cfg["retry_base_delay"], cfg["retry_max_delay"])
+
+
+def _breaker(url: str):
+    cfg = _config()
+    return breaker_for(urlsplit(url).netloc, cfg["breaker_threshold"], cfg["breaker_reset"])
+
+
 def _build_url(path: str, base_url: str) -> str:
     trimmed = path.strip()
     if trimmed.startswith("http://") or trimmed.startswith("https://"):
@@ -340,33 +972,111 @@ def _resolve_status_path(ai_request_id: Any, cfg: Dict[str, Any]) -> str:
 
 
 def _http_request(url: str, method: str, body: Optional[bytes], headers: Dict[str, str],
-                  timeout: int, verify_tls: bool) -> Dict[str, Any]:
+                  timeout: int, verify_tls: bool, hedge: bool = False) -> Dict[str, Any]:
     """
-    Shared HTTP helper for GET/POST requests.
+    Shared HTTP helper for GET/POST requests over the pooled keep-alive transport.
+
+    Transient failures are retried per the RetryPolicy, calls fail fast while
+    the host's circuit breaker is open, and ``hedge`` GETs are duplicated when
+    slower than AI_HEDGE_DELAY.
     """
-    req = urlrequest.Request(url, data=body, method=method.upper())
-    for name, value in headers.items():
-        req.add_header(name, value)
+    cfg = _config()
+    breaker = _breaker(url)
+    policy = _retry_policy()
 
-    context = None
-    if not verify_tls:
-        context = ssl.create_default_context()
-        context.check_hostname = False
-        context.verify_mode = ssl.CERT_NONE
+    def send():
+        return _pool().request(method, url, body, headers, timeout, verify_tls)
+
+    attempt = 0
+    while True:
+        if not breaker.allow():
+            return _circuit_open_error(breaker)
+        try:
+            if hedge and cfg["hedge_delay"] > 0:
+                status, resp_headers, raw_body = hedged_call(send, cfg["hedge_delay"])
+            else:
+                status, resp_headers, raw_body = send()
+        except Exception as exc:  # pylint: disable=broad-except
+            breaker.record_failure()
+            delay = policy.after_exception(method, exc, attempt)
+            if delay is None:
+                return {
+                    "success": False,
+                    "error": "request_failed",
+                    "message": str(exc),
+                }
+        else:
+            if status >= 500:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+            delay = policy.after_status(method, status, resp_headers, attempt)
+            if delay is None:
+                return _decode_http_response(status, raw_body)
+        attempt += 1
+        record("retries")
+        time.sleep(delay)
+
+
+async def _ahttp_request(url: str, method: str, body: Optional[bytes], headers: Dict[str, str],
+                         timeout: int, verify_tls: bool, hedge: bool = False) -> Dict[str, Any]:
+    """Async counterpart of :func:`_http_request` on the per-loop stream pool."""
+    cfg = _config()
+    breaker = _breaker(url)
+    policy = _retry_policy()
+
+    def send():
+        return _async_pool().request(method, url, body, headers, timeout, verify_tls)
+
+    attempt = 0
+    while True:
+        if not breaker.allow():
+            return _circuit_open_error(breaker)
+        try:
+            if hedge and cfg["hedge_delay"] > 0:
+                status, resp_headers, raw_body = await ahedged_call(send, cfg["hedge_delay"])
+            else:
+                status, resp_headers, raw_body = await send()
+        except Exception as exc:  # pylint: disable=broad-except
+            breaker.record_failure()
+            delay = policy.after_exception(method, exc, attempt)
+            if delay is None:
+                return {
+                    "success": False,
+                    "error": "request_failed",
+                    "message": str(exc) or exc.__class__.__name__,
+                }
+        else:
+            if status >= 500:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+            delay = policy.after_status(method, status, resp_headers, attempt)
+            if delay is None:
+                return _decode_http_response(status, raw_body)
+        attempt += 1
+        record("retries")
+        await asyncio.sleep(delay)
+
+
+def _circuit_open_error(breaker: Any) -> Dict[str, Any]:
+    return {
+        "success": False,
+        "error": "circuit_open",
+        "message": f"AI proxy marked unavailable; retrying in {breaker.retry_in():.0f}s.",
+    }
 
-    try:
-        with urlrequest.urlopen(req, timeout=timeout, context=context) as resp:
-            status = resp.getcode()
-            response_body = resp.read().decode("utf-8", errors="replace")
-    except urlerror.HTTPError as exc:
-        status = exc.getcode()
-        response_body = exc.read().decode("utf-8", errors="replace")
-    except Exception as exc:  # pylint: disable=broad-except
-        return {
-            "success": False,
-            "error": "request_failed",
-            "message": str(exc),
-        }
+
+def _is_transient(response: Dict[str, Any]) -> bool:
+    """Whether a failed status poll is worth polling again rather than giving up."""
+    if response.get("error") in ("request_failed", "circuit_open"):
+        return True
+    status = response.get("status")
+    return isinstance(status, int) and (status >= 500 or status == 429)
+
+
+def _decode_http_response(status: int, raw_body: bytes) -> Dict[str, Any]:
+    response_body = raw_body.decode("utf-8", errors="replace")
 
     decoded = None
     if response_body:
@@ -394,27 +1104,3 @@ def _http_request(url: str, method: str, body: Optional[bytes], headers: Dict[st
         "error": error_message,
         "response": decoded if decoded is not None else response_body,
     }
-
-
-def _ensure_env_loaded() -> None:
-    """Populate os.environ from executor/.env if variables are missing."""
-    if os.getenv("PROJECT_UUID") and os.getenv("PROJECT_ID"):
-        return
-
-    env_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".env"))
-    if not os.path.exists(env_path):
-        return
-
-    try:
-        with open(env_path, "r", encoding="utf-8") as handle:
-            for line in handle:
-                stripped = line.strip()
-                if not stripped or stripped.startswith("#") or "=" not in stripped:
-                    continue
-                key, value = stripped.split("=", 1)
-                key = key.strip()
-                value = value.strip().strip('\'"')
-                if key and not os.getenv(key):
-                    os.environ[key] = value
-    except OSError:
-        pass
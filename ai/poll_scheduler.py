@@ -0,0 +1,252 @@
+"""
+Process-wide scheduler for outstanding AI request status polls.
+
+Instead of every ``await_response`` caller running its own fixed-interval
+sleep loop, waiters register their ``ai_request_id`` here and get back a
+``concurrent.futures.Future``.  A single scheduler thread keeps the ids in a
+heap ordered by next-poll time and:
+
+* polls quickly at first, then backs off exponentially (with jitter, so a
+  burst of submissions does not stay in lock-step) up to the caller's
+  ``interval``;
+* folds every id that is due within a short coalescing window into one
+  batched status request when a batch endpoint is configured (AI_STATUS_BATCH_PATH), falling
+  back to individual GETs if the proxy rejects it;
+* resolves each future as soon as its status flips to ``success`` / ``failed``,
+  riding out up to ``max_errors`` consecutive transient poll failures.
+
+The scheduler knows nothing about HTTP; :mod:`ai.local_ai_api` injects the
+single and batched fetch callables.
+"""
+
+from __future__ import annotations
+
+import heapq
+import itertools
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+__all__ = [
+    "PollScheduler",
+    "backoff_delay",
+]
+
+FetchFn = Callable[[Any, Dict[str, Any]], Dict[str, Any]]
+# Returns {str(id): status response}; None means "batching unsupported", raising means "try later".
+BatchFetchFn = Callable[[List[Any], Dict[str, Any]], Optional[Dict[str, Dict[str, Any]]]]
+FinalizeFn = Callable[[Dict[str, Any]], Optional[Dict[str, Any]]]
+
+
+def backoff_delay(attempt: int, first: float, ceiling: float, factor: float = 2.0,
+                  jitter: float = 0.2, rng: Callable[[], float] = random.random) -> float:
+    """Delay before poll number ``attempt`` (0-based): first * factor**attempt, capped, ± jitter."""
+    base = min(ceiling, first * (factor ** attempt))
+    if jitter <= 0:
+        return base
+    return max(0.0, base * (1 + jitter * (2 * rng() - 1)))
+
+
+class _Waiter:
+    __slots__ = ("ai_request_id", "options", "future", "deadline", "ceiling", "attempt", "errors", "trace")
+
+    def __init__(self, ai_request_id: Any, options: Dict[str, Any], future: Future,
+                 deadline: float, ceiling: float, trace: Any = None) -> None:
+        self.ai_request_id = ai_request_id
+        self.options = options
+        self.future = future
+        self.deadline = deadline
+        self.ceiling = ceiling
+        self.attempt = 0
+        self.errors = 0
+        self.trace = trace
+
+    def group_key(self) -> Tuple[Any, ...]:
+        headers = self.options.get("headers")
+        return (
+            tuple(headers) if isinstance(headers, (list, tuple)) else headers,
+            self.options.get("timeout"),
+            self.options.get("verify_tls"),
+        )
+
+
+class PollScheduler:
+    """Shared poller; ``submit()`` returns a future resolved with the final response."""
+
+    def __init__(self, fetch: FetchFn, finalize: FinalizeFn, batch_fetch: Optional[BatchFetchFn] = None,
+                 first_delay: float = 0.5, factor: float = 2.0, jitter: float = 0.2,
+                 workers: int = 4, max_batch: int = 100, coalesce: float = 0.25,
+                 timeout_result: Optional[Callable[[], Dict[str, Any]]] = None,
+                 transient: Optional[Callable[[Dict[str, Any]], bool]] = None, max_errors: int = 0) -> None:
+        self._fetch = fetch
+        self._finalize = finalize
+        self._batch_fetch = batch_fetch
+        self._timeout_result = timeout_result or (lambda: {"success": False, "error": "timeout"})
+        self._transient = transient
+        self.max_errors = max(0, int(max_errors))
+        self.first_delay = max(0.0, float(first_delay))
+        self.factor = max(1.0, float(factor))
+        self.jitter = max(0.0, float(jitter))
+        self.max_batch = max(1, int(max_batch))
+        self.coalesce = max(0.0, float(coalesce))
+        self._workers = max(1, int(workers))
+        self._heap: List[Tuple[float, int, _Waiter]] = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._in_flight = 0
+        self._stats = {
+            "submitted": 0,
+            "polls": 0,
+            "batches": 0,
+            "batched_ids": 0,
+            "resolved": 0,
+            "timeouts": 0,
+            "poll_errors": 0,
+        }
+
+    def submit(self, ai_request_id: Any, options: Optional[Dict[str, Any]] = None,
+               timeout: float = 300, interval: float = 5, trace: Any = None) -> Future:
+        """
+        Track ``ai_request_id`` until it finishes or ``timeout`` seconds pass.
+
+        ``trace`` (an :class:`ai.instrumentation.Trace`) gets the poll count
+        before the future resolves.
+        """
+        options = dict(options or {})
+        future: Future = Future()
+        now = time.monotonic()
+        ceiling = max(float(interval), self.first_delay, 0.01)
+        waiter = _Waiter(ai_request_id, options, future, now + max(float(timeout), ceiling), ceiling, trace)
+        with self._cond:
+            self._stats["submitted"] += 1
+            self._ensure_running()
+            self._push(waiter, now + self._next_delay(waiter))
+        return future
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            snapshot: Dict[str, Any] = dict(self._stats)
+            snapshot["outstanding"] = len(self._heap) + self._in_flight
+            snapshot["batching"] = self._batch_fetch is not None
+        return snapshot
+
+    def _ensure_running(self) -> None:
+        # Threads do not survive fork(); restart lazily in worker processes.
+        if self._thread is None or not self._thread.is_alive():
+            self._executor = ThreadPoolExecutor(self._workers, thread_name_prefix="ai-poll")
+            self._thread = threading.Thread(target=self._run, name="ai-poll-scheduler", daemon=True)
+            self._thread.start()
+
+    def _next_delay(self, waiter: _Waiter) -> float:
+        return backoff_delay(waiter.attempt, self.first_delay, waiter.ceiling, self.factor, self.jitter)
+
+    def _push(self, waiter: _Waiter, due: float) -> None:
+        heapq.heappush(self._heap, (due, next(self._seq), waiter))
+        self._cond.notify()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while True:
+                    now = time.monotonic()
+                    if self._heap and self._heap[0][0] <= now:
+                        break
+                    self._cond.wait(self._heap[0][0] - now if self._heap else None)
+                # Pull slightly-later polls forward so they can share a batch.
+                horizon = now + (self.coalesce if self._batch_fetch is not None else 0.0)
+                due: List[_Waiter] = []
+                while self._heap and self._heap[0][0] <= horizon:
+                    waiter = heapq.heappop(self._heap)[2]
+                    if not waiter.future.cancelled():
+                        due.append(waiter)
+                self._in_flight += len(due)
+            self._dispatch(due)
+
+    def _dispatch(self, due: List[_Waiter]) -> None:
+        assert self._executor is not None
+        if self._batch_fetch is None:
+            for waiter in due:
+                self._executor.submit(self._poll_one, waiter)
+            return
+        groups: Dict[Tuple[Any, ...], List[_Waiter]] = {}
+        for waiter in due:
+            groups.setdefault(waiter.group_key(), []).append(waiter)
+        for group in groups.values():
+            for start in range(0, len(group), self.max_batch):
+                chunk = group[start:start + self.max_batch]
+                if len(chunk) == 1:
+                    self._executor.submit(self._poll_one, chunk[0])
+                else:
+                    self._executor.submit(self._poll_batch, chunk)
+
+    def _poll_one(self, waiter: _Waiter) -> None:
+        try:
+            response = self._fetch(waiter.ai_request_id, waiter.options)
+        except Exception as exc:  # pylint: disable=broad-except
+            response = {"success": False, "error": "request_failed", "message": str(exc)}
+        with self._cond:
+            self._stats["polls"] += 1
+        self._settle(waiter, response)
+
+    def _poll_batch(self, waiters: List[_Waiter]) -> None:
+        batch_fetch = self._batch_fetch
+        try:
+            results = batch_fetch([w.ai_request_id for w in waiters], waiters[0].options) if batch_fetch else None
+        except Exception:  # pylint: disable=broad-except
+            # Transient failure: fall back for this round only.
+            results = {}
+        else:
+            if results is None:
+                # The proxy has no batch endpoint; stop trying.
+                self._batch_fetch = None
+        if not results:
+            for waiter in waiters:
+                self._poll_one(waiter)
+            return
+        with self._cond:
+            self._stats["polls"] += 1
+            self._stats["batches"] += 1
+            self._stats["batched_ids"] += len(waiters)
+        for waiter in waiters:
+            response = results.get(str(waiter.ai_request_id))
+            if response is None:
+                response = {"success": True, "data": {"status": "pending"}}
+            self._settle(waiter, response)
+
+    def _settle(self, waiter: _Waiter, response: Dict[str, Any]) -> None:
+        final = self._finalize(response)
+        if final is not None and self._is_retryable_error(waiter, response):
+            final = None
+        elif response.get("success"):
+            waiter.errors = 0
+        now = time.monotonic()
+        with self._cond:
+            self._in_flight -= 1
+            if final is None and now >= waiter.deadline:
+                final = self._timeout_result()
+                self._stats["timeouts"] += 1
+            if final is None:
+                waiter.attempt += 1
+                due = min(now + self._next_delay(waiter), waiter.deadline)
+                self._push(waiter, due)
+                return
+            self._stats["resolved"] += 1
+        if waiter.trace is not None:
+            waiter.trace.polls = waiter.attempt + 1
+        if not waiter.future.done():
+            waiter.future.set_result(final)
+
+    def _is_retryable_error(self, waiter: _Waiter, response: Dict[str, Any]) -> bool:
+        """A failed poll is ridden out (up to ``max_errors`` in a row) if it looks transient."""
+        if response.get("success") or self._transient is None or waiter.errors >= self.max_errors:
+            return False
+        if not self._transient(response):
+            return False
+        waiter.errors += 1
+        with self._cond:
+            self._stats["poll_errors"] += 1
+        return True
@@ -0,0 +1,248 @@
+"""
+Retry, circuit-breaker and hedging primitives for the AI proxy client.
+
+* :class:`RetryPolicy` decides whether a failed call is retried and how long
+  to wait: exponential backoff with jitter, ``Retry-After`` honoured on
+  429/503.  Only calls that are safe to repeat are retried — status GETs on
+  any transient failure, POSTs only when the proxy explicitly refused them
+  (429/503) or the connection was never established.
+* :class:`CircuitBreaker` (one per proxy host) opens after consecutive
+  failures so workers fail fast instead of each waiting out a 30 s timeout,
+  lets a single probe through after ``reset_timeout`` and closes again once
+  it succeeds.
+* :func:`hedged_call` / :func:`ahedged_call` start a second copy of an
+  idempotent call if the first has not answered within ``delay`` seconds and
+  return whichever finishes first.
+
+Counters for retries, hedges and every breaker state transition are kept in
+this module; :func:`resilience_stats` returns a snapshot.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import email.utils
+import random
+import socket
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Awaitable, Callable, Dict, Mapping, Optional, TypeVar
+
+__all__ = [
+    "CircuitBreaker",
+    "RetryPolicy",
+    "ahedged_call",
+    "breaker_for",
+    "hedged_call",
+    "parse_retry_after",
+    "record",
+    "resilience_stats",
+]
+
+T = TypeVar("T")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+_COUNTERS: Dict[str, int] = {"retries": 0, "hedges": 0, "hedge_wins": 0, "rejected": 0}
+_BREAKERS: Dict[str, "CircuitBreaker"] = {}
+_LOCK = threading.Lock()
+_HEDGE_EXECUTOR: Optional[ThreadPoolExecutor] = None
+
+# Raised before any byte of the request reached the server.
+_CONNECT_ERRORS = (ConnectionRefusedError, socket.gaierror)
+
+
+def record(counter: str, amount: int = 1) -> None:
+    with _LOCK:
+        _COUNTERS[counter] = _COUNTERS.get(counter, 0) + amount
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a ``Retry-After`` header (delta-seconds or HTTP date)."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        moment = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if moment is None:
+        return None
+    return max(0.0, moment.timestamp() - time.time())
+
+
+class RetryPolicy:
+    """Backoff schedule plus the rules for which failures are worth another attempt."""
+
+    RETRY_STATUSES = frozenset({429, 502, 503, 504})
+    REFUSED_STATUSES = frozenset({429, 503})
+
+    def __init__(self, max_attempts: int = 3, base_delay: float = 0.5, max_delay: float = 8.0,
+                 jitter: float = 0.5, max_retry_after: float = 30.0) -> None:
+        self.max_attempts = max(1, int(max_attempts))
+        self.base_delay = max(0.0, float(base_delay))
+        self.max_delay = max(self.base_delay, float(max_delay))
+        self.jitter = max(0.0, float(jitter))
+        self.max_retry_after = float(max_retry_after)
+
+    def backoff(self, attempt: int) -> float:
+        delay = min(self.max_delay, self.base_delay * (2 ** attempt))
+        return delay * (1 - self.jitter * random.random())
+
+    def after_status(self, method: str, status: int, headers: Mapping[str, str], attempt: int) -> Optional[float]:
+        """Delay before retrying a response with ``status``, or None to give up."""
+        if attempt + 1 >= self.max_attempts:
+            return None
+        idempotent = method.upper() in ("GET", "HEAD")
+        if status not in (self.RETRY_STATUSES if idempotent else self.REFUSED_STATUSES):
+            return None
+        hinted = parse_retry_after(headers.get("retry-after")) if status in self.REFUSED_STATUSES else None
+        if hinted is not None:
+            if hinted > self.max_retry_after:
+                return None
+            return hinted
+        return self.backoff(attempt)
+
+    def after_exception(self, method: str, exc: BaseException, attempt: int) -> Optional[float]:
+        """Delay before retrying a call that raised ``exc``, or None to give up."""
+        if attempt + 1 >= self.max_attempts:
+            return None
+        idempotent = method.upper() in ("GET", "HEAD")
+        if idempotent or isinstance(exc, _CONNECT_ERRORS):
+            return self.backoff(attempt)
+        return None
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker: closed -> open -> half-open -> closed."""
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0) -> None:
+        self.name = name
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.reset_timeout = float(reset_timeout)
+        self.state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+        self.transitions: Dict[str, int] = {OPEN: 0, HALF_OPEN: 0, CLOSED: 0}
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self._transition(HALF_OPEN)
+            if self.state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+        record("rejected")
+        return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._probing = False
+            if self.state != CLOSED:
+                self._transition(CLOSED)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self.state == HALF_OPEN or (self.state == CLOSED and self._failures >= self.failure_threshold):
+                self._opened_at = time.monotonic()
+                self._transition(OPEN)
+
+    def retry_in(self) -> float:
+        with self._lock:
+            if self.state != OPEN:
+                return 0.0
+            return max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self._failures,
+                "transitions": dict(self.transitions),
+            }
+
+    def _transition(self, state: str) -> None:
+        self.state = state
+        self.transitions[state] += 1
+
+
+def breaker_for(name: str, failure_threshold: int = 5, reset_timeout: float = 30.0) -> CircuitBreaker:
+    """Return the shared breaker for ``name`` (typically the proxy host)."""
+    breaker = _BREAKERS.get(name)
+    if breaker is None:
+        with _LOCK:
+            breaker = _BREAKERS.get(name)
+            if breaker is None:
+                breaker = _BREAKERS[name] = CircuitBreaker(name, failure_threshold, reset_timeout)
+    return breaker
+
+
+def hedged_call(call: Callable[[], T], delay: float) -> T:
+    """
+    Run ``call``; if it has not finished after ``delay`` seconds, start a second
+    copy and return whichever completes first.  Only use for idempotent calls.
+    """
+    global _HEDGE_EXECUTOR  # noqa: PLW0603
+    if _HEDGE_EXECUTOR is None:
+        with _LOCK:
+            if _HEDGE_EXECUTOR is None:
+                _HEDGE_EXECUTOR = ThreadPoolExecutor(8, thread_name_prefix="ai-hedge")
+    primary = _HEDGE_EXECUTOR.submit(call)
+    done, _ = wait([primary], timeout=delay)
+    if done:
+        return primary.result()
+    record("hedges")
+    hedge = _HEDGE_EXECUTOR.submit(call)
+    done, _ = wait([primary, hedge], return_when=FIRST_COMPLETED)
+    winner = hedge if hedge in done and primary not in done else primary
+    if winner is hedge:
+        record("hedge_wins")
+    if winner.exception() is not None:
+        # The other copy may still succeed; prefer it over an early failure.
+        other = primary if winner is hedge else hedge
+        return other.result()
+    return winner.result()
+
+
+async def ahedged_call(factory: Callable[[], Awaitable[T]], delay: float) -> T:
+    """Async variant of :func:`hedged_call`; the losing copy is cancelled."""
+    primary = asyncio.ensure_future(factory())
+    done, _ = await asyncio.wait({primary}, timeout=delay)
+    if done:
+        return primary.result()
+    record("hedges")
+    hedge = asyncio.ensure_future(factory())
+    try:
+        done, pending = await asyncio.wait({primary, hedge}, return_when=asyncio.FIRST_COMPLETED)
+        winner = next(iter(done))
+        if winner.exception() is not None and pending:
+            # The other copy may still succeed; prefer it over an early failure.
+            done, _ = await asyncio.wait(pending)
+            winner = next(iter(done))
+        if winner is hedge:
+            record("hedge_wins")
+        return winner.result()
+    finally:
+        for task in (primary, hedge):
+            if not task.done():
+                task.cancel()
+
+
+def resilience_stats() -> Dict[str, Any]:
+    with _LOCK:
+        snapshot: Dict[str, Any] = dict(_COUNTERS)
+        breakers = list(_BREAKERS.values())
+    snapshot["breakers"] = {breaker.name: breaker.stats() for breaker in breakers}
+    return snapshot
@@ -0,0 +1,239 @@
+"""
+Content-addressed cache for ``create_response`` results.
+
+Identical prompts (same model, input, text format and other generation
+parameters) hash to the same key; ``project_uuid`` is left out so keys are
+stable across environments.  Only successful responses are stored, together
+with the JSON decoded from the model output, so repeat callers skip both the
+proxy round trip and ``decode_json_from_response``.
+
+Concurrent callers asking for the same key while the first request is still
+running wait for it instead of sending their own ("in-flight dedup").
+
+Two backends are provided: an in-process LRU bounded by entry count and total
+bytes, and a thin adapter over a Django cache alias for sharing between
+worker processes.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import copy
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+__all__ = [
+    "ResponseCache",
+    "LocMemLRUBackend",
+    "DjangoCacheBackend",
+    "cache_key",
+]
+
+_EXCLUDED_KEYS = {"project_uuid"}
+
+
+def cache_key(payload: Dict[str, Any]) -> str:
+    """Canonical SHA-256 of the payload, ignoring ``project_uuid``."""
+    canonical = {k: v for k, v in payload.items() if k not in _EXCLUDED_KEYS}
+    blob = json.dumps(canonical, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return "ai-resp:" + hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class LocMemLRUBackend:
+    """In-process LRU of serialized entries with per-entry TTL and a total byte bound."""
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 32 * 1024 * 1024) -> None:
+        self.max_entries = max(1, int(max_entries))
+        self.max_bytes = max(1, int(max_bytes))
+        self._data: "OrderedDict[str, Tuple[bytes, float]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            blob, expires = item
+            if expires and expires < time.monotonic():
+                self._drop(key)
+                return None
+            self._data.move_to_end(key)
+            return blob
+
+    def set(self, key: str, blob: bytes, ttl: float) -> bool:
+        if len(blob) > self.max_bytes:
+            return False
+        expires = time.monotonic() + ttl if ttl > 0 else 0.0
+        with self._lock:
+            if key in self._data:
+                self._drop(key)
+            self._data[key] = (blob, expires)
+            self._bytes += len(blob)
+            while len(self._data) > self.max_entries or self._bytes > self.max_bytes:
+                self._drop(next(iter(self._data)))
+                self.evictions += 1
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"entries": len(self._data), "bytes": self._bytes, "evictions": self.evictions}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def _drop(self, key: str) -> None:
+        blob, _ = self._data.pop(key)
+        self._bytes -= len(blob)
+
+
+class DjangoCacheBackend:
+    """Stores entries in a Django cache alias (shared across processes)."""
+
+    def __init__(self, alias: str = "default", max_entry_bytes: int = 1024 * 1024) -> None:
+        self.alias = alias
+        self.max_entry_bytes = max(1, int(max_entry_bytes))
+
+    @property
+    def _cache(self):
+        from django.core.cache import caches  # pylint: disable=import-outside-toplevel
+        return caches[self.alias]
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._cache.get(key)
+
+    def set(self, key: str, blob: bytes, ttl: float) -> bool:
+        if len(blob) > self.max_entry_bytes:
+            return False
+        self._cache.set(key, blob, timeout=ttl if ttl > 0 else None)
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        return {"alias": self.alias}
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+
+class ResponseCache:
+    """Cache front-end: lookup, store, in-flight dedup and hit/miss counters."""
+
+    def __init__(self, backend: Any, default_ttl: float = 3600,
+                 decode: Optional[Callable[[Dict[str, Any]], Any]] = None) -> None:
+        self.backend = backend
+        self.default_ttl = float(default_ttl)
+        self._decode = decode
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, Future] = {}
+        self._ainflight: Dict[Tuple[int, str], "asyncio.Task[Dict[str, Any]]"] = {}
+        self._stats = {"hits": 0, "misses": 0, "stores": 0, "shared": 0, "rejected": 0}
+
+    def get_or_create(self, key: str, produce: Callable[[], Dict[str, Any]],
+                      ttl: Optional[float] = None) -> Dict[str, Any]:
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached
+
+        with self._lock:
+            pending = self._inflight.get(key)
+            owner = pending is None
+            if owner:
+                pending = self._inflight[key] = Future()
+            else:
+                self._stats["shared"] += 1
+        assert pending is not None
+        if not owner:
+            return _copy(pending.result())
+
+        try:
+            response = self._store(key, produce(), ttl)
+            pending.set_result(response)
+            return _copy(response, hit=False)
+        except BaseException as exc:
+            pending.set_exception(exc)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    async def aget_or_create(self, key: str, produce: Callable[[], Awaitable[Dict[str, Any]]],
+                             ttl: Optional[float] = None) -> Dict[str, Any]:
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached
+
+        # The request runs as its own task that every caller shields, so a
+        # cancelled caller (a client that hung up) never cancels the others.
+        slot = (id(asyncio.get_running_loop()), key)
+        task = self._ainflight.get(slot)
+        owner = task is None
+        if owner:
+            task = self._ainflight[slot] = asyncio.ensure_future(self._aproduce(slot, produce, ttl))
+            # Nobody may be left waiting; mark a failure as retrieved.
+            task.add_done_callback(lambda done: done.cancelled() or done.exception())
+        else:
+            with self._lock:
+                self._stats["shared"] += 1
+        return _copy(await asyncio.shield(task), hit=not owner)
+
+    async def _aproduce(self, slot: Tuple[int, str], produce: Callable[[], Awaitable[Dict[str, Any]]],
+                        ttl: Optional[float]) -> Dict[str, Any]:
+        try:
+            return self._store(slot[1], await produce(), ttl)
+        finally:
+            self._ainflight.pop(slot, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            snapshot: Dict[str, Any] = dict(self._stats)
+            snapshot["in_flight"] = len(self._inflight) + len(self._ainflight)
+        lookups = snapshot["hits"] + snapshot["misses"]
+        snapshot["hit_ratio"] = round(snapshot["hits"] / lookups, 4) if lookups else 0.0
+        snapshot["backend"] = self.backend.stats()
+        return snapshot
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+    def _lookup(self, key: str) -> Optional[Dict[str, Any]]:
+        blob = self.backend.get(key)
+        entry = None
+        if blob is not None:
+            try:
+                entry = json.loads(blob)
+            except (TypeError, ValueError):
+                entry = None
+        with self._lock:
+            self._stats["hits" if entry is not None else "misses"] += 1
+        if entry is None:
+            return None
+        response = entry["response"]
+        response["cache"] = {"key": key, "hit": True, "json": entry.get("json")}
+        return response
+
+    def _store(self, key: str, response: Dict[str, Any], ttl: Optional[float]) -> Dict[str, Any]:
+        if not response.get("success"):
+            return response
+        decoded = self._decode(response) if self._decode else None
+        blob = json.dumps({"response": response, "json": decoded}, ensure_ascii=False).encode("utf-8")
+        stored = self.backend.set(key, blob, self.default_ttl if ttl is None else float(ttl))
+        with self._lock:
+            self._stats["stores" if stored else "rejected"] += 1
+        response["cache"] = {"key": key, "hit": False, "json": decoded}
+        return response
+
+
+def _copy(response: Dict[str, Any], hit: bool = True) -> Dict[str, Any]:
+    """Give each caller of a deduplicated request its own deep copy to mutate."""
+    copied = copy.deepcopy(response)
+    if isinstance(copied.get("cache"), dict):
+        copied["cache"]["hit"] = hit
+    return copied
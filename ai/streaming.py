@@ -0,0 +1,248 @@
+"""
+Helpers for streamed AI responses.
+
+``LocalAIApi.stream_response`` / ``astream_response`` yield text deltas as the
+proxy emits them.  This module holds the pieces they are built from:
+
+* :func:`iter_sse_events` / :func:`aiter_sse_events` — Server-Sent Events
+  framing over raw body lines;
+* :func:`event_text` — pulls the text delta out of a Responses API
+  (``response.output_text.delta``) or chat-completions style event;
+* :class:`IncrementalJSONDecoder` — yields top-level fields of a JSON object
+  as soon as each one is complete, for prompts that ask for JSON output;
+* :func:`streaming_http_response` — wraps a stream in Django's
+  ``StreamingHttpResponse`` so the first token reaches the browser right away.
+
+    from ai.streaming import streaming_http_response
+
+    def describe_listing(request):
+        return streaming_http_response({"input": [...]})
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any, AsyncIterable, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Tuple
+
+__all__ = [
+    "AIStreamError",
+    "IncrementalJSONDecoder",
+    "aiter_json_fields",
+    "aiter_sse_events",
+    "event_text",
+    "iter_json_fields",
+    "iter_sse_events",
+    "streaming_http_response",
+]
+
+DONE = "[DONE]"
+
+
+class AIStreamError(RuntimeError):
+    """Raised from a stream when the proxy reports an error; ``response`` holds the usual error dict."""
+
+    def __init__(self, response: Dict[str, Any]) -> None:
+        super().__init__(str(response.get("message") or response.get("error") or "AI stream failed"))
+        self.response = response
+
+
+class _SSEParser:
+    def __init__(self) -> None:
+        self.event: Optional[str] = None
+        self.data: List[str] = []
+
+    def feed(self, raw_line: bytes) -> Optional[Tuple[Optional[str], str]]:
+        line = raw_line.decode("utf-8", errors="replace").rstrip("\r\n")
+        if not line:
+            return self.flush()
+        if line.startswith(":"):
+            return None
+        field, _, value = line.partition(":")
+        if value.startswith(" "):
+            value = value[1:]
+        if field == "data":
+            self.data.append(value)
+        elif field == "event":
+            self.event = value
+        return None
+
+    def flush(self) -> Optional[Tuple[Optional[str], str]]:
+        if not self.data:
+            self.event = None
+            return None
+        event, data = self.event, "\n".join(self.data)
+        self.event, self.data = None, []
+        return event, data
+
+
+def iter_sse_events(lines: Iterable[bytes]) -> Iterator[Tuple[Optional[str], str]]:
+    """Yield ``(event, data)`` pairs from SSE-framed body lines."""
+    parser = _SSEParser()
+    for raw_line in lines:
+        event = parser.feed(raw_line)
+        if event is not None:
+            yield event
+    event = parser.flush()
+    if event is not None:
+        yield event
+
+
+async def aiter_sse_events(lines: AsyncIterable[bytes]) -> AsyncIterator[Tuple[Optional[str], str]]:
+    """Async variant of :func:`iter_sse_events`."""
+    parser = _SSEParser()
+    async for raw_line in lines:
+        event = parser.feed(raw_line)
+        if event is not None:
+            yield event
+    event = parser.flush()
+    if event is not None:
+        yield event
+
+
+def event_text(event: Optional[str], data: str) -> Optional[str]:
+    """
+    Text delta carried by one SSE event, "" for events without text, or None at end of stream.
+
+    Raises :class:`AIStreamError` for error / failed events.
+    """
+    if data.strip() == DONE:
+        return None
+    try:
+        payload = json.loads(data)
+    except json.JSONDecodeError:
+        # Plain-text SSE: the data line is the delta itself.
+        return data
+    if not isinstance(payload, dict):
+        return ""
+
+    kind = payload.get("type") or event or ""
+    if kind == "response.output_text.delta":
+        return str(payload.get("delta") or "")
+    if kind in ("response.completed", "response.done"):
+        return None
+    if kind in ("error", "response.failed", "response.error"):
+        error = payload.get("error") if isinstance(payload.get("error"), dict) else payload
+        raise AIStreamError({
+            "success": False,
+            "error": str(error.get("code") or error.get("type") or "stream_failed"),
+            "message": str(error.get("message") or "AI stream failed"),
+            "response": payload,
+        })
+
+    choices = payload.get("choices")
+    if isinstance(choices, list) and choices and isinstance(choices[0], dict):
+        delta = choices[0].get("delta")
+        if isinstance(delta, dict) and delta.get("content"):
+            return str(delta["content"])
+    return ""
+
+
+class IncrementalJSONDecoder:
+    """
+    Feed text fragments of a JSON object; get back ``(key, value)`` for each
+    top-level member once it is complete.
+
+    Anything before the opening ``{`` (e.g. a markdown fence) is skipped and
+    anything after the closing ``}`` is ignored.
+    """
+
+    def __init__(self) -> None:
+        self._buffer = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._member_start = -1
+        self.done = False
+
+    def feed(self, text: str) -> List[Tuple[str, Any]]:
+        if self.done or not text:
+            return []
+        self._buffer += text
+        fields: List[Tuple[str, Any]] = []
+        buffer = self._buffer
+        i = self._pos
+        while i < len(buffer):
+            char = buffer[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                if self._depth > 0:
+                    self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+                if self._depth == 1:
+                    self._member_start = i + 1
+            elif char in "}]":
+                if self._depth == 1:
+                    fields.extend(self._member(buffer[self._member_start:i]))
+                    self.done = True
+                    i += 1
+                    break
+                self._depth -= 1
+            elif char == "," and self._depth == 1:
+                fields.extend(self._member(buffer[self._member_start:i]))
+                self._member_start = i + 1
+            i += 1
+
+        # Drop what has been consumed so the buffer stays small on long outputs.
+        if self._member_start > 0:
+            self._buffer = buffer[self._member_start:]
+            i -= self._member_start
+            self._member_start = 0
+        self._pos = i
+        return fields
+
+    @staticmethod
+    def _member(text: str) -> List[Tuple[str, Any]]:
+        if not text.strip():
+            return []
+        try:
+            return list(json.loads("{" + text + "}").items())
+        except json.JSONDecodeError:
+            return []
+
+
+def iter_json_fields(deltas: Iterable[str]) -> Iterator[Tuple[str, Any]]:
+    """Yield top-level JSON fields from a stream of text deltas."""
+    decoder = IncrementalJSONDecoder()
+    for delta in deltas:
+        yield from decoder.feed(delta)
+        if decoder.done:
+            return
+
+
+async def aiter_json_fields(deltas: AsyncIterable[str]) -> AsyncIterator[Tuple[str, Any]]:
+    """Async variant of :func:`iter_json_fields`."""
+    decoder = IncrementalJSONDecoder()
+    async for delta in deltas:
+        for field in decoder.feed(delta):
+            yield field
+        if decoder.done:
+            return
+
+
+def streaming_http_response(params: Dict[str, Any], options: Optional[Dict[str, Any]] = None,
+                            asynchronous: bool = False, content_type: str = "text/plain; charset=utf-8"):
+    """
+    ``StreamingHttpResponse`` fed by the model's text deltas.
+
+    Pass ``asynchronous=True`` from async views / ASGI so the body is an async
+    iterator and Django does not fall back to a thread per chunk.
+    """
+    # pylint: disable=import-outside-toplevel
+    from django.http import StreamingHttpResponse
+
+    from .local_ai_api import astream_response, stream_response
+
+    source = astream_response(params, options) if asynchronous else stream_response(params, options)
+    response = StreamingHttpResponse(source, content_type=content_type)
+    # Ask reverse proxies (nginx, Apache mod_proxy) not to buffer the stream.
+    response["X-Accel-Buffering"] = "no"
+    response["Cache-Control"] = "no-cache"
+    return response
@@ -0,0 +1,282 @@
+"""
+Pooled keep-alive HTTP transport for the AI proxy client.
+
+``urllib.request.urlopen`` opens (and TLS-handshakes) a brand new socket for
+every call.  The pool below keeps a small number of idle ``http.client``
+connections per ``(scheme, host, port, verify_tls)`` and hands them back out,
+so repeated ``request()`` / ``fetch_status()`` calls ride on the same socket.
+
+    from ai.transport import get_pool
+
+    status, headers, body = get_pool().request("GET", url, None, {}, 30, True)
+    get_pool().stats()  # {"handshakes": 1, "reused": 41, ...}
+"""
+
+from __future__ import annotations
+
+import http.client
+import ssl
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Iterator, Optional, Tuple
+from urllib.parse import urlsplit
+
+from . import instrumentation
+
+__all__ = [
+    "ConnectionPool",
+    "PooledResponse",
+    "get_pool",
+    "reset_pool",
+    "ssl_context",
+]
+
+# Errors raised when the server silently closed an idle keep-alive socket.
+_STALE_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.BadStatusLine,
+    BrokenPipeError,
+    ConnectionResetError,
+    ConnectionAbortedError,
+)
+# A reused socket that fails after the request was written is only retried for
+# these; a POST may already have been queued (and billed) by the proxy.
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+_SSL_CONTEXTS: Dict[bool, ssl.SSLContext] = {}
+_SSL_LOCK = threading.Lock()
+
+_POOL: Optional["ConnectionPool"] = None
+_POOL_LOCK = threading.Lock()
+
+PoolKey = Tuple[str, str, int, bool]
+
+
+def ssl_context(verify_tls: bool) -> ssl.SSLContext:
+    """Return a process-wide SSL context (building one is surprisingly costly)."""
+    context = _SSL_CONTEXTS.get(verify_tls)
+    if context is not None:
+        return context
+    with _SSL_LOCK:
+        context = _SSL_CONTEXTS.get(verify_tls)
+        if context is None:
+            context = ssl.create_default_context()
+            if not verify_tls:
+                context.check_hostname = False
+                context.verify_mode = ssl.CERT_NONE
+            _SSL_CONTEXTS[verify_tls] = context
+    return context
+
+
+class ConnectionPool:
+    """Thread-safe pool of idle keep-alive connections, bucketed per host."""
+
+    def __init__(self, max_per_host: int = 4, idle_timeout: float = 30.0) -> None:
+        self.max_per_host = max(1, int(max_per_host))
+        self.idle_timeout = float(idle_timeout)
+        self._idle: Dict[PoolKey, Deque[Tuple[http.client.HTTPConnection, float]]] = {}
+        self._lock = threading.Lock()
+        self._stats = {
+            "requests": 0,
+            "handshakes": 0,
+            "reused": 0,
+            "stale_retries": 0,
+            "evicted_idle": 0,
+            "discarded": 0,
+        }
+
+    def request(self, method: str, url: str, body: Optional[bytes], headers: Dict[str, str],
+                timeout: float, verify_tls: bool) -> Tuple[int, Dict[str, str], bytes]:
+        """Send a request and return ``(status, headers, body)``; raises on network errors."""
+        response, conn, key = self._send(method, url, body, headers, timeout, verify_tls)
+        try:
+            payload = response.read()
+        except BaseException:
+            conn.close()
+            raise
+        self._release(key, conn, response)
+        return response.status, {k.lower(): v for k, v in response.getheaders()}, payload
+
+    def open(self, method: str, url: str, body: Optional[bytes], headers: Dict[str, str],
+             timeout: float, verify_tls: bool) -> "PooledResponse":
+        """Send a request and return the unread response, for consuming streamed bodies."""
+        response, conn, key = self._send(method, url, body, headers, timeout, verify_tls)
+        return PooledResponse(self, key, conn, response)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            snapshot: Dict[str, Any] = dict(self._stats)
+            snapshot["idle"] = sum(len(bucket) for bucket in self._idle.values())
+            snapshot["hosts"] = len(self._idle)
+        snapshot["max_per_host"] = self.max_per_host
+        return snapshot
+
+    def close(self) -> None:
+        """Close every idle connection."""
+        with self._lock:
+            buckets = list(self._idle.values())
+            self._idle.clear()
+        for bucket in buckets:
+            for conn, _ in bucket:
+                conn.close()
+
+    def _send(self, method: str, url: str, body: Optional[bytes], headers: Dict[str, str],
+              timeout: float, verify_tls: bool):
+        parts = urlsplit(url)
+        scheme = (parts.scheme or "http").lower()
+        port = parts.port or (443 if scheme == "https" else 80)
+        key: PoolKey = (scheme, parts.hostname or "", port, bool(verify_tls) if scheme == "https" else True)
+        target = parts.path or "/"
+        if parts.query:
+            target = f"{target}?{parts.query}"
+
+        with self._lock:
+            self._stats["requests"] += 1
+
+        conn, reused = self._acquire(key, timeout)
+        sent = False
+        try:
+            conn.request(method.upper(), target, body=body, headers=headers)
+            sent = True
+            response = conn.getresponse()
+        except _STALE_ERRORS:
+            conn.close()
+            # A write that failed means the server dropped the idle socket before
+            # reading the request.  A lost response may belong to a request it
+            # acted on, so that is left to the caller's retry policy unless the
+            # method is idempotent.
+            if not reused or (sent and method.upper() not in IDEMPOTENT_METHODS):
+                raise
+            with self._lock:
+                self._stats["stale_retries"] += 1
+            conn = self._connect(key, timeout)
+            try:
+                conn.request(method.upper(), target, body=body, headers=headers)
+                response = conn.getresponse()
+            except BaseException:
+                conn.close()
+                raise
+        except BaseException:
+            conn.close()
+            raise
+        return response, conn, key
+
+    def _acquire(self, key: PoolKey, timeout: float) -> Tuple[http.client.HTTPConnection, bool]:
+        now = time.monotonic()
+        expired = []
+        conn = None
+        with self._lock:
+            bucket = self._idle.get(key)
+            if bucket:
+                # Oldest entries sit on the left; evict them before taking the newest.
+                while bucket and now - bucket[0][1] > self.idle_timeout:
+                    expired.append(bucket.popleft()[0])
+                    self._stats["evicted_idle"] += 1
+                if bucket:
+                    conn = bucket.pop()[0]
+                    self._stats["reused"] += 1
+        for stale in expired:
+            stale.close()
+        if conn is None:
+            return self._connect(key, timeout), False
+        conn.timeout = timeout
+        if conn.sock is not None:
+            conn.sock.settimeout(timeout)
+        return conn, True
+
+    def _connect(self, key: PoolKey, timeout: float) -> http.client.HTTPConnection:
+        scheme, host, port, verify_tls = key
+        if scheme == "https":
+            conn: http.client.HTTPConnection = http.client.HTTPSConnection(
+                host, port, timeout=timeout, context=ssl_context(verify_tls),
+            )
+        else:
+            conn = http.client.HTTPConnection(host, port, timeout=timeout)
+        # Connect eagerly so the TCP/TLS setup can be timed apart from the request.
+        started = time.perf_counter()
+        try:
+            conn.connect()
+        except BaseException:
+            conn.close()
+            raise
+        instrumentation.observe("connect", time.perf_counter() - started)
+        with self._lock:
+            self._stats["handshakes"] += 1
+        return conn
+
+    def _release(self, key: PoolKey, conn: http.client.HTTPConnection,
+                 response: http.client.HTTPResponse) -> None:
+        if response.will_close or conn.sock is None:
+            conn.close()
+            return
+        with self._lock:
+            bucket = self._idle.setdefault(key, deque())
+            if len(bucket) < self.max_per_host:
+                bucket.append((conn, time.monotonic()))
+                return
+            self._stats["discarded"] += 1
+        conn.close()
+
+
+class PooledResponse:
+    """Unread response; closing it hands the connection back if the body was drained."""
+
+    def __init__(self, pool: ConnectionPool, key: PoolKey, conn: http.client.HTTPConnection,
+                 response: http.client.HTTPResponse) -> None:
+        self._pool = pool
+        self._key = key
+        self._conn: Optional[http.client.HTTPConnection] = conn
+        self.raw = response
+        self.status = response.status
+        self.headers = {k.lower(): v for k, v in response.getheaders()}
+
+    def read(self, amt: Optional[int] = None) -> bytes:
+        return self.raw.read(amt)
+
+    def iter_lines(self) -> Iterator[bytes]:
+        """Yield raw lines as they arrive (chunked decoding is handled by http.client)."""
+        while True:
+            line = self.raw.readline()
+            if not line:
+                return
+            yield line
+
+    def close(self) -> None:
+        conn, self._conn = self._conn, None
+        if conn is None:
+            return
+        if self.raw.isclosed():
+            self._pool._release(self._key, conn, self.raw)  # pylint: disable=protected-access
+        else:
+            # Abandoned mid-body: the socket is in an unknown state.
+            conn.close()
+
+    def __enter__(self) -> "PooledResponse":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+def get_pool(max_per_host: Optional[int] = None, idle_timeout: Optional[float] = None) -> ConnectionPool:
+    """Return the shared pool, creating it on first use."""
+    global _POOL  # noqa: PLW0603
+    if _POOL is not None:
+        return _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = ConnectionPool(
+                max_per_host if max_per_host is not None else 4,
+                idle_timeout if idle_timeout is not None else 30.0,
+            )
+    return _POOL
+
+
+def reset_pool() -> None:
+    """Drop the shared pool (closing idle sockets); the next call builds a new one."""
+    global _POOL  # noqa: PLW0603
+    with _POOL_LOCK:
+        pool, _POOL = _POOL, None
+    if pool is not None:
+        pool.close()
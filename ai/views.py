@@ -0,0 +1,36 @@
+import hmac
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+
+from config.env import env
+
+from .instrumentation import render_prometheus
+from .local_ai_api import cache_stats, poll_stats, pool_stats, resilience_stats
+
+
+def metrics(request):
+    """
+    Prometheus scrape endpoint for the AI client.
+
+    Requires ``Authorization: Bearer $AI_METRICS_TOKEN`` when that variable is
+    set; without it the endpoint is only served in DEBUG.
+    """
+    token = env.str("AI_METRICS_TOKEN")
+    if token:
+        supplied = request.headers.get("Authorization", "").removeprefix("Bearer ").strip()
+        if not hmac.compare_digest(supplied, token):
+            return HttpResponseForbidden()
+    elif not settings.DEBUG:
+        return HttpResponseForbidden()
+
+    resilience = resilience_stats()
+    breakers = resilience.pop("breakers", {})
+    resilience["open_breakers"] = sum(1 for breaker in breakers.values() if breaker["state"] != "closed")
+    body = render_prometheus({
+        "ai_pool": pool_stats(),
+        "ai_poll": poll_stats(),
+        "ai_cache": cache_stats(),
+        "ai_resilience": resilience,
+    })
+    return HttpResponse(body, content_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,202 @@
+"""
+Throughput and latency benchmark for ``ai.local_ai_api.create_response``.
+
+Runs the client against a local :class:`ai.fake_proxy.FakeProxy` in three
+modes — ``sync`` (one call at a time), ``threaded`` (a thread pool of
+``--concurrency`` workers) and ``async`` (``acreate_response`` gathered under a
+semaphore of the same size) — and prints one JSON document:
+
+    python -m benchmarks.ai_client --requests 500 --concurrency 32 --output bench.json
+
+Pass ``--baseline bench.json`` to compare against an earlier run; the exit
+status is 1 if throughput dropped or p99 grew by more than ``--tolerance``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+MODES = ("sync", "threaded", "async")
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict[str, Any]:
+    return {
+        "requests": len(latencies) + errors,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 4),
+        "throughput_rps": round((len(latencies) + errors) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 2) if latencies else 0.0,
+    }
+
+
+def _payload(index: int) -> Dict[str, Any]:
+    return {"input": [{"role": "user", "content": f"benchmark prompt {index}"}]}
+
+
+def _timed_call(index: int, options: Dict[str, Any]):
+    from ai.local_ai_api import create_response  # pylint: disable=import-outside-toplevel
+
+    started = time.perf_counter()
+    response = create_response(_payload(index), options)
+    return time.perf_counter() - started, bool(response.get("success"))
+
+
+def run_sync(count: int, concurrency: int, options: Dict[str, Any]) -> Dict[str, Any]:
+    del concurrency
+    latencies, errors = [], 0
+    started = time.perf_counter()
+    for index in range(count):
+        seconds, ok = _timed_call(index, options)
+        if ok:
+            latencies.append(seconds)
+        else:
+            errors += 1
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+
+def run_threaded(count: int, concurrency: int, options: Dict[str, Any]) -> Dict[str, Any]:
+    latencies, errors = [], 0
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as executor:
+        for seconds, ok in executor.map(lambda index: _timed_call(index, options), range(count)):
+            if ok:
+                latencies.append(seconds)
+            else:
+                errors += 1
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+
+def run_async(count: int, concurrency: int, options: Dict[str, Any]) -> Dict[str, Any]:
+    from ai.local_ai_api import acreate_response  # pylint: disable=import-outside-toplevel
+
+    async def main():
+        slots = asyncio.Semaphore(concurrency)
+
+        async def one(index: int):
+            async with slots:
+                call_started = time.perf_counter()
+                response = await acreate_response(_payload(index), options)
+                return time.perf_counter() - call_started, bool(response.get("success"))
+
+        return await asyncio.gather(*(one(index) for index in range(count)))
+
+    started = time.perf_counter()
+    results = asyncio.run(main())
+    elapsed = time.perf_counter() - started
+    latencies = [seconds for seconds, ok in results if ok]
+    return summarize(latencies, len(results) - len(latencies), elapsed)
+
+
+RUNNERS = {"sync": run_sync, "threaded": run_threaded, "async": run_async}
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Human-readable regressions of ``current`` against ``baseline``."""
+    regressions = []
+    for mode, result in current["modes"].items():
+        before = baseline.get("modes", {}).get(mode)
+        if not before:
+            continue
+        if before["throughput_rps"] and result["throughput_rps"] < before["throughput_rps"] * (1 - tolerance):
+            regressions.append(
+                f"{mode}: throughput {result['throughput_rps']} rps < baseline {before['throughput_rps']} rps"
+            )
+        if before["p99_ms"] and result["p99_ms"] > before["p99_ms"] * (1 + tolerance):
+            regressions.append(f"{mode}: p99 {result['p99_ms']} ms > baseline {before['p99_ms']} ms")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200, help="Calls per mode.")
+    parser.add_argument("--sync-requests", type=int, default=None,
+                        help="Calls for the sequential mode (default: --requests / 10).")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--modes", default=",".join(MODES), help="Comma-separated subset of sync,threaded,async.")
+    parser.add_argument("--queue-delay", type=float, default=0.05)
+    parser.add_argument("--delay-jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--response-size", type=int, default=1024)
+    parser.add_argument("--poll-first-delay", type=float, default=0.05)
+    parser.add_argument("--poll-interval", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", default=None, help="Write the JSON result here as well as stdout.")
+    parser.add_argument("--baseline", default=None, help="Earlier result to compare against.")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    from ai.fake_proxy import FakeProxy  # pylint: disable=import-outside-toplevel
+
+    proxy = FakeProxy(queue_delay=args.queue_delay, delay_jitter=args.delay_jitter,
+                      error_rate=args.error_rate, response_size=args.response_size, seed=args.seed)
+    proxy.start()
+    # The client reads its configuration once, on first use.
+    os.environ.update({
+        "AI_PROXY_BASE_URL": proxy.url,
+        "PROJECT_ID": "bench",
+        "PROJECT_UUID": "bench",
+        "AI_POLL_FIRST_DELAY": str(args.poll_first_delay),
+        "AI_ASYNC_MAX_CONNECTIONS": str(max(args.concurrency, 1)),
+        "AI_POOL_SIZE": str(max(args.concurrency, 1)),
+    })
+    options = {"poll_interval": args.poll_interval, "cache": False}
+
+    from ai import local_ai_api  # pylint: disable=import-outside-toplevel
+
+    result: Dict[str, Any] = {
+        "benchmark": "ai_client",
+        "python": platform.python_version(),
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "baseline")},
+        "modes": {},
+    }
+    try:
+        for mode in [m.strip() for m in args.modes.split(",") if m.strip()]:
+            count = args.requests
+            if mode == "sync":
+                count = args.sync_requests or max(1, args.requests // 10)
+            result["modes"][mode] = RUNNERS[mode](count, args.concurrency, options)
+        result["client"] = {
+            "pool": local_ai_api.pool_stats(),
+            "poll": local_ai_api.poll_stats(),
+            "resilience": local_ai_api.resilience_stats(),
+        }
+        result["proxy"] = dict(proxy.stats)
+    finally:
+        proxy.stop()
+
+    text = json.dumps(result, indent=2, default=str)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            handle.write(text + "\n")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as handle:
+            regressions = compare(result, json.load(handle), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+"""
+Bandwidth and latency benchmark for the conditional-GET and compression middleware.
+
+Requests each ``--paths`` entry through Django's test client, once with the
+full ``MIDDLEWARE`` list and once with the project's middleware removed
+("bare"), and prints one JSON document:
+
+    DJANGO_SETTINGS_MODULE=config.settings python -m benchmarks.http_stack --requests 200
+
+For every path and stack it reports server-side p50/p99, bytes on the wire
+and the time that payload needs on a slow mobile link (``--bandwidth-kbps``,
+``--rtt-ms``). The full stack is measured twice: for first visits, and for
+revalidations that send back the ETag they were given. Paths that read the
+catalog need a migrated database.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+from benchmarks.ai_client import percentile
+
+PROJECT_MIDDLEWARE = (
+    "core.middleware.CompressionMiddleware",
+    "core.middleware.VersionETagMiddleware",
+)
+HEADER_OVERHEAD = 300  # status line and headers, roughly, per response
+
+
+def wire_time(size: int, bandwidth_kbps: float, rtt_ms: float) -> float:
+    return rtt_ms / 1000 + size * 8 / (bandwidth_kbps * 1000)
+
+
+def measure(client, path: str, count: int, headers: Dict[str, str], link: Dict[str, float]) -> Dict[str, Any]:
+    latencies: List[float] = []
+    sizes: List[int] = []
+    statuses = set()
+    for _ in range(count):
+        started = time.perf_counter()
+        response = client.get(path, **headers)
+        body = b"".join(response.streaming_content) if response.streaming else response.content
+        latencies.append(time.perf_counter() - started)
+        sizes.append(len(body) + HEADER_OVERHEAD)
+        statuses.add(response.status_code)
+    size = round(statistics.fmean(sizes))
+    return {
+        "status": sorted(statuses),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "bytes": size,
+        "slow_link_ms": round(wire_time(size, **link) * 1000, 1),
+    }
+
+
+def run(paths: List[str], count: int, link: Dict[str, float]) -> Dict[str, Any]:
+    from django.conf import settings  # pylint: disable=import-outside-toplevel
+    from django.test import Client  # pylint: disable=import-outside-toplevel
+    from django.test.utils import override_settings  # pylint: disable=import-outside-toplevel
+
+    bare = [name for name in settings.MIDDLEWARE if name not in PROJECT_MIDDLEWARE]
+    accept = {"HTTP_ACCEPT_ENCODING": "gzip, deflate, br"}
+    results: Dict[str, Any] = {}
+    for path in paths:
+        # A client builds its middleware chain on first use, so each stack gets its own.
+        with override_settings(MIDDLEWARE=bare):
+            bare_client = Client()
+            bare_client.get(path, **accept)  # warm caches equally for both stacks
+            bare_result = measure(bare_client, path, count, accept, link)
+        client = Client()
+        full_result = measure(client, path, count, accept, link)
+        etag = client.get(path, **accept).get("ETag")
+        entry = {"bare": bare_result, "full": full_result}
+        if etag:
+            entry["revalidate"] = measure(client, path, count, {**accept, "HTTP_IF_NONE_MATCH": etag}, link)
+        results[path] = entry
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--paths", default="/,/listings/", help="Comma-separated URL paths.")
+    parser.add_argument("--requests", type=int, default=100, help="Requests per path and stack.")
+    parser.add_argument("--bandwidth-kbps", type=float, default=400.0, help="Simulated link speed (slow 3G: 400).")
+    parser.add_argument("--rtt-ms", type=float, default=300.0, help="Simulated round-trip time.")
+    parser.add_argument("--output", default=None, help="Write the JSON result here as well as stdout.")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+    import django  # pylint: disable=import-outside-toplevel
+    from django.test.utils import setup_test_environment  # pylint: disable=import-outside-toplevel
+
+    django.setup()
+    setup_test_environment()  # lets the test client's "testserver" host through ALLOWED_HOSTS
+
+    link = {"bandwidth_kbps": args.bandwidth_kbps, "rtt_ms": args.rtt_ms}
+    result = {
+        "python": platform.python_version(),
+        "settings": {"requests": args.requests, **link},
+        "paths": run([path for path in args.paths.split(",") if path], args.requests, link),
+    }
+    text = json.dumps(result, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            handle.write(text + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,146 @@
+"""
+Bulk listing import/export benchmark on a synthetic file.
+
+Writes ``--rows`` synthetic listings to a CSV (some descriptions are quoted,
+multi-line and contain commas, as spreadsheet exports do), then imports it
+once per ``--workers`` setting and exports it back, reporting rows/sec and
+the importing process's peak RSS:
+
+    DJANGO_SETTINGS_MODULE=config.settings python -m benchmarks.listing_io --rows 1000000 --workers 1,4
+
+Run it against a scratch, migrated database. Rows go to a dedicated
+``bench-import`` seller and category, which are deleted at the end.
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import io
+import json
+import os
+import platform
+import random
+import resource
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+BENCH_SLUG = "bench-import"
+WORDS = (
+    "phone samsung iphone charger laptop hp dell sofa table chair bed mattress fridge tv "
+    "bajaj motorcycle bicycle shoes dress coffee jebena teff injera mitad sheep goat honey "
+    "solar panel battery generator house rent apartment land shop"
+).split()
+
+
+def generate(path: str, rows: int, seed: int = 0) -> int:
+    rng = random.Random(seed)
+    with open(path, "w", encoding="utf-8", newline="") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(["seller", "category", "title", "description", "price", "currency", "location", "status"])
+        for number in range(rows):
+            title = " ".join(rng.choices(WORDS, k=rng.randint(2, 6))).capitalize()
+            description = " ".join(rng.choices(WORDS, k=rng.randint(10, 60)))
+            if number % 10 == 0:
+                description = f"{description},\nbarely used, \"as new\""
+            writer.writerow([
+                BENCH_SLUG, BENCH_SLUG, f"{title} #{number}", description,
+                f"{rng.uniform(50, 250000):.2f}", "ETB", rng.choice(["Jimma", "Agaro", "Bonga", ""]), "active",
+            ])
+    return os.path.getsize(path)
+
+
+def peak_rss_kb() -> int:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def timed_command(name: str, *args: Any, **options: Any) -> Dict[str, Any]:
+    from django.core.management import call_command  # pylint: disable=import-outside-toplevel
+
+    rss_before = peak_rss_kb()
+    started = time.perf_counter()
+    call_command(name, *args, stdout=io.StringIO(), stderr=io.StringIO(), **options)
+    elapsed = time.perf_counter() - started
+    return {"seconds": round(elapsed, 2), "peak_rss_growth_kb": peak_rss_kb() - rss_before}
+
+
+def run(rows: int, workers: List[int], chunk_rows: int, transaction_rows: int, directory: str) -> Dict[str, Any]:
+    from core.models import Category, Listing, Seller  # pylint: disable=import-outside-toplevel
+
+    source = os.path.join(directory, "listings.csv")
+    started = time.perf_counter()
+    size = generate(source, rows)
+    result: Dict[str, Any] = {
+        "file": {"rows": rows, "bytes": size, "generate_seconds": round(time.perf_counter() - started, 2)},
+        "import": {},
+    }
+
+    seller, _ = Seller.objects.get_or_create(slug=BENCH_SLUG, defaults={"name": "Import benchmark"})
+    category, _ = Category.objects.get_or_create(slug=BENCH_SLUG, defaults={"name": "Import benchmark"})
+    try:
+        for count in workers:
+            _delete_bench_listings(seller)
+            entry = timed_command(
+                "import_listings", source, workers=count, chunk_rows=chunk_rows,
+                transaction_rows=transaction_rows, no_reindex=True,
+            )
+            imported = Listing.objects.filter(seller=seller).count()
+            entry["rows"] = imported
+            entry["rows_per_s"] = round(imported / entry["seconds"]) if entry["seconds"] else 0
+            result["import"][f"workers={count}"] = entry
+
+        for fmt in ("csv", "jsonl"):
+            target = os.path.join(directory, f"export.{fmt}")
+            entry = timed_command("export_listings", target, seller=BENCH_SLUG)
+            entry["bytes"] = os.path.getsize(target)
+            entry["rows_per_s"] = round(rows / entry["seconds"]) if entry["seconds"] else 0
+            result[f"export_{fmt}"] = entry
+    finally:
+        _delete_bench_listings(seller)
+        category.delete()
+        seller.delete()
+    return result
+
+
+def _delete_bench_listings(seller) -> None:
+    from core.models import Listing  # pylint: disable=import-outside-toplevel
+
+    # A plain DELETE: per-row delete signals would dominate the run, and the
+    # benchmark imports with --no-reindex, so there are no postings to remove.
+    queryset = Listing.objects.filter(seller=seller)
+    queryset._raw_delete(queryset.db)  # pylint: disable=protected-access
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--workers", default=f"1,{os.cpu_count() or 1}", help="Comma-separated worker counts.")
+    parser.add_argument("--chunk-rows", type=int, default=5000)
+    parser.add_argument("--transaction-rows", type=int, default=20000)
+    parser.add_argument("--dir", default=None, help="Where to write the files (default: a temporary directory).")
+    parser.add_argument("--output", default=None, help="Write the JSON result here as well as stdout.")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+    import django  # pylint: disable=import-outside-toplevel
+
+    django.setup()
+    workers = sorted({max(1, int(count)) for count in args.workers.split(",") if count})
+    with tempfile.TemporaryDirectory(dir=args.dir) as directory:
+        result = {
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+            **run(args.rows, workers, args.chunk_rows, args.transaction_rows, directory),
+        }
+    text = json.dumps(result, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            handle.write(text + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
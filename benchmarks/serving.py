@@ -0,0 +1,205 @@
+"""
+WSGI vs ASGI serving benchmark: requests/sec, latency and memory per connection.
+
+Starts the project twice in subprocesses — ``config.wsgi`` under a
+thread-per-connection stdlib server (what a threaded WSGI worker does) and
+``config.asgi`` under uvicorn — and drives both with ``--concurrency``
+simultaneous connections:
+
+    DJANGO_SETTINGS_MODULE=config.settings python -m benchmarks.serving --concurrency 200 --wait 2
+
+Two workloads run against each server. ``fast`` requests ``/listings/``.
+``slow`` long-polls ``/ai/jobs/<id>/?wait=<--wait>`` for a queued job that
+no worker picks up, which stands in for a view waiting on an AI call.
+Memory per connection is the server's peak RSS during the slow workload
+minus its idle RSS, divided by the concurrency. Needs ``uvicorn``, Linux
+``/proc`` and a migrated database.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from benchmarks.ai_client import summarize
+
+SERVERS = ("wsgi", "asgi")
+
+
+def serve(kind: str, host: str, port: int) -> None:
+    """Run one server in the foreground (the benchmark's subprocess entry point)."""
+    if kind == "asgi":
+        import uvicorn  # pylint: disable=import-outside-toplevel
+
+        uvicorn.run("config.asgi:application", host=host, port=port, log_level="warning", lifespan="off")
+        return
+
+    from socketserver import ThreadingMixIn  # pylint: disable=import-outside-toplevel
+    from wsgiref.simple_server import WSGIRequestHandler, WSGIServer  # pylint: disable=import-outside-toplevel
+
+    from config.wsgi import application  # pylint: disable=import-outside-toplevel
+
+    class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+        daemon_threads = True
+        request_queue_size = 2048
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_message(self, *args: Any) -> None:
+            pass
+
+    server = ThreadingWSGIServer((host, port), QuietHandler)
+    server.set_app(application)
+    server.serve_forever()
+
+
+def rss_kb(pid: int) -> int:
+    with open(f"/proc/{pid}/status", encoding="ascii") as handle:
+        for line in handle:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+
+def _free_port(host: str) -> int:
+    with socket.socket() as sock:
+        sock.bind((host, 0))
+        return sock.getsockname()[1]
+
+
+def _wait_until_listening(host: str, port: int, process: subprocess.Popen, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"server exited with status {process.returncode}")
+        try:
+            with socket.create_connection((host, port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError("server did not start listening")
+
+
+async def _get(host: str, port: int, path: str, timeout: float) -> int:
+    reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+    try:
+        writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\nConnection: close\r\n\r\n".encode("ascii"))
+        await writer.drain()
+        raw = await asyncio.wait_for(reader.read(), timeout)
+    finally:
+        writer.close()
+    return int(raw.split(b" ", 2)[1]) if raw.startswith(b"HTTP/") else 0
+
+
+def load(host: str, port: int, path: str, count: int, concurrency: int, timeout: float) -> Dict[str, Any]:
+    async def main():
+        latencies: List[float] = []
+        errors = 0
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def one():
+            nonlocal errors
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    status = await _get(host, port, path, timeout)
+                except (OSError, asyncio.TimeoutError):
+                    status = 0
+                if status == 200:
+                    latencies.append(time.perf_counter() - started)
+                else:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(count)))
+        return summarize(latencies, errors, time.perf_counter() - started)
+
+    return asyncio.run(main())
+
+
+def measure_server(kind: str, args: argparse.Namespace, slow_path: str) -> Dict[str, Any]:
+    port = _free_port(args.host)
+    process = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.serving", "--serve", kind, "--host", args.host, "--port", str(port)],
+        env=os.environ.copy(),
+    )
+    try:
+        _wait_until_listening(args.host, port, process)
+        load(args.host, port, "/listings/", args.concurrency, args.concurrency, args.timeout)  # warm up
+        idle = rss_kb(process.pid)
+        fast = load(args.host, port, "/listings/", args.requests, args.concurrency, args.timeout)
+
+        peak = idle
+        sampling = True
+
+        def sample():
+            nonlocal peak
+            while sampling:
+                peak = max(peak, rss_kb(process.pid))
+                time.sleep(0.05)
+
+        sampler = threading.Thread(target=sample, daemon=True)
+        sampler.start()
+        slow = load(args.host, port, slow_path, args.concurrency, args.concurrency, args.timeout + args.wait)
+        sampling = False
+        sampler.join()
+        slow["idle_rss_kb"] = idle
+        slow["peak_rss_kb"] = peak
+        slow["kb_per_connection"] = round((peak - idle) / args.concurrency, 1)
+        return {"fast": fast, "slow": slow}
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=1000, help="Requests in the fast workload.")
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--wait", type=float, default=2.0, help="Seconds each slow request long-polls.")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--servers", default=",".join(SERVERS), help="Comma-separated subset of wsgi,asgi.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=0, help=argparse.SUPPRESS)
+    parser.add_argument("--serve", choices=SERVERS, default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--output", default=None, help="Write the JSON result here as well as stdout.")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+    if args.serve:
+        serve(args.serve, args.host, args.port)
+        return 0
+
+    import django  # pylint: disable=import-outside-toplevel
+
+    django.setup()
+    from core.jobs import enqueue  # pylint: disable=import-outside-toplevel
+
+    job = enqueue({"input": [{"role": "user", "content": "serving benchmark"}]})
+    try:
+        slow_path = f"/ai/jobs/{job.uuid}/?wait={args.wait}"
+        result = {
+            "python": platform.python_version(),
+            "settings": {"requests": args.requests, "concurrency": args.concurrency, "wait_s": args.wait},
+            "servers": {kind: measure_server(kind, args, slow_path) for kind in args.servers.split(",") if kind},
+        }
+    finally:
+        job.delete()
+    text = json.dumps(result, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            handle.write(text + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
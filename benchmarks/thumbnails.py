@@ -0,0 +1,114 @@
+"""
+Thumbnailer benchmark: images/sec for ``core.thumbnails.render``.
+
+Generates ``--images`` synthetic phone-camera JPEGs (4032x3024 by default)
+and renders every configured width in WebP and JPEG. It does this once per
+``--workers`` setting, in a process pool as the site does, and reports
+images/sec plus the bytes a 3G user downloads for each size:
+
+    python -m benchmarks.thumbnails --images 40 --workers 1,4
+
+No database or Django settings are needed.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from PIL import Image, ImageDraw, ImageFilter
+
+from core.thumbnails import FORMATS, render, render_all
+
+WIDTHS = (160, 320, 640, 1024)
+
+
+def synthetic_photo(path: str, size: Tuple[int, int], seed: int) -> None:
+    """A JPEG with gradients, shapes and sensor-like noise, so it compresses like a photo."""
+    rng = random.Random(seed)
+    width, height = size
+    small = Image.new("RGB", (width // 8, height // 8))
+    draw = ImageDraw.Draw(small)
+    for y in range(small.height):
+        shade = int(255 * y / small.height)
+        draw.line([(0, y), (small.width, y)], fill=(shade, rng.randint(60, 200), 255 - shade))
+    for _ in range(40):
+        x, y = rng.randrange(small.width), rng.randrange(small.height)
+        radius = rng.randint(5, small.width // 6)
+        fill = tuple(rng.randrange(256) for _ in range(3))
+        draw.ellipse([x - radius, y - radius, x + radius, y + radius], fill=fill)
+    image = small.resize(size, Image.Resampling.BICUBIC).filter(ImageFilter.GaussianBlur(2))
+    noise = Image.effect_noise(size, 24).convert("RGB")
+    Image.blend(image, noise, 0.08).save(path, "JPEG", quality=90)
+
+
+def targets_for(source: str, out_dir: str) -> List[Tuple[int, str, str]]:
+    stem = os.path.splitext(os.path.basename(source))[0]
+    return [(width, fmt, os.path.join(out_dir, f"{stem}-{width}.{fmt}")) for width in WIDTHS for fmt in FORMATS]
+
+
+def measure(sources: List[str], out_dir: str, workers: int, batch: int) -> Dict[str, Any]:
+    jobs = [(source, targets_for(source, out_dir)) for source in sources]
+    started = time.perf_counter()
+    if workers <= 1:
+        for source, targets in jobs:
+            render(source, targets)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(render_all, [jobs[i:i + batch] for i in range(0, len(jobs), batch)]))
+    elapsed = time.perf_counter() - started
+    return {"seconds": round(elapsed, 2), "images_per_s": round(len(sources) / elapsed, 2)}
+
+
+def output_sizes(sources: List[str], out_dir: str) -> Dict[str, int]:
+    sizes: Dict[str, List[int]] = {}
+    for source in sources:
+        for width, fmt, path in targets_for(source, out_dir):
+            sizes.setdefault(f"{width}.{fmt}", []).append(os.path.getsize(path))
+    return {key: round(sum(values) / len(values)) for key, values in sizes.items()}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--images", type=int, default=40)
+    parser.add_argument("--size", default="4032x3024", help="Source photo size, WIDTHxHEIGHT.")
+    parser.add_argument("--workers", default=f"1,{os.cpu_count() or 1}", help="Comma-separated pool sizes.")
+    parser.add_argument("--batch", type=int, default=4, help="Images per pool task.")
+    parser.add_argument("--output", default=None, help="Write the JSON result here as well as stdout.")
+    args = parser.parse_args(argv)
+
+    size = tuple(int(part) for part in args.size.lower().split("x"))
+    workers = sorted({max(1, int(count)) for count in args.workers.split(",") if count})
+    with tempfile.TemporaryDirectory() as directory:
+        sources = []
+        for number in range(args.images):
+            path = os.path.join(directory, f"photo{number}.jpg")
+            synthetic_photo(path, size, number)
+            sources.append(path)
+        out_dir = os.path.join(directory, "thumbs")
+        result = {
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+            "settings": {"images": args.images, "size": args.size, "widths": WIDTHS, "formats": list(FORMATS)},
+            "source_bytes": round(sum(os.path.getsize(source) for source in sources) / len(sources)),
+            "runs": {f"workers={count}": measure(sources, out_dir, count, args.batch) for count in workers},
+            "thumbnail_bytes": output_sizes(sources, out_dir),
+        }
+    text = json.dumps(result, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            handle.write(text + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
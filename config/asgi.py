@@ -2,6 +2,12 @@
 ASGI config for config project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Serve it with an ASGI server, e.g.::
+
+    uvicorn config.asgi:application --host 0.0.0.0 --port 8000 --workers 4 --lifespan off
+
+Async views (listings, job long-polls) then run on the event loop without a
+thread per request.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
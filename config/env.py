@@ -0,0 +1,186 @@
+"""
+Typed configuration from the environment, with ``.env`` files parsed once.
+
+Settings, the AI client and the views all read configuration through one
+loader::
+
+    from config.env import env
+
+    DEBUG = env.bool("DJANGO_DEBUG", True)
+    TIMEOUT = env.int("AI_TIMEOUT", 30)
+
+The first read loads ``ENV_FILES`` into ``os.environ``.  It never
+overrides a variable the process was started with, and an earlier file
+wins over a later one.  After that the files are not parsed again, however
+many modules read configuration.
+
+Sending the process SIGHUP re-reads the files at the start of its next
+request.  Variables that came from a file are updated, and ``generation``
+increases so that caches built from them (``ai.local_ai_api._config``)
+rebuild.  Django settings declared with :meth:`Env.reloadable` are set
+again.  Every other setting still needs a restart.
+
+This module imports nothing from Django, so the AI client can use it
+standalone.
+"""
+
+import os
+import signal
+import threading
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+# The deployment's .env (next to the checkout) first, then the repository's own.
+ENV_FILES = (BASE_DIR.parent / ".env", BASE_DIR / ".env")
+
+TRUE = frozenset({"1", "true", "yes", "on"})
+FALSE = frozenset({"0", "false", "no", "off"})
+
+
+def parse_env_file(path):
+    """``{key: value}`` from a ``KEY=value`` file; a missing file is empty."""
+    values = {}
+    try:
+        with open(path, "r", encoding="utf-8") as handle:
+            lines = handle.read().splitlines()
+    except OSError:
+        return values
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("#") or "=" not in line:
+            continue
+        key, value = line.split("=", 1)
+        key = key.strip().removeprefix("export ").strip()
+        value = value.strip()
+        if len(value) >= 2 and value[0] == value[-1] and value[0] in "'\"":
+            value = value[1:-1]
+            if line.split("=", 1)[1].strip()[0] == '"':
+                value = value.replace("\\n", "\n").replace('\\"', '"')
+        elif " #" in value:
+            value = value.split(" #", 1)[0].rstrip()  # trailing comment
+        if key:
+            values[key] = value
+    return values
+
+
+class Env:
+    def __init__(self, files):
+        self.files = tuple(files)
+        self.generation = 0
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._from_files = {}  # variables this loader put into os.environ
+        self._reload_requested = False
+        self._reloadable = {}  # setting name -> (reader, default)
+
+    # Loading
+
+    def load(self):
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    self._apply(self._read())
+                    self._loaded = True
+
+    def reload(self):
+        """Re-read the files now and re-apply reloadable settings."""
+        with self._lock:
+            self._apply(self._read())
+            self._loaded = True
+            self.generation += 1
+        self._apply_settings()
+
+    def request_reload(self, *args):
+        """SIGHUP handler: only flags the reload, which :meth:`refresh` performs."""
+        self._reload_requested = True
+
+    def refresh(self, *args, **kwargs):
+        """Carry out a requested reload (cheap otherwise); returns ``generation``."""
+        if self._reload_requested:
+            self._reload_requested = False
+            self.reload()
+        return self.generation
+
+    def install_signal_handler(self):
+        """Reload on SIGHUP; only possible from the main thread."""
+        if hasattr(signal, "SIGHUP") and threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGHUP, self.request_reload)
+            return True
+        return False
+
+    def _read(self):
+        merged = {}
+        for path in self.files:
+            for key, value in parse_env_file(path).items():
+                merged.setdefault(key, value)
+        return merged
+
+    def _apply(self, values):
+        for key, value in values.items():
+            if key in os.environ and key not in self._from_files:
+                continue  # set by the process environment: that always wins
+            os.environ[key] = value
+            self._from_files[key] = value
+        for key in set(self._from_files) - set(values):
+            if os.environ.get(key) == self._from_files.pop(key):
+                del os.environ[key]  # removed from the file
+
+    # Typed reads
+
+    def get(self, name, default=None):
+        self.load()
+        return os.environ.get(name, default)
+
+    def str(self, name, default=""):
+        return self.get(name, default)
+
+    def bool(self, name, default=False):
+        value = self.get(name)
+        if value is None or not value.strip():
+            return default
+        value = value.strip().lower()
+        if value in TRUE:
+            return True
+        if value in FALSE:
+            return False
+        raise ValueError(f"{name}={value!r} is not a boolean (use true/false).")
+
+    def int(self, name, default=0):
+        return self._number(name, default, int)
+
+    def float(self, name, default=0.0):
+        return self._number(name, default, float)
+
+    def list(self, name, default=(), separator=","):
+        value = self.get(name)
+        if value is None:
+            return list(default)
+        return [item.strip() for item in value.split(separator) if item.strip()]
+
+    def _number(self, name, default, kind):
+        value = self.get(name)
+        if value is None or not value.strip():
+            return default
+        try:
+            return kind(value)
+        except ValueError:
+            raise ValueError(f"{name}={value!r} is not a valid {kind.__name__}.") from None
+
+    # Reloadable Django settings
+
+    def reloadable(self, name, kind, default):
+        """Read setting ``name`` (same-named variable) and re-apply it on every reload."""
+        reader = getattr(self, kind.__name__)
+        self._reloadable[name] = (reader, default)
+        return reader(name, default)
+
+    def _apply_settings(self):
+        if not self._reloadable:
+            return
+        from django.conf import settings  # pylint: disable=import-outside-toplevel
+
+        for name, (reader, default) in self._reloadable.items():
+            setattr(settings, name, reader(name, default))
+
+
+env = Env(ENV_FILES)
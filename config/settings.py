@@ -11,25 +11,28 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
 from pathlib import Path
-import os
-from dotenv import load_dotenv
+
+from config.env import env
 
 BASE_DIR = Path(__file__).resolve().parent.parent
-load_dotenv(BASE_DIR.parent / ".env")
 
-SECRET_KEY = os.getenv("DJANGO_SECRET_KEY", "change-me")
-DEBUG = os.getenv("DJANGO_DEBUG", "true").lower() == "true"
+# Everything configurable comes from the environment (and the .env files) via
+# config.env. Settings read with env.reloadable() change on SIGHUP without a
+# restart; the rest are fixed for the life of the process.
+
+SECRET_KEY = env.str("DJANGO_SECRET_KEY", "change-me")
+DEBUG = env.bool("DJANGO_DEBUG", True)
 
 ALLOWED_HOSTS = [
     "127.0.0.1",
     "localhost",
-    os.getenv("HOST_FQDN", ""),
+    env.str("HOST_FQDN", ""),
 ]
 
 CSRF_TRUSTED_ORIGINS = [
     origin for origin in [
-        os.getenv("HOST_FQDN", ""),
-        os.getenv("CSRF_TRUSTED_ORIGIN", "")
+        env.str("HOST_FQDN", ""),
+        env.str("CSRF_TRUSTED_ORIGIN", "")
     ] if origin
 ]
 CSRF_TRUSTED_ORIGINS = [
@@ -48,8 +51,12 @@ CSRF_COOKIE_SAMESITE = "None"
 
 # Application definition
 
+# DJANGO_ADMIN=false leaves the admin out: a public-facing worker then never
+# imports it, which shortens worker start-up.
+ADMIN_ENABLED = env.bool("DJANGO_ADMIN", True)
+
 INSTALLED_APPS = [
-    'django.contrib.admin',
+    *(['django.contrib.admin'] if ADMIN_ENABLED else []),
     'django.contrib.auth',
     'django.contrib.contenttypes',
     'django.contrib.sessions',
@@ -59,16 +66,64 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Outermost so its wall time covers the whole stack; removed unless PROFILING.
+    'core.middleware.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    # Compresses whatever the rest of the stack produces, so it sits near the top.
+    'core.middleware.CompressionMiddleware',
+    'core.middleware.ReadYourWritesMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    # Rate limits and concurrency caps; after auth so signed-in users are keyed by id.
+    'core.middleware.AdmissionMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     # Disable X-Frame-Options middleware to allow Flatlogic preview iframes.
     # 'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    # Answers If-None-Match from content versions before the view renders.
+    'core.middleware.VersionETagMiddleware',
 ]
 
+# Request profiling (core.profiling): Server-Timing on every response, and
+# cProfile for a PROFILE_SAMPLE_RATE fraction of requests, kept in PROFILE_DIR
+# when they took PROFILE_SLOW_MS or more. SLOW_QUERY_MS > 0 logs slower SQL
+# with its call site even when PROFILING is off. The rate and thresholds
+# reload on SIGHUP.
+PROFILING = env.bool("PROFILING", False)
+PROFILE_SAMPLE_RATE = env.reloadable("PROFILE_SAMPLE_RATE", float, 0.0)
+PROFILE_SLOW_MS = env.reloadable("PROFILE_SLOW_MS", int, 500)
+PROFILE_DIR = env.str("PROFILE_DIR", "/var/tmp/jimma-profiles")
+SLOW_QUERY_MS = env.reloadable("SLOW_QUERY_MS", float, 200.0)
+
+# Admission control (core.admission). Views are grouped into classes with
+# @admit(name); each class may have a per-client rate ("N/s", "N/m", "N/h")
+# with a burst, kept in ADMISSION_CACHE, and a per-worker concurrency cap.
+# Low-priority classes only get ADMISSION_LOW_PRIORITY_SHARE of the
+# worker's ADMISSION_MAX_IN_FLIGHT, so pages keep serving when AI saturates.
+# ADMISSION_PROXY_COUNT is how many proxies in front append X-Forwarded-For;
+# leave it 0 when clients connect directly, or they can forge their address.
+# Buckets are shared between workers only when CACHE_SHARED.
+ADMISSION_ENABLED = env.bool("ADMISSION_ENABLED", True)
+ADMISSION_CACHE = "default"
+ADMISSION_PROXY_COUNT = env.int("ADMISSION_PROXY_COUNT", 0)
+ADMISSION_MAX_IN_FLIGHT = env.int("ADMISSION_MAX_IN_FLIGHT", 64)
+ADMISSION_LOW_PRIORITY_SHARE = env.float("ADMISSION_LOW_PRIORITY_SHARE", 0.5)
+ADMISSION_CLASSES = {
+    "default": {"rate": env.str("ADMISSION_DEFAULT_RATE", "600/m"), "burst": 200},
+    "assets": {},  # static files and thumbnails: a page loads dozens
+    "search": {"rate": "60/m", "burst": 20, "concurrency": 16},
+    "upload": {"rate": "60/h", "burst": 20, "concurrency": 4, "priority": "low"},
+    "ai": {"rate": env.str("ADMISSION_AI_RATE", "10/m"), "burst": 5, "concurrency": 8, "priority": "low"},
+    # Long-polls hold their slot for up to JOB_STATUS_MAX_WAIT seconds.
+    "ai_status": {"rate": "120/m", "burst": 30, "concurrency": 32, "priority": "low"},
+}
+
+# HTML/JSON responses smaller than this go out uncompressed.
+COMPRESS_MIN_SIZE = env.int("COMPRESS_MIN_SIZE", 1024)
+COMPRESS_GZIP_LEVEL = env.int("COMPRESS_GZIP_LEVEL", 6)
+COMPRESS_BROTLI_QUALITY = env.int("COMPRESS_BROTLI_QUALITY", 5)
+
 X_FRAME_OPTIONS = 'ALLOWALL'
 
 ROOT_URLCONF = 'config.urls'
@@ -83,7 +138,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
-                # IMPORTANT: do not remove – injects PROJECT_DESCRIPTION/PROJECT_IMAGE_URL and cache-busting timestamp
+                # IMPORTANT: do not remove – injects PROJECT_DESCRIPTION/PROJECT_IMAGE_URL
                 'core.context_processors.project_context',
             ],
         },
@@ -96,20 +151,110 @@ WSGI_APPLICATION = 'config.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.mysql',
-        'NAME': os.getenv('DB_NAME', ''),
-        'USER': os.getenv('DB_USER', ''),
-        'PASSWORD': os.getenv('DB_PASS', ''),
-        'HOST': os.getenv('DB_HOST', '127.0.0.1'),
-        'PORT': os.getenv('DB_PORT', '3306'),
+# DB_ENGINE=mysql (default) or sqlite (DB_NAME is then a file path; the local
+# stand-in). DB_POOL_SIZE > 0 switches MySQL to core.db.mysql_pool, which
+# shares up to that many connections between a worker's threads and returns
+# them to the pool after each request. Otherwise connections persist per
+# thread for DB_CONN_MAX_AGE seconds. Use the pool under ASGI, where
+# persistent connections do not apply.
+DB_ENGINE = env.str('DB_ENGINE', 'mysql').lower()
+DB_POOL_SIZE = env.int("DB_POOL_SIZE", 0)
+
+if DB_ENGINE == 'sqlite':
+    _primary = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': env.str('DB_NAME') or BASE_DIR / 'db.sqlite3',
+    }
+else:
+    _primary = {
+        'ENGINE': 'core.db.mysql_pool' if DB_POOL_SIZE else 'django.db.backends.mysql',
+        'NAME': env.str('DB_NAME', ''),
+        'USER': env.str('DB_USER', ''),
+        'PASSWORD': env.str('DB_PASS', ''),
+        'HOST': env.str('DB_HOST', '127.0.0.1'),
+        'PORT': env.str('DB_PORT', '3306'),
         'OPTIONS': {
             'charset': 'utf8mb4',
         },
-    },
+        'POOL': {
+            'SIZE': DB_POOL_SIZE,
+            'TIMEOUT': env.int("DB_POOL_TIMEOUT", 10),
+        },
+    }
+_primary['CONN_MAX_AGE'] = 0 if DB_POOL_SIZE else env.int("DB_CONN_MAX_AGE", 60)
+_primary['CONN_HEALTH_CHECKS'] = True
+
+DATABASES = {
+    'default': _primary,
 }
 
+# Read replicas for catalog and search reads (core.routers.ReplicaRouter):
+# comma-separated host[:port] for MySQL, or file paths for sqlite.
+for _index, _replica in enumerate(env.list('DB_REPLICAS'), start=1):
+    if DB_ENGINE == 'sqlite':
+        _location = {'NAME': _replica}
+    else:
+        _host, _, _port = _replica.partition(':')
+        _location = {'HOST': _host, 'PORT': _port or _primary['PORT']}
+    DATABASES[f'replica{_index}'] = {**_primary, **_location, 'TEST': {'MIRROR': 'default'}}
+
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+# After a write, the writer reads from the primary for this long (replica lag).
+REPLICA_PIN_SECONDS = env.int("DB_REPLICA_PIN_SECONDS", 10)
+
+# Cache
+# CACHE_BACKEND=locmem (default, per process), file (shared between the
+# processes of one host; the local stand-in for Redis) or redis (CACHE_URL).
+CACHE_BACKEND = env.str("CACHE_BACKEND", "locmem").lower()
+if CACHE_BACKEND == "redis":
+    _default_cache = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': env.str("CACHE_URL", "redis://127.0.0.1:6379/1"),
+    }
+elif CACHE_BACKEND == "file":
+    _default_cache = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': env.str("CACHE_LOCATION", "/var/tmp/django_cache"),
+    }
+else:
+    _default_cache = {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'jimma-marketplace',
+    }
+_default_cache.update({
+    'TIMEOUT': env.int("CACHE_TIMEOUT", 300),
+    'KEY_PREFIX': env.str("CACHE_KEY_PREFIX", "jimma"),
+})
+CACHES = {
+    'default': _default_cache,
+}
+# Only a shared cache makes content versions, cached users and rate-limit
+# buckets agree between worker processes.
+CACHE_SHARED = CACHE_BACKEND in ("redis", "file")
+# A version bump only reaches the worker that made it when the cache is
+# per-process, so version-based ETags then also expire after this many seconds.
+CONTENT_ETAG_TTL = None if CACHE_SHARED else env.int("CONTENT_ETAG_TTL", 60)
+
+
+# Sessions and authentication
+# Sessions are read from the cache (the database is the fallback) and only
+# written when their data changed; the session's user is cached too when
+# the cache is shared (CACHE_SHARED).
+SESSION_ENGINE = 'core.sessions'
+AUTHENTICATION_BACKENDS = ['core.auth.CachedModelBackend']
+
+
+# Semantic search
+# Listing embeddings live in memory-mapped files here, kept current by
+# `manage.py update_embeddings`. Past EMBEDDINGS_FLAT_LIMIT rows (and once
+# clusters are trained) a query scans only its EMBEDDINGS_NPROBE nearest clusters
+# (reloads on SIGHUP).
+EMBEDDINGS_DIR = env.str("EMBEDDINGS_DIR", str(BASE_DIR / "var" / "embeddings"))
+EMBEDDINGS_MODEL = env.str("AI_EMBEDDING_MODEL", "text-embedding-3-small")
+EMBEDDINGS_BATCH_SIZE = env.int("EMBEDDINGS_BATCH_SIZE", 128)
+EMBEDDINGS_FLAT_LIMIT = env.int("EMBEDDINGS_FLAT_LIMIT", 200000)
+EMBEDDINGS_NPROBE = env.reloadable("EMBEDDINGS_NPROBE", int, 8)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -155,23 +300,44 @@ STATICFILES_DIRS = [
     BASE_DIR / 'node_modules',
 ]
 
+# collectstatic writes content-hashed copies (app.3f2a9c1b04e7.css) plus .gz/.br
+# siblings; templates resolve names through the manifest via {% static %}.
+STORAGES = {
+    "default": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+    },
+    "staticfiles": {
+        "BACKEND": "core.storage.CompressedManifestStaticFilesStorage",
+    },
+}
+# Let Django serve STATIC_ROOT (with immutable caching) when DEBUG is off and
+# no web server does it.
+SERVE_STATIC = env.bool("DJANGO_SERVE_STATIC", True)
+
+# Uploaded listing photos (see core.media). A front-end server may serve
+# MEDIA_ROOT directly but should pass misses to Django, which renders
+# thumbnails that do not exist yet.
+MEDIA_URL = 'media/'
+MEDIA_ROOT = env.str("MEDIA_ROOT", str(BASE_DIR / 'media'))
+IMAGE_UPLOAD_MAX_BYTES = env.int("IMAGE_UPLOAD_MAX_BYTES", 15 * 2**20)
+IMAGE_MAX_PIXELS = 50_000_000
+THUMBNAIL_WIDTHS = (160, 320, 640, 1024)
+THUMBNAIL_FORMATS = ("webp", "jpg")
+THUMBNAIL_WORKERS = env.int("THUMBNAIL_WORKERS", 2)
+
 # Email
-EMAIL_BACKEND = os.getenv(
+EMAIL_BACKEND = env.str(
     "EMAIL_BACKEND",
     "django.core.mail.backends.smtp.EmailBackend"
 )
-EMAIL_HOST = os.getenv("EMAIL_HOST", "127.0.0.1")
-EMAIL_PORT = int(os.getenv("EMAIL_PORT", "587"))
-EMAIL_HOST_USER = os.getenv("EMAIL_HOST_USER", "")
-EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD", "")
-EMAIL_USE_TLS = os.getenv("EMAIL_USE_TLS", "true").lower() == "true"
-EMAIL_USE_SSL = os.getenv("EMAIL_USE_SSL", "false").lower() == "true"
-DEFAULT_FROM_EMAIL = os.getenv("DEFAULT_FROM_EMAIL", "no-reply@example.com")
-CONTACT_EMAIL_TO = [
-    item.strip()
-    for item in os.getenv("CONTACT_EMAIL_TO", DEFAULT_FROM_EMAIL).split(",")
-    if item.strip()
-]
+EMAIL_HOST = env.str("EMAIL_HOST", "127.0.0.1")
+EMAIL_PORT = env.int("EMAIL_PORT", 587)
+EMAIL_HOST_USER = env.str("EMAIL_HOST_USER", "")
+EMAIL_HOST_PASSWORD = env.str("EMAIL_HOST_PASSWORD", "")
+EMAIL_USE_TLS = env.bool("EMAIL_USE_TLS", True)
+EMAIL_USE_SSL = env.bool("EMAIL_USE_SSL", False)
+DEFAULT_FROM_EMAIL = env.str("DEFAULT_FROM_EMAIL", "no-reply@example.com")
+CONTACT_EMAIL_TO = env.list("CONTACT_EMAIL_TO", [DEFAULT_FROM_EMAIL])
 
 # When both TLS and SSL flags are enabled, prefer SSL explicitly
 if EMAIL_USE_SSL:
@@ -180,3 +346,43 @@ if EMAIL_USE_SSL:
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+
+# Logging
+LOG_LEVEL = env.str("LOG_LEVEL", "INFO").upper()
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'plain': {
+            'format': '%(asctime)s %(levelname)s %(name)s %(message)s',
+        },
+    },
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'plain',
+        },
+    },
+    'root': {
+        'handlers': ['console'],
+        'level': 'WARNING',
+    },
+    'loggers': {
+        'django': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        'core': {
+            'handlers': ['console'],
+            'level': LOG_LEVEL,
+            'propagate': False,
+        },
+        'ai': {
+            'handlers': ['console'],
+            'level': LOG_LEVEL,
+            'propagate': False,
+        },
+    },
+}
@@ -14,16 +14,41 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
-from django.contrib import admin
-from django.urls import include, path
+from django.urls import include, path, re_path
 from django.conf import settings
 from django.conf.urls.static import static
 
+from core.media import serve_media
+from core.static import serve as serve_static
+
+
+def ai_metrics(request):
+    # The AI client is imported on the first scrape, not while a worker starts.
+    from ai.views import metrics  # pylint: disable=import-outside-toplevel
+
+    return metrics(request)
+
+
 urlpatterns = [
-    path("admin/", admin.site.urls),
+    path("metrics/ai", ai_metrics, name="ai-metrics"),
     path("", include("core.urls")),
 ]
 
+if settings.ADMIN_ENABLED:
+    from django.contrib import admin  # pylint: disable=import-outside-toplevel
+
+    urlpatterns.insert(0, path("admin/", admin.site.urls))
+
 if settings.DEBUG:
     urlpatterns += static("/assets/", document_root=settings.BASE_DIR / "assets")
     urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
+elif settings.SERVE_STATIC:
+    # Fallback when no front-end server maps STATIC_URL to STATIC_ROOT itself.
+    urlpatterns += [
+        re_path(rf"^{settings.STATIC_URL.strip('/')}/(?P<path>.+)$", serve_static),
+    ]
+
+# Always routed: a thumbnail missing from MEDIA_ROOT is rendered on request.
+urlpatterns += [
+    re_path(rf"^{settings.MEDIA_URL.strip('/')}/(?P<path>.+)$", serve_media, name="media"),
+]
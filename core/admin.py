@@ -1,3 +1,46 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import AIJob, Category, Listing, ListingImage, Seller
+
+
+@admin.register(Category)
+class CategoryAdmin(admin.ModelAdmin):
+    list_display = ("name", "slug", "parent", "position")
+    prepopulated_fields = {"slug": ("name",)}
+
+
+@admin.register(Seller)
+class SellerAdmin(admin.ModelAdmin):
+    list_display = ("name", "slug", "location", "is_verified", "created_at")
+    list_filter = ("is_verified",)
+    search_fields = ("name", "slug")
+    prepopulated_fields = {"slug": ("name",)}
+    raw_id_fields = ("user",)
+
+
+class ListingImageInline(admin.TabularInline):
+    model = ListingImage
+    fields = ("position", "content_hash", "width", "height", "thumbnails_ready")
+    readonly_fields = ("content_hash", "width", "height", "thumbnails_ready")
+    extra = 0
+
+    def has_add_permission(self, request, obj=None):
+        return False  # photos are added through the upload endpoint, which hashes and thumbnails them
+
+
+@admin.register(Listing)
+class ListingAdmin(admin.ModelAdmin):
+    list_display = ("title", "seller", "category", "price", "currency", "status", "created_at")
+    list_filter = ("status", "category")
+    list_select_related = ("seller", "category")
+    search_fields = ("title",)
+    raw_id_fields = ("seller",)
+    inlines = [ListingImageInline]
+
+
+@admin.register(AIJob)
+class AIJobAdmin(admin.ModelAdmin):
+    list_display = ("uuid", "status", "attempts", "created_at", "finished_at", "locked_by")
+    list_filter = ("status",)
+    search_fields = ("uuid",)
+    readonly_fields = ("uuid", "created_at", "finished_at", "locked_by", "locked_at")
@@ -0,0 +1,196 @@
+"""
+Admission control: per-client rate limits and per-worker concurrency caps.
+
+Views are sorted into admission classes by route cost:
+
+    @admit("ai")
+    def ai_job_create(request): ...
+
+Unmarked views are in ``"default"``.  Each class in ``ADMISSION_CLASSES``
+may set:
+
+    rate          "N/s", "N/m" or "N/h" per client (the user, else the IP)
+    burst         requests a client may make at once (default N)
+    concurrency   requests of the class in flight in one worker
+    priority      "high" (default) or "low"
+
+Rate limits are token buckets kept in the cache (``ADMISSION_CACHE``).  All
+workers share them only when that cache is shared (``CACHE_SHARED``: Redis,
+or the file cache on one host).  Under the default per-process locmem cache
+each worker keeps its own buckets, so a client may get up to the limit
+times the number of workers.  Each bucket is kept as two fixed-window counters:
+the current window and the one before it, each ``burst / rate`` seconds
+long (the time to refill an empty bucket).  A request increments the
+current counter atomically (``cache.incr``) and counts the previous one in
+proportion to how much of it still overlaps the sliding window.  That is
+one increment and one read per request, and no database write.  Over the
+limit the request gets a 429 with ``Retry-After``.  Refused requests count
+too, so a client that keeps hammering stays refused.
+
+Concurrency is counted in-process.  A worker's threads, or its event loop's
+await slots, are what an expensive request holds.  Over a cap the request
+gets a 503 at once rather than waiting in a queue.  Low-priority classes are
+also refused once the worker has ``ADMISSION_LOW_PRIORITY_SHARE`` of
+``ADMISSION_MAX_IN_FLIGHT`` requests in flight.  The rest is kept for
+high-priority ones, so pages keep serving while the AI routes are
+saturated.
+"""
+
+import math
+import threading
+import time
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import JsonResponse
+
+DEFAULT = "default"
+PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def admit(name):
+    """Put a view in admission class ``name`` (see ``ADMISSION_CLASSES``)."""
+
+    def decorator(view):
+        view.admission_class = name
+        return view
+
+    return decorator
+
+
+def parse_rate(rate):
+    """``"10/m"`` -> ``(10, 60)``: requests per period in seconds."""
+    count, _, period = rate.partition("/")
+    try:
+        return int(count), PERIODS[period.strip().lower()[:1]]
+    except (ValueError, KeyError):
+        raise ValueError(f"Invalid admission rate {rate!r}; use N/s, N/m, N/h or N/d.") from None
+
+
+@dataclass(frozen=True)
+class Policy:
+    name: str
+    limit: int = 0  # bucket size (burst); 0: no rate limit
+    window: float = 0.0  # seconds to refill an empty bucket
+    concurrency: int = 0  # per worker; 0: uncapped
+    low_priority: bool = False
+
+    @classmethod
+    def from_settings(cls, name, options):
+        limit, window = 0, 0.0
+        if options.get("rate"):
+            count, period = parse_rate(options["rate"])
+            limit = options.get("burst") or count
+            window = limit * period / count
+        return cls(
+            name=name,
+            limit=limit,
+            window=window,
+            concurrency=options.get("concurrency", 0),
+            low_priority=options.get("priority", "high") == "low",
+        )
+
+
+def load_policies():
+    classes = getattr(settings, "ADMISSION_CLASSES", {})
+    policies = {name: Policy.from_settings(name, options) for name, options in classes.items()}
+    policies.setdefault(DEFAULT, Policy(DEFAULT))
+    return policies
+
+
+def client_id(request, user=None):
+    """
+    ``user:<pk>`` for a signed-in user, else ``ip:<address>``.
+
+    Async callers pass ``user`` from ``await request.auser()``: reading the
+    lazy ``request.user`` on the event loop may query the database.
+    """
+    if user is None:
+        user = getattr(request, "user", None)
+    if user is not None and user.is_authenticated:
+        return f"user:{user.pk}"
+    return f"ip:{client_ip(request)}"
+
+
+def client_ip(request):
+    """
+    The client's address, trusting ``ADMISSION_PROXY_COUNT`` proxies in front.
+
+    Each trusted proxy appends the address it saw to ``X-Forwarded-For``, so
+    the client is that many entries from the right.  Entries further left
+    are whatever the client sent, and are ignored.
+    """
+    proxies = getattr(settings, "ADMISSION_PROXY_COUNT", 0)
+    forwarded = request.META.get("HTTP_X_FORWARDED_FOR")
+    if proxies and forwarded:
+        hops = [hop.strip() for hop in forwarded.split(",") if hop.strip()]
+        if len(hops) >= proxies:
+            return hops[-proxies]
+    return request.META.get("REMOTE_ADDR", "")
+
+
+class RateLimiter:
+    def __init__(self, cache_alias):
+        self.cache = caches[cache_alias]
+
+    def hit(self, policy, client, now=None):
+        """Count a request; ``None`` if it is within the limit, else seconds to wait."""
+        now = time.time() if now is None else now
+        slot, offset = divmod(now, policy.window)
+        key = f"admission:{policy.name}:{client}:{int(slot)}"
+        current = self._incr(key, timeout=math.ceil(policy.window * 2) + 1)
+        previous = self.cache.get(f"admission:{policy.name}:{client}:{int(slot) - 1}", 0)
+        used = current + previous * (1 - offset / policy.window)
+        if used <= policy.limit:
+            return None
+        # Time for the excess to drain at the refill rate.
+        return max(1, math.ceil((used - policy.limit) * policy.window / policy.limit))
+
+    def _incr(self, key, timeout):
+        try:
+            return self.cache.incr(key)
+        except ValueError:  # first request of the window
+            if self.cache.add(key, 1, timeout):
+                return 1
+            return self.cache.incr(key)
+
+
+class Gate:
+    """In-flight requests of this worker, per class and in total."""
+
+    def __init__(self, max_in_flight, low_priority_share):
+        self.max_in_flight = max_in_flight
+        self.low_priority_limit = max(1, int(max_in_flight * low_priority_share)) if max_in_flight else 0
+        self.in_flight = 0
+        self.by_class = {}
+        self._lock = threading.Lock()
+
+    def enter(self, policy):
+        """Take a slot for ``policy``; ``False`` if the worker or the class is full."""
+        with self._lock:
+            limit = self.low_priority_limit if policy.low_priority else self.max_in_flight
+            if limit and self.in_flight >= limit:
+                return False
+            if policy.concurrency and self.by_class.get(policy.name, 0) >= policy.concurrency:
+                return False
+            self.in_flight += 1
+            self.by_class[policy.name] = self.by_class.get(policy.name, 0) + 1
+            return True
+
+    def leave(self, policy):
+        with self._lock:
+            self.in_flight -= 1
+            self.by_class[policy.name] -= 1
+
+
+def rate_limited(retry_after):
+    response = JsonResponse({"error": "rate_limited", "retry_after": retry_after}, status=429)
+    response["Retry-After"] = str(retry_after)
+    return response
+
+
+def overloaded():
+    response = JsonResponse({"error": "overloaded", "retry_after": 1}, status=503)
+    response["Retry-After"] = "1"
+    return response
@@ -0,0 +1,387 @@
+"""
+Materialized catalog aggregates: listing counts, price figures and recent
+activity per category, without a GROUP BY over listings when a page renders.
+
+``CategoryStats`` holds each category's active listing count and its
+min/median/max price.  ``CategoryActivity`` counts the listings created per
+category and day.
+
+``core.signals`` passes each listing's state before and after a save or
+delete to :func:`record_change`:
+
+* Count deltas are applied with ``F()`` updates in the same transaction, so
+  they commit or roll back with the change.  This is how ``core.search``
+  keeps its term counts.
+* The categories whose prices may have moved are collected, and their price
+  figures are recomputed once per transaction after it commits.  That is an
+  aggregate and a median lookup on ``listing_cat_price_idx``.
+
+Templates read :func:`catalog_stats`, a snapshot of the summary tables held
+in process memory.  It is reloaded when the catalog content version changes
+(the signals bump it on commit, after the price refresh queued above) or
+after ``STATS_TTL`` seconds, so rendering the navigation never queries the
+listing table.
+
+Writes that skip signals, such as ``bulk_create`` in ``import_listings`` or
+``QuerySet.update``, and any drift are repaired by
+``manage.py reconcile_aggregates``, which recomputes everything from the
+listings.
+"""
+
+import datetime
+import threading
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from decimal import Decimal
+
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Count, F, Max, Min
+from django.utils import timezone
+
+from .cache import CATALOG, bump_content_version, content_version
+from .models import Category, CategoryActivity, CategoryStats, Listing
+
+ACTIVITY_DAYS = 7
+STATS_TTL = 300
+CENT = Decimal("0.01")
+
+
+# Listing columns behind a ListingState, and the names update_fields may use for them.
+STATE_FIELDS = ("category_id", "status", "created_at", "price")
+STATE_FIELD_NAMES = frozenset(STATE_FIELDS + ("category",))
+
+
+@dataclass(frozen=True)
+class ListingState:
+    """What a listing contributes to the aggregates."""
+
+    category_id: int
+    active: bool
+    day: datetime.date
+    price: Decimal
+
+
+def listing_state(listing):
+    return ListingState(
+        category_id=listing.category_id,
+        active=listing.status == Listing.Status.ACTIVE,
+        day=utc_day(listing.created_at),
+        price=listing.price,
+    )
+
+
+def loaded_state(listing):
+    """The state of ``listing`` as last read or saved, or ``None`` if that is unknown."""
+    values = getattr(listing, "_loaded_values", None)
+    if values is None or any(name not in values for name in STATE_FIELDS):
+        return None
+    return ListingState(
+        values["category_id"], values["status"] == Listing.Status.ACTIVE, utc_day(values["created_at"]), values["price"]
+    )
+
+
+def remember_saved_state(listing, update_fields=None):
+    """After a save: what ``loaded_state`` reports next is what was just written."""
+    if update_fields is None:
+        values = getattr(listing, "_loaded_values", {})
+        listing._loaded_values = {**values, **{name: getattr(listing, name) for name in STATE_FIELDS}}
+    else:
+        listing.__dict__.pop("_loaded_values", None)
+
+
+def touches_state(update_fields):
+    """Whether a save with ``update_fields`` can change what a listing contributes."""
+    return update_fields is None or not STATE_FIELD_NAMES.isdisjoint(update_fields)
+
+
+def stored_state(pk, using=DEFAULT_DB_ALIAS):
+    """The state of listing ``pk`` as saved in the database, or ``None``."""
+    row = (
+        Listing.objects.using(using)
+        .filter(pk=pk)
+        .values_list("category_id", "status", "created_at", "price")
+        .first()
+    )
+    if row is None:
+        return None
+    category_id, status, created_at, price = row
+    return ListingState(category_id, status == Listing.Status.ACTIVE, utc_day(created_at), price)
+
+
+def utc_day(moment):
+    if timezone.is_aware(moment):
+        moment = moment.astimezone(datetime.timezone.utc)
+    return moment.date()
+
+
+def activity_since():
+    return timezone.now().astimezone(datetime.timezone.utc).date() - datetime.timedelta(days=ACTIVITY_DAYS - 1)
+
+
+# Incremental maintenance
+
+def record_change(old, new, using=DEFAULT_DB_ALIAS):
+    """Apply the difference between two ``ListingState`` (either may be ``None``)."""
+    if old == new:
+        return
+    counts, activity = Counter(), Counter()
+    since = activity_since()
+    for state, sign in ((old, -1), (new, 1)):
+        if state is None:
+            continue
+        if state.active:
+            counts[state.category_id] += sign
+        if state.day >= since:
+            activity[(state.category_id, state.day)] += sign
+
+    counts = {category_id: delta for category_id, delta in counts.items() if delta}
+    if counts:
+        CategoryStats.objects.using(using).bulk_create(
+            [CategoryStats(category_id=category_id) for category_id in counts], ignore_conflicts=True
+        )
+        for category_id, delta in counts.items():
+            _shift(CategoryStats.objects.using(using).filter(category_id=category_id), "active_count", delta)
+    activity = {key: delta for key, delta in activity.items() if delta}
+    if activity:
+        CategoryActivity.objects.using(using).bulk_create(
+            [CategoryActivity(category_id=category_id, day=day) for category_id, day in activity],
+            ignore_conflicts=True,
+        )
+        for (category_id, day), delta in activity.items():
+            _shift(
+                CategoryActivity.objects.using(using).filter(category_id=category_id, day=day), "new_listings", delta
+            )
+
+    priced = {state.category_id for state in (old, new) if state is not None and state.active}
+    if priced:
+        _refresh_after_commit(priced, using)
+
+
+def _shift(queryset, column, delta):
+    if delta < 0:
+        queryset = queryset.filter(**{f"{column}__gte": -delta})  # drifted: reconcile repairs it
+    queryset.update(**{column: F(column) + delta})
+
+
+_batches = threading.local()
+
+
+def _refresh_after_commit(category_ids, using):
+    """Queue a price refresh for ``category_ids``, one per transaction however many listings change."""
+    connection = transaction.get_connection(using)
+    if not connection.in_atomic_block:
+        refresh_price_stats(category_ids, using)
+        return
+    batch = getattr(_batches, using, None)
+    # Django replaces run_on_commit after each commit or rollback, so a batch
+    # whose list is still current belongs to this transaction.
+    if batch is not None and batch[0] is connection.run_on_commit:
+        batch[1].update(category_ids)
+        return
+    pending = set(category_ids)
+    transaction.on_commit(lambda: refresh_price_stats(pending, using), using=using)
+    setattr(_batches, using, (connection.run_on_commit, pending))
+
+
+def refresh_price_stats(category_ids, using=DEFAULT_DB_ALIAS):
+    """Recompute min/median/max price of ``category_ids`` from the listings."""
+    category_ids = set(category_ids)
+    if not category_ids:
+        return
+    CategoryStats.objects.using(using).bulk_create(
+        [CategoryStats(category_id=category_id) for category_id in category_ids], ignore_conflicts=True
+    )
+    now = timezone.now()
+    for category_id in category_ids:
+        price_min, price_median, price_max = _price_figures(
+            Listing.objects.using(using).filter(status=Listing.Status.ACTIVE, category_id=category_id)
+        )
+        CategoryStats.objects.using(using).filter(category_id=category_id).update(
+            price_min=price_min, price_median=price_median, price_max=price_max, updated_at=now
+        )
+
+
+def _price_figures(listings):
+    """``(min, median, max)`` price of ``listings``: two queries on the price index."""
+    figures = listings.aggregate(count=Count("id"), low=Min("price"), high=Max("price"))
+    count = figures["count"]
+    if not count:
+        return None, None, None
+    middle = list(listings.order_by("price").values_list("price", flat=True)[(count - 1) // 2:count // 2 + 1])
+    median = (sum(middle) / len(middle)).quantize(CENT)
+    return figures["low"], median, figures["high"]
+
+
+# Reconciliation
+
+def reconcile(using=DEFAULT_DB_ALIAS):
+    """
+    Recompute every aggregate from the listings and repair the tables.
+
+    Returns ``{"categories": n, "fixed_counts": n, "fixed_activity": n}``.
+    """
+    since = activity_since()
+    listings = Listing.objects.using(using)
+    counts = dict(
+        listings.filter(status=Listing.Status.ACTIVE)
+        .order_by()
+        .values_list("category_id")
+        .annotate(count=Count("id"))
+    )
+    activity = Counter()
+    for category_id, created_at in listings.filter(
+        created_at__gte=datetime.datetime.combine(since, datetime.time.min, tzinfo=datetime.timezone.utc)
+    ).values_list("category_id", "created_at").iterator(chunk_size=5000):
+        activity[(category_id, utc_day(created_at))] += 1
+
+    category_ids = list(Category.objects.using(using).values_list("id", flat=True))
+    fixed_counts = fixed_activity = 0
+    with transaction.atomic(using=using):
+        stored = dict(CategoryStats.objects.using(using).values_list("category_id", "active_count"))
+        CategoryStats.objects.using(using).bulk_create(
+            [CategoryStats(category_id=category_id) for category_id in category_ids if category_id not in stored],
+            ignore_conflicts=True,
+        )
+        for category_id in category_ids:
+            if stored.get(category_id, 0) != counts.get(category_id, 0):
+                CategoryStats.objects.using(using).filter(category_id=category_id).update(
+                    active_count=counts.get(category_id, 0)
+                )
+                fixed_counts += 1
+
+        CategoryActivity.objects.using(using).filter(day__lt=since).delete()
+        stored_activity = {
+            (category_id, day): count
+            for category_id, day, count in CategoryActivity.objects.using(using).values_list(
+                "category_id", "day", "new_listings"
+            )
+        }
+        for category_id, day in stored_activity.keys() - activity.keys():
+            CategoryActivity.objects.using(using).filter(category_id=category_id, day=day).delete()
+            fixed_activity += stored_activity[(category_id, day)] > 0  # rows decremented to zero are just tidied
+        for (category_id, day), count in activity.items():
+            if stored_activity.get((category_id, day)) != count:
+                CategoryActivity.objects.using(using).update_or_create(
+                    category_id=category_id, day=day, defaults={"new_listings": count}
+                )
+                fixed_activity += 1
+
+    refresh_price_stats(category_ids, using)
+    bump_content_version(CATALOG)  # no signal fired: reload the snapshots now
+    return {"categories": len(category_ids), "fixed_counts": fixed_counts, "fixed_activity": fixed_activity}
+
+
+# Read cache
+
+@dataclass
+class CategorySummary:
+    id: int
+    name: str
+    slug: str
+    parent_id: int
+    active_count: int = 0
+    price_min: Decimal = None
+    price_median: Decimal = None
+    price_max: Decimal = None
+    new_listings: int = 0  # created in the last ACTIVITY_DAYS days
+
+
+@dataclass
+class CatalogStats:
+    categories: list = field(default_factory=list)  # CategorySummary, in navigation order
+    by_id: dict = field(default_factory=dict)
+    active_total: int = 0
+    new_total: int = 0
+
+    def get(self, category_id):
+        return self.by_id.get(category_id)
+
+
+def build_stats(categories, stats, activity):
+    """``CatalogStats`` from category, ``CategoryStats`` and recent ``CategoryActivity`` rows."""
+    new_listings = defaultdict(int)
+    for category_id, count in activity:
+        new_listings[category_id] += count
+    result = CatalogStats()
+    for category in categories:
+        summary = CategorySummary(category.pk, category.name, category.slug, category.parent_id)
+        row = stats.get(category.pk)
+        if row is not None:
+            summary.active_count = row.active_count
+            summary.price_min, summary.price_median, summary.price_max = row.price_min, row.price_median, row.price_max
+        summary.new_listings = new_listings[category.pk]
+        result.categories.append(summary)
+        result.by_id[category.pk] = summary
+        result.active_total += summary.active_count
+        result.new_total += summary.new_listings
+    return result
+
+
+def _queries():
+    return (
+        Category.objects.only("id", "name", "slug", "parent_id", "position"),
+        CategoryStats.objects.all(),
+        CategoryActivity.objects.filter(day__gte=activity_since()).values_list("category_id", "new_listings"),
+    )
+
+
+class _SharedStats:
+    def __init__(self):
+        self._stats = None
+        self._version = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def current(self, version):
+        if self._version == version and time.monotonic() - self._loaded_at < STATS_TTL:
+            return self._stats
+        return None
+
+    def store(self, stats, version):
+        with self._lock:
+            self._stats, self._version, self._loaded_at = stats, version, time.monotonic()
+        return stats
+
+    def get(self):
+        version = content_version(CATALOG)
+        stats = self.current(version)
+        if stats is None:
+            categories, rows, activity = _queries()
+            stats = self.store(build_stats(categories, {row.pk: row for row in rows}, activity), version)
+        return stats
+
+    async def aget(self):
+        version = content_version(CATALOG)
+        stats = self.current(version)
+        if stats is None:
+            categories, rows, activity = _queries()
+            stats = self.store(
+                build_stats(
+                    [category async for category in categories],
+                    {row.pk: row async for row in rows},
+                    [item async for item in activity],
+                ),
+                version,
+            )
+        return stats
+
+    def reset(self):
+        with self._lock:
+            self._stats = self._version = None
+
+
+_STATS = _SharedStats()
+
+
+def catalog_stats():
+    """Per-category counts and prices for templates, from this process's snapshot."""
+    return _STATS.get()
+
+
+async def acatalog_stats():
+    return await _STATS.aget()
+
+
+def reset_catalog_stats():
+    _STATS.reset()
@@ -1,6 +1,17 @@
 from django.apps import AppConfig
+from django.core.signals import request_started
+
+from config.env import env
 
 
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from . import profiling, signals  # noqa: F401  pylint: disable=import-outside-toplevel,unused-import
+
+        profiling.install()
+        # SIGHUP re-reads the .env files; the reload happens as the next request starts.
+        env.install_signal_handler()
+        request_started.connect(env.refresh, dispatch_uid="config-env-refresh")
@@ -0,0 +1,41 @@
+"""
+Authentication backend that resolves the session's user from the cache.
+
+``AuthenticationMiddleware`` looks the user up on every request that
+touches ``request.user``; with ``CachedModelBackend`` that is a cache hit
+instead of a SELECT.  ``core.signals`` drops the entry whenever the user is
+saved or deleted (password changes, ``last_login`` updates, deactivation).
+
+That invalidation only reaches every worker through a shared cache.  Under a
+per-process cache (``CACHE_SHARED`` is false) a deactivated user or a changed
+password would stay valid on the other workers, so the backend then reads
+the database like ``ModelBackend``.
+"""
+
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+USER_CACHE_SECONDS = 300
+
+
+def _user_key(user_id):
+    return f"auth-user:{user_id}"
+
+
+def forget_user(user_id):
+    cache.delete(_user_key(user_id))
+
+
+class CachedModelBackend(ModelBackend):
+    def get_user(self, user_id):
+        if not settings.CACHE_SHARED:
+            return super().get_user(user_id)
+        key = _user_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is None:
+                return None
+            cache.set(key, user, USER_CACHE_SECONDS)
+        return user if self.user_can_authenticate(user) else None
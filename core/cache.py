@@ -0,0 +1,162 @@
+"""
+Page and fragment caching keyed on content versions.
+
+Cached pages and fragments include the current version of the content they
+show (``content_version("catalog")``).  ``core.signals`` bumps that version
+whenever a listing, category or seller changes, so every dependent entry is
+orphaned at once — no key bookkeeping — and simply expires from the cache.
+
+    @cache_page_per_host(60, "catalog")
+    def listing_list(request): ...
+
+    {% load core_cache %}{% content_version "catalog" as catalog_version %}
+    {% cache 3600 listing_body listing.pk catalog_version %}...{% endcache %}
+
+The same versions give browsers cheap ETags: ``core.middleware.VersionETagMiddleware``
+answers ``If-None-Match`` with 304 for views marked ``@depends_on("catalog")``
+(``cache_page_per_host`` marks its view too) before the view runs.
+"""
+
+import hashlib
+import time
+from functools import lru_cache, wraps
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction
+
+from django.conf import settings
+from django.core.cache import cache
+from django.template.utils import get_app_template_dirs
+from django.utils.cache import get_cache_key, learn_cache_key
+
+from config.env import env
+
+CATALOG = "catalog"
+
+
+def _version_key(namespace):
+    return f"content-version:{namespace}"
+
+
+def content_version(namespace):
+    key = _version_key(namespace)
+    version = cache.get(key)
+    if version is None:
+        # Seed from the clock so a version evicted from the cache never
+        # repeats one that older entries were stored under.
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key, time.time_ns())
+    return version
+
+
+def bump_content_version(namespace):
+    try:
+        cache.incr(_version_key(namespace))
+    except ValueError:
+        content_version(namespace)
+
+
+def depends_on(namespace, ttl=None):
+    """
+    Mark a view as rendering only content from ``namespace``.
+
+    ``ttl`` bounds how long a version-based ETag stays valid for views that
+    also show something time-dependent (the home page clock).
+    """
+
+    def decorator(view):
+        view.content_namespace = namespace
+        view.content_ttl = ttl
+        return view
+
+    return decorator
+
+
+@lru_cache(maxsize=1)
+def release_id():
+    """
+    Identify the deployed templates, so a deploy changes every ETag.
+
+    ``RELEASE_ID`` wins; otherwise the newest template mtime, which all
+    worker processes of one checkout agree on.
+    """
+    configured = env.str("RELEASE_ID")
+    if configured:
+        return configured
+    dirs = [Path(path) for engine in settings.TEMPLATES for path in engine.get("DIRS", [])]
+    dirs += [Path(path) for path in get_app_template_dirs("templates")]
+    newest = max((entry.stat().st_mtime_ns for path in dirs for entry in path.rglob("*") if entry.is_file()), default=0)
+    return str(newest)
+
+
+def version_etag(request, namespace, ttl=None):
+    """Weak ETag for ``request`` rendered from ``namespace``'s current version."""
+    # Under a per-process cache other workers never see a bump: bound the ETag's life.
+    ttl = min(filter(None, (ttl, settings.CONTENT_ETAG_TTL)), default=None)
+    parts = [
+        release_id(),
+        namespace,
+        str(content_version(namespace)),
+        request.build_absolute_uri(),
+        # Pages may differ per visitor; a login rotates the session key.
+        request.COOKIES.get(settings.SESSION_COOKIE_NAME, ""),
+    ]
+    if ttl:
+        parts.append(str(int(time.time() // ttl)))
+    digest = hashlib.blake2b("\n".join(parts).encode(), digest_size=12).hexdigest()
+    return f'W/"{digest}"'
+
+
+def cache_page_per_host(timeout, namespace):
+    """
+    Like ``cache_page`` but keyed on the content version of ``namespace``.
+
+    The key is built from the absolute URL, so each host (and its
+    host-dependent branding) gets its own entry, plus any ``Vary`` headers the
+    response sets.  Only successful GET/HEAD responses without cookies are stored.
+    """
+
+    def decorator(view):
+        if iscoroutinefunction(view):
+
+            @wraps(view)
+            async def wrapped(request, *args, **kwargs):
+                if request.method not in ("GET", "HEAD"):
+                    return await view(request, *args, **kwargs)
+                # Cache reads are sub-millisecond; calling them inline beats a thread hop.
+                key_prefix, cached = _cached_page(request, namespace)
+                if cached is not None:
+                    return cached
+                return _store_page(request, await view(request, *args, **kwargs), timeout, key_prefix)
+
+        else:
+
+            @wraps(view)
+            def wrapped(request, *args, **kwargs):
+                if request.method not in ("GET", "HEAD"):
+                    return view(request, *args, **kwargs)
+                key_prefix, cached = _cached_page(request, namespace)
+                if cached is not None:
+                    return cached
+                return _store_page(request, view(request, *args, **kwargs), timeout, key_prefix)
+
+        return depends_on(namespace)(wrapped)
+
+    return decorator
+
+
+def _cached_page(request, namespace):
+    key_prefix = f"{namespace}.{content_version(namespace)}"
+    key = get_cache_key(request, key_prefix, "GET", cache=cache)
+    return key_prefix, (cache.get(key) if key is not None else None)
+
+
+def _store_page(request, response, timeout, key_prefix):
+    if response.status_code != 200 or response.streaming or response.cookies:
+        return response
+    key = learn_cache_key(request, response, timeout, key_prefix, cache=cache)
+    if hasattr(response, "render") and callable(response.render):
+        response.add_post_render_callback(lambda rendered: cache.set(key, rendered, timeout))
+    else:
+        cache.set(key, response, timeout)
+    return response
@@ -0,0 +1,124 @@
+"""
+MySQL/MariaDB backend that reuses connections from a per-process pool.
+
+Django pools natively only on PostgreSQL, and persistent connections
+(``CONN_MAX_AGE``) are tied to one thread, which does not help ASGI or a
+threaded worker. With ``ENGINE = "core.db.mysql_pool"`` and
+``CONN_MAX_AGE = 0``, each request checks a connection out of a pool of at most
+``POOL["SIZE"]`` and returns it when the request ends:
+
+    "POOL": {"SIZE": 10, "TIMEOUT": 10, "CHECK_AFTER": 30, "RECYCLE": 3600}
+
+A connection that sat idle for more than ``CHECK_AFTER`` seconds is pinged
+before reuse. One older than ``RECYCLE`` seconds is replaced. A checkout
+that waits longer than ``TIMEOUT`` for a free slot raises ``OperationalError``.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+
+from django.db import OperationalError
+from django.db.backends.mysql import base as mysql
+
+Database = mysql.Database
+
+DEFAULT_POOL = {"SIZE": 10, "TIMEOUT": 10, "CHECK_AFTER": 30, "RECYCLE": 3600}
+
+
+class ConnectionPool:
+    def __init__(self, size, timeout, check_after, recycle):
+        self.timeout = timeout
+        self.check_after = check_after
+        self.recycle = recycle
+        self._slots = threading.BoundedSemaphore(size)
+        self._idle = deque()  # (connection, created_at, returned_at); newest on the right
+        self._lock = threading.Lock()
+        self._born = {}
+
+    def acquire(self, connect):
+        if not self._slots.acquire(timeout=self.timeout):
+            raise OperationalError(f"Connection pool exhausted (waited {self.timeout}s).")
+        try:
+            while True:
+                with self._lock:
+                    entry = self._idle.pop() if self._idle else None
+                if entry is None:
+                    connection = connect()
+                    self._born[id(connection)] = time.monotonic()
+                    return connection
+                connection, created_at, returned_at = entry
+                now = time.monotonic()
+                if now - created_at > self.recycle or (now - returned_at > self.check_after and not _ping(connection)):
+                    self._discard(connection)
+                    continue
+                self._born[id(connection)] = created_at
+                return connection
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, connection, reusable=True):
+        created_at = self._born.pop(id(connection), time.monotonic())
+        try:
+            if reusable:
+                with self._lock:
+                    self._idle.append((connection, created_at, time.monotonic()))
+            else:
+                self._discard(connection)
+        finally:
+            self._slots.release()
+
+    def _discard(self, connection):
+        try:
+            connection.close()
+        except Database.Error:
+            pass
+
+
+def _ping(connection):
+    try:
+        connection.ping()
+        return True
+    except Database.Error:
+        return False
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+_pools_pid = os.getpid()
+
+
+def pool_for(alias, settings_dict):
+    global _pools_pid
+    with _pools_lock:
+        if _pools_pid != os.getpid():
+            # Forked worker: the parent's sockets must not be shared.
+            _pools.clear()
+            _pools_pid = os.getpid()
+        pool = _pools.get(alias)
+        if pool is None:
+            config = {**DEFAULT_POOL, **settings_dict.get("POOL", {})}
+            pool = _pools[alias] = ConnectionPool(
+                config["SIZE"], config["TIMEOUT"], config["CHECK_AFTER"], config["RECYCLE"]
+            )
+        return pool
+
+
+class DatabaseWrapper(mysql.DatabaseWrapper):
+    def get_new_connection(self, conn_params):
+        connect = super().get_new_connection
+        return pool_for(self.alias, self.settings_dict).acquire(lambda: connect(conn_params))
+
+    def _close(self):
+        if self.connection is None:
+            return
+        # A connection closed mid-transaction (or after an error) is not handed on.
+        reusable = not self.in_atomic_block and not self.errors_occurred
+        if reusable:
+            try:
+                self.connection.rollback()
+            except Database.Error:
+                reusable = False
+        pool_for(self.alias, self.settings_dict).release(self.connection, reusable)
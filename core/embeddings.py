@@ -0,0 +1,406 @@
+"""
+Embedding index for semantic search and "similar items".
+
+Listing texts are embedded in batches through
+``ai.local_ai_api.create_embeddings`` and stored L2-normalised in a float32
+matrix that is memory-mapped from ``EMBEDDINGS_DIR``, so every process
+shares one copy through the page cache:
+
+    vectors.f32    rows x dim float32
+    ids.i64        listing id per row (-1 once removed)
+    stamps.f64     listing ``updated_at`` each row was embedded from
+    clusters.i32   coarse cluster per row (-1 until trained)
+    centroids.f32  nlist x dim (after ``update_embeddings --train``)
+    meta.json      dim, rows, nlist, model, synced_at
+
+Cosine similarity is one vectorised matrix-vector product.  Catalogs up to
+``EMBEDDINGS_FLAT_LIMIT`` rows are scanned exhaustively.  Past that, and once
+k-means centroids are trained, a query scores only the rows of its
+``EMBEDDINGS_NPROBE`` nearest clusters, so latency follows cluster size
+rather than catalog size.
+
+``update_index`` is incremental: it embeds listings whose ``updated_at`` moved
+past the last sync, overwriting their rows in place or appending new ones,
+and tombstones listings that stopped being active.  Only the
+``update_embeddings`` command writes; web processes reopen the index when
+``meta.json`` changes.
+"""
+
+import fcntl
+import hashlib
+import json
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone as dt_timezone
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+
+from ai.local_ai_api import create_embeddings
+
+from .models import Listing
+
+# Rows updated this close to the last sync are looked at again, in case their
+# transaction committed after it; unchanged rows are skipped by their stamp.
+SYNC_OVERLAP = timedelta(seconds=60)
+QUERY_CACHE_SECONDS = 24 * 3600
+ASSIGN_CHUNK = 65536
+
+
+class EmbeddingError(RuntimeError):
+    pass
+
+
+def _normalize(matrix):
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class EmbeddingIndex:
+    FILES = {
+        "vectors": ("vectors.f32", np.float32),
+        "ids": ("ids.i64", np.int64),
+        "stamps": ("stamps.f64", np.float64),
+        "clusters": ("clusters.i32", np.int32),
+    }
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        with open(self.directory / "meta.json", encoding="utf-8") as handle:
+            self.meta = json.load(handle)
+        self.dim = self.meta["dim"]
+        self.rows = self.meta["rows"]
+        if self.rows:
+            self.vectors = np.memmap(self._path("vectors"), dtype=np.float32, mode="r", shape=(self.rows, self.dim))
+        else:
+            self.vectors = np.empty((0, self.dim), dtype=np.float32)
+        self.ids = self._read("ids")
+        self.stamps = self._read("stamps")
+        self.clusters = self._read("clusters")
+        centroids = self.directory / "centroids.f32"
+        self.centroids = (
+            np.fromfile(centroids, dtype=np.float32).reshape(-1, self.dim)
+            if self.meta.get("nlist") and centroids.exists()
+            else None
+        )
+        self._lists = None
+
+    @classmethod
+    def create(cls, directory, dim, model=""):
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        for filename, dtype in cls.FILES.values():
+            _replace_file(directory / filename, np.empty(0, dtype=dtype))
+        (directory / "centroids.f32").unlink(missing_ok=True)
+        _write_meta(directory, {"dim": dim, "rows": 0, "nlist": 0, "model": model, "synced_at": None})
+        return cls(directory)
+
+    def _path(self, name):
+        return self.directory / self.FILES[name][0]
+
+    def _read(self, name):
+        return np.fromfile(self._path(name), dtype=self.FILES[name][1], count=self.rows)
+
+    # Queries
+
+    def rows_for(self, listing_ids):
+        """``{listing_id: row}`` for the ids present in the index."""
+        rows = np.flatnonzero(np.isin(self.ids, np.asarray(list(listing_ids), dtype=np.int64)))
+        return {int(self.ids[row]): int(row) for row in rows}
+
+    def search(self, query, k=10, exclude=()):
+        """``[(listing_id, score)]`` for the ``k`` rows most similar to ``query``."""
+        if not self.rows:
+            return []
+        query = _normalize(query)
+        rows = self._candidate_rows(query)
+        if rows is None:
+            scores = self.vectors @ query
+            ids = self.ids
+        else:
+            scores = self.vectors[rows] @ query
+            ids = self.ids[rows]
+        scores = np.where(ids < 0, -np.inf, scores)
+        if exclude:
+            scores = np.where(np.isin(ids, list(exclude)), -np.inf, scores)
+        k = min(k, len(scores))
+        if not k:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(ids[i]), float(scores[i])) for i in top if np.isfinite(scores[i])]
+
+    def similar(self, listing_id, k=10):
+        row = self.rows_for([listing_id]).get(listing_id)
+        if row is None:
+            return []
+        return self.search(np.array(self.vectors[row]), k, exclude={listing_id})
+
+    def _candidate_rows(self, query):
+        if self.centroids is None or self.rows <= settings.EMBEDDINGS_FLAT_LIMIT:
+            return None
+        if self._lists is None:
+            order = np.argsort(self.clusters, kind="stable")
+            bounds = np.searchsorted(self.clusters[order], np.arange(len(self.centroids) + 1))
+            unassigned = order[: bounds[0]]  # appended before any training
+            self._lists = (order, bounds, unassigned)
+        order, bounds, unassigned = self._lists
+        nprobe = min(settings.EMBEDDINGS_NPROBE, len(self.centroids))
+        probes = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+        rows = np.concatenate([unassigned] + [order[bounds[c]:bounds[c + 1]] for c in probes])
+        rows.sort()  # sequential reads from the memory map
+        return rows
+
+    # Writes (one writer at a time; see ``writer``)
+
+    def upsert(self, listing_ids, vectors, stamps):
+        vectors = _normalize(vectors)
+        listing_ids = np.asarray(listing_ids, dtype=np.int64)
+        stamps = np.asarray(stamps, dtype=np.float64)
+        clusters = self._assign(vectors)
+        existing = self.rows_for(listing_ids.tolist())
+        in_place = np.array([int(i) in existing for i in listing_ids], dtype=bool)
+
+        if in_place.any():
+            rows = np.array([existing[int(i)] for i in listing_ids[in_place]])
+            self._write_rows("vectors", rows, vectors[in_place], shape=(self.rows, self.dim))
+            self._write_rows("stamps", rows, stamps[in_place])
+            self._write_rows("clusters", rows, clusters[in_place])
+        appended = ~in_place
+        if appended.any():
+            for name, values in (
+                ("vectors", vectors[appended]),
+                ("ids", listing_ids[appended]),
+                ("stamps", stamps[appended]),
+                ("clusters", clusters[appended]),
+            ):
+                with open(self._path(name), "ab") as handle:
+                    handle.write(np.ascontiguousarray(values, dtype=self.FILES[name][1]).tobytes())
+            self.meta["rows"] = self.rows + int(appended.sum())
+        return int(in_place.sum()), int(appended.sum())
+
+    def remove(self, listing_ids):
+        rows = np.array(sorted(self.rows_for(listing_ids).values()), dtype=np.int64)
+        if rows.size:
+            self._write_rows("ids", rows, np.full(rows.size, -1, dtype=np.int64))
+        return int(rows.size)
+
+    def train(self, nlist, iterations=10, sample_size=50000, seed=0):
+        """Spherical k-means on a sample, then assign every row to a cluster."""
+        live = np.flatnonzero(self.ids >= 0)
+        nlist = min(nlist, live.size)
+        if nlist < 2:
+            raise EmbeddingError("Not enough embedded listings to cluster.")
+        rng = np.random.default_rng(seed)
+        sample = np.array(self.vectors[np.sort(rng.choice(live, min(sample_size, live.size), replace=False))])
+        centroids = sample[rng.choice(len(sample), nlist, replace=False)]
+        for _ in range(iterations):
+            assignment = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, sample)
+            empty = np.bincount(assignment, minlength=nlist) == 0
+            sums[empty] = sample[rng.choice(len(sample), int(empty.sum()))]
+            centroids = _normalize(sums)
+        _replace_file(self.directory / "centroids.f32", centroids.astype(np.float32))
+        self.centroids = centroids
+        clusters = np.concatenate([
+            self._assign(np.array(self.vectors[start:start + ASSIGN_CHUNK]))
+            for start in range(0, self.rows, ASSIGN_CHUNK)
+        ]) if self.rows else np.empty(0, dtype=np.int32)
+        _replace_file(self._path("clusters"), clusters.astype(np.int32))
+        self.meta["nlist"] = nlist
+
+    def compact(self):
+        """Rewrite the files without tombstoned rows."""
+        live = np.flatnonzero(self.ids >= 0)
+        for name in self.FILES:
+            data = self.vectors if name == "vectors" else getattr(self, name)
+            _replace_file(self._path(name), np.ascontiguousarray(data[live], dtype=self.FILES[name][1]))
+        removed = self.rows - live.size
+        self.meta["rows"] = int(live.size)
+        return int(removed)
+
+    def save_meta(self, **changes):
+        self.meta.update(changes)
+        _write_meta(self.directory, self.meta)
+
+    def _assign(self, vectors):
+        if self.centroids is None:
+            return np.full(len(vectors), -1, dtype=np.int32)
+        return np.argmax(vectors @ self.centroids.T, axis=1).astype(np.int32)
+
+    def _write_rows(self, name, rows, values, shape=None):
+        dtype = self.FILES[name][1]
+        target = np.memmap(self._path(name), dtype=dtype, mode="r+", shape=shape or (self.rows,))
+        target[rows] = values
+        target.flush()
+        del target
+
+
+def _replace_file(path, array):
+    # A new inode: processes still mapping the old file keep reading it
+    # (truncating in place would crash them with SIGBUS).
+    tmp = path.with_name(path.name + ".tmp")
+    array.tofile(tmp)
+    os.replace(tmp, path)
+
+
+def _write_meta(directory, meta):
+    tmp = Path(directory) / "meta.json.tmp"
+    tmp.write_text(json.dumps(meta), encoding="utf-8")
+    os.replace(tmp, Path(directory) / "meta.json")  # readers see old or new, never half
+
+
+# Process-wide reader
+
+_shared = {"index": None, "mtime": None}
+_shared_lock = threading.Lock()
+
+
+def index_directory():
+    return Path(settings.EMBEDDINGS_DIR)
+
+
+def shared_index():
+    """The current index for this process, or ``None`` before the first sync."""
+    try:
+        mtime = (index_directory() / "meta.json").stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+    with _shared_lock:
+        if _shared["mtime"] != mtime:
+            try:
+                _shared["index"] = EmbeddingIndex(index_directory())
+                _shared["mtime"] = mtime
+            except (OSError, ValueError):
+                pass  # caught between a file swap and its meta.json; keep the last good index
+        return _shared["index"]
+
+
+@contextmanager
+def writer():
+    """Exclusive write access to the index directory (blocks other updaters)."""
+    directory = index_directory()
+    directory.mkdir(parents=True, exist_ok=True)
+    with open(directory / ".lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield directory
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+# Embedding
+
+def listing_text(listing):
+    return "\n".join(filter(None, [listing.title, listing.category.name, listing.description[:1000]]))
+
+
+def embed_texts(texts):
+    vectors = []
+    batch_size = settings.EMBEDDINGS_BATCH_SIZE
+    for start in range(0, len(texts), batch_size):
+        response = create_embeddings(texts[start:start + batch_size])
+        if not response.get("success"):
+            raise EmbeddingError(response.get("message") or response.get("error") or "Embedding request failed.")
+        vectors.extend(response["embeddings"])
+    return np.asarray(vectors, dtype=np.float32)
+
+
+def update_index(full=False, prune=False, log=None):
+    """Bring the index up to date with the catalog; returns counters."""
+    log = log or (lambda message: None)
+    stats = {"embedded": 0, "skipped": 0, "removed": 0}
+    with writer() as directory:
+        index = None if full or not (directory / "meta.json").exists() else EmbeddingIndex(directory)
+        synced_at = index.meta.get("synced_at") if index else None
+        changed = Listing.objects.select_related("category").order_by("updated_at", "pk")
+        if synced_at:
+            changed = changed.filter(updated_at__gte=datetime.fromisoformat(synced_at) - SYNC_OVERLAP)
+        high_water = synced_at
+
+        batch = []
+        for listing in changed.iterator(chunk_size=settings.EMBEDDINGS_BATCH_SIZE * 4):
+            batch.append(listing)
+            if len(batch) >= settings.EMBEDDINGS_BATCH_SIZE * 4:
+                index = _apply(index, directory, batch, stats)
+                batch = []
+            high_water = listing.updated_at.astimezone(dt_timezone.utc).isoformat()
+        if batch:
+            index = _apply(index, directory, batch, stats)
+        if index is None:
+            return stats
+
+        if prune:
+            stats["removed"] += _prune(index)
+        index.save_meta(synced_at=high_water)
+        log(f"Index has {index.meta['rows']} rows ({index.meta.get('nlist') or 'no'} clusters).")
+    return stats
+
+
+def _apply(index, directory, listings, stats):
+    active = [listing for listing in listings if listing.status == Listing.Status.ACTIVE]
+    inactive = [listing.pk for listing in listings if listing.status != Listing.Status.ACTIVE]
+    if index is not None and inactive:
+        stats["removed"] += index.remove(inactive)
+
+    if index is not None and active:
+        known = index.rows_for([listing.pk for listing in active])
+        fresh = [
+            listing for listing in active
+            if listing.pk not in known or index.stamps[known[listing.pk]] != listing.updated_at.timestamp()
+        ]
+        stats["skipped"] += len(active) - len(fresh)
+        active = fresh
+    if not active:
+        return index
+
+    vectors = embed_texts([listing_text(listing) for listing in active])
+    if index is None:
+        index = EmbeddingIndex.create(directory, vectors.shape[1], model=settings.EMBEDDINGS_MODEL)
+    elif vectors.shape[1] != index.dim:
+        raise EmbeddingError(f"Embedding width changed ({index.dim} -> {vectors.shape[1]}); run with --full.")
+    index.upsert([listing.pk for listing in active], vectors, [listing.updated_at.timestamp() for listing in active])
+    stats["embedded"] += len(active)
+    index.save_meta()
+    return EmbeddingIndex(directory)  # re-map to include appended rows
+
+
+def _prune(index):
+    live = index.ids[index.ids >= 0]
+    gone = []
+    for start in range(0, live.size, 5000):
+        chunk = live[start:start + 5000].tolist()
+        active = set(Listing.objects.filter(pk__in=chunk, status=Listing.Status.ACTIVE).values_list("pk", flat=True))
+        gone.extend(pk for pk in chunk if pk not in active)
+    return index.remove(gone) if gone else 0
+
+
+# Lookups used by views
+
+def similar_listing_ids(listing_id, k=6):
+    index = shared_index()
+    return [listing_id for listing_id, _ in index.similar(listing_id, k)] if index else []
+
+
+def semantic_search(query, k=100):
+    """``[(listing_id, score)]`` by meaning; ``[]`` when no index or the AI call fails."""
+    index = shared_index()
+    if index is None or not query:
+        return []
+    key = "embedding:" + hashlib.sha256(f"{index.meta.get('model')}\n{query}".encode("utf-8")).hexdigest()
+    vector = cache.get(key)
+    if vector is None:
+        try:
+            vector = embed_texts([query])[0]
+        except EmbeddingError:
+            return []
+        cache.set(key, vector, QUERY_CACHE_SECONDS)
+    if len(vector) != index.dim:
+        return []
+    return index.search(vector, k)
@@ -0,0 +1,153 @@
+"""
+Database-backed queue for AI requests.
+
+Views call :func:`enqueue` and return the job's UUID straight away; one or
+more ``manage.py ai_worker`` processes claim queued rows with
+``SELECT ... FOR UPDATE SKIP LOCKED`` (so workers never block on, or
+double-run, each other's jobs), send them through the shared AI client and
+store the result.  Clients read it back from the ``ai_job_status`` view,
+optionally long-polling with ``?wait=<seconds>``.
+
+Jobs stuck in ``running`` longer than the worker lease (a crashed worker)
+are claimed again, unless they have used up ``max_attempts``; then they
+fail, so a job that kills its worker every time is not retried forever.
+Transient failures are retried with backoff up to ``max_attempts``.  A
+result is only stored while the worker still holds the job's lease.
+"""
+
+import asyncio
+import time
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import AIJob
+
+TRANSIENT_ERRORS = {"request_failed", "circuit_open", "timeout"}
+
+
+def enqueue(params, options=None, max_attempts=3):
+    """Queue a ``create_response`` call and return the saved :class:`AIJob`."""
+    return AIJob.objects.create(payload=params, options=options or {}, max_attempts=max_attempts)
+
+
+def claim(worker_id, limit=1, lease=600):
+    """
+    Lock up to ``limit`` runnable jobs for ``worker_id`` and mark them running.
+
+    A job is runnable when it is queued and due, or when its previous worker's
+    lease ran out and it has attempts left.
+    """
+    now = timezone.now()
+    expired = Q(status=AIJob.Status.RUNNING, locked_at__lt=now - timedelta(seconds=lease))
+    runnable = Q(status=AIJob.Status.QUEUED, run_after__lte=now) | (expired & Q(attempts__lt=F("max_attempts")))
+    with transaction.atomic():
+        AIJob.objects.filter(expired, attempts__gte=F("max_attempts")).update(
+            status=AIJob.Status.FAILED,
+            error="Worker lease expired on the last attempt.",
+            locked_by="",
+            locked_at=None,
+            finished_at=now,
+        )
+        ids = list(
+            AIJob.objects.select_for_update(skip_locked=True)
+            .filter(runnable)
+            .order_by("run_after", "id")
+            .values_list("id", flat=True)[:limit]
+        )
+        if not ids:
+            return []
+        AIJob.objects.filter(id__in=ids).update(
+            status=AIJob.Status.RUNNING,
+            locked_by=worker_id[:64],
+            locked_at=now,
+            attempts=F("attempts") + 1,
+        )
+    return list(AIJob.objects.filter(id__in=ids).order_by("run_after", "id"))
+
+
+def complete(job, response):
+    """
+    Store the outcome of one attempt; transient failures go back on the queue.
+
+    Returns ``None`` without writing when ``job``'s lease has passed to
+    another worker, whose result is then the one kept.
+    """
+    now = timezone.now()
+    lease = {"locked_by": job.locked_by, "locked_at": job.locked_at}
+    job.locked_by = ""
+    job.locked_at = None
+    if response.get("success"):
+        job.status = AIJob.Status.SUCCEEDED
+        job.result = response
+        job.error = ""
+        job.finished_at = now
+    elif _is_transient(response) and job.attempts < job.max_attempts:
+        job.status = AIJob.Status.QUEUED
+        job.error = _error_text(response)
+        job.run_after = now + timedelta(seconds=retry_delay(job.attempts))
+    else:
+        job.status = AIJob.Status.FAILED
+        job.result = response
+        job.error = _error_text(response)
+        job.finished_at = now
+    fields = ["status", "result", "error", "run_after", "locked_by", "locked_at", "finished_at"]
+    stored = AIJob.objects.filter(pk=job.pk, status=AIJob.Status.RUNNING, **lease).update(
+        **{name: getattr(job, name) for name in fields}
+    )
+    return job if stored else None
+
+
+def retry_delay(attempts):
+    return min(300, 15 * 2 ** max(0, attempts - 1))
+
+
+def wait_for(job, timeout, interval=0.5):
+    """Re-read ``job`` until it finishes or ``timeout`` seconds pass (long-poll)."""
+    deadline = time.monotonic() + max(0.0, timeout)
+    while not job.is_finished and time.monotonic() < deadline:
+        time.sleep(min(interval, max(0.0, deadline - time.monotonic())))
+        job.refresh_from_db(fields=["status", "result", "error", "attempts", "finished_at"])
+    return job
+
+
+async def await_for(job, timeout, interval=0.5):
+    """Async :func:`wait_for`: the long-poll holds no thread while it sleeps."""
+    deadline = time.monotonic() + max(0.0, timeout)
+    while not job.is_finished and time.monotonic() < deadline:
+        await asyncio.sleep(min(interval, max(0.0, deadline - time.monotonic())))
+        await job.arefresh_from_db(fields=["status", "result", "error", "attempts", "finished_at"])
+    return job
+
+
+def job_state(job):
+    """Public JSON representation of a job."""
+    state = {
+        "job_id": str(job.uuid),
+        "status": job.status,
+        "attempts": job.attempts,
+        "created_at": job.created_at.isoformat(),
+    }
+    if job.status == AIJob.Status.SUCCEEDED:
+        state["result"] = job.result
+    elif job.status == AIJob.Status.FAILED:
+        state["error"] = job.error
+    if job.finished_at:
+        state["finished_at"] = job.finished_at.isoformat()
+    return state
+
+
+def _is_transient(response):
+    data = response.get("data")
+    if isinstance(data, dict) and data.get("status") == "failed":
+        return False  # the model run itself failed; retrying would bill it again
+    if response.get("error") in TRANSIENT_ERRORS:
+        return True
+    status = response.get("status")
+    return isinstance(status, int) and (status >= 500 or status == 429)
+
+
+def _error_text(response):
+    return str(response.get("message") or response.get("error") or "AI request failed")[:255]
@@ -0,0 +1,336 @@
+"""
+Bulk listing import and export (``import_listings`` / ``export_listings``).
+
+Both formats carry the same columns, ``FIELDS``.  ``seller`` and
+``category`` are slugs.  ``id`` is optional: a row that has one updates that
+listing, a row without one creates a listing.  An export can therefore be
+edited and imported back.  An update only writes the optional columns
+(``OPTIONAL_FIELDS``) the file or JSON record actually has, so a file of
+prices does not blank the descriptions.
+
+Import runs in three stages, each with bounded memory:
+
+1. :func:`read_chunks` splits the input into chunks of whole records without
+   parsing them.  A CSV record ends at a newline outside quotes, which is
+   the point where the line's quote count turns even.
+2. :func:`parse_chunk` parses and validates a chunk.  The command runs it in
+   a process pool, with at most a few chunks in flight per worker.
+3. :class:`ListingWriter` resolves slugs and writes the valid rows with
+   ``bulk_create`` / ``bulk_update``, one transaction per
+   ``transaction_rows`` rows.
+
+Export pages through the table by primary key, so memory stays flat on
+every backend.  (With MySQL, ``QuerySet.iterator()`` still loads the whole
+result into the client.)
+"""
+
+import csv
+import io
+import json
+from collections import defaultdict
+from decimal import Decimal, InvalidOperation
+
+from django.db import reset_queries, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Category, Listing, Seller
+
+FIELDS = ("id", "seller", "category", "title", "description", "price", "currency", "location", "status", "created_at")
+REQUIRED = ("seller", "category", "title", "price")
+UPDATE_FIELDS = ("seller", "category", "title", "price", "updated_at")  # always written by an update
+OPTIONAL_FIELDS = ("description", "currency", "location", "status")  # written when the row has the column
+STATUSES = frozenset(Listing.Status.values)
+MAX_PRICE = Decimal("9999999999.99")  # max_digits=12, decimal_places=2
+
+_LIMITS = {
+    name: Listing._meta.get_field(name).max_length
+    for name in ("title", "currency", "location")
+}
+
+
+class ListingFileError(ValueError):
+    """Unreadable input (bad header, unknown format); row errors are collected instead."""
+
+
+def detect_format(path, declared=None):
+    if declared:
+        return declared
+    if path.endswith((".jsonl", ".ndjson")):
+        return "jsonl"
+    if path.endswith(".csv"):
+        return "csv"
+    raise ListingFileError("Cannot tell the format from the file name; pass --format.")
+
+
+# Stage 1: split into chunks of whole records
+
+def read_header(stream):
+    """Column names from a CSV's first line; the stream is left at the first record."""
+    header = [name.strip().lower() for name in next(csv.reader([stream.readline()]), [])]
+    unknown = set(header) - set(FIELDS)
+    if unknown:
+        raise ListingFileError(f"Unknown columns: {', '.join(sorted(unknown))}.")
+    missing = set(REQUIRED) - set(header)
+    if missing:
+        raise ListingFileError(f"Missing columns: {', '.join(sorted(missing))}.")
+    return header
+
+
+def read_chunks(stream, fmt, chunk_rows, header=None):
+    """Yield ``(first_line_no, header, text)`` chunks of about ``chunk_rows`` records.
+
+    For CSV, ``header`` comes from :func:`read_header`; for JSONL it is ``None``.
+    """
+    line_no = 1 if fmt == "csv" else 0
+    lines, records, start, open_quote = [], 0, line_no + 1, False
+    for line in stream:
+        line_no += 1
+        lines.append(line)
+        if fmt == "csv" and line.count('"') % 2:
+            open_quote = not open_quote
+        if open_quote:
+            continue
+        records += 1
+        if records >= chunk_rows:
+            yield start, header, "".join(lines)
+            lines, records, start = [], 0, line_no + 1
+    if lines:
+        yield start, header, "".join(lines)
+
+
+# Stage 2: parse and validate (runs in worker processes; no database access)
+
+def parse_chunk(chunk):
+    """
+    ``(rows, errors)``: rows are ``(line_no, values, columns)`` with ``values``
+    in ``FIELDS`` order and ``columns`` the ``OPTIONAL_FIELDS`` the record
+    has; errors are ``(line_no, message)``.
+    """
+    first_line_no, header, text = chunk
+    rows, errors = [], []
+    if header is None:
+        records = _jsonl_records(text, first_line_no, errors)
+    else:
+        records = _csv_records(text, header, first_line_no)
+    for line_no, record in records:
+        try:
+            rows.append((line_no, clean(record), frozenset(name for name in OPTIONAL_FIELDS if name in record)))
+        except ValueError as exc:
+            errors.append((line_no, str(exc)))
+    return rows, errors
+
+
+def _jsonl_records(text, line_no, errors):
+    for offset, line in enumerate(text.splitlines()):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as exc:
+            errors.append((line_no + offset, f"invalid JSON ({exc})"))
+            continue
+        if not isinstance(record, dict):
+            errors.append((line_no + offset, "expected a JSON object"))
+            continue
+        yield line_no + offset, record
+
+
+def _csv_records(text, header, line_no):
+    reader = csv.reader(io.StringIO(text, newline=""))
+    lines_read = 0
+    for values in reader:
+        record_line, lines_read = line_no + lines_read, reader.line_num
+        if values:
+            yield record_line, dict(zip(header, values))
+
+
+def clean(record):
+    """Validate one record; returns a tuple in ``FIELDS`` order or raises ``ValueError``."""
+    def text(name):
+        value = record.get(name)
+        value = "" if value is None else str(value).strip()
+        limit = _LIMITS.get(name)
+        if limit and len(value) > limit:
+            raise ValueError(f"{name} is longer than {limit} characters")
+        return value
+
+    for name in REQUIRED:
+        if record.get(name) in (None, ""):
+            raise ValueError(f"{name} is required")
+
+    listing_id = record.get("id")
+    if listing_id in (None, ""):
+        listing_id = None
+    else:
+        try:
+            listing_id = int(listing_id)
+        except (TypeError, ValueError):
+            raise ValueError(f"id {listing_id!r} is not an integer") from None
+
+    try:
+        price = Decimal(str(record["price"]).strip())
+    except InvalidOperation:
+        raise ValueError(f"price {record['price']!r} is not a number") from None
+    if not price.is_finite() or price < 0 or price > MAX_PRICE:
+        raise ValueError(f"price {record['price']!r} is out of range")
+    price = price.quantize(Decimal("0.01"))
+
+    status = (text("status") or Listing.Status.ACTIVE).lower()
+    if status not in STATUSES:
+        raise ValueError(f"status {status!r} is not one of {', '.join(sorted(STATUSES))}")
+
+    created_at = None
+    if record.get("created_at"):
+        try:
+            created_at = parse_datetime(str(record["created_at"]).strip())
+        except ValueError:
+            pass  # well-formed but impossible, e.g. month 13
+        if created_at is None:
+            raise ValueError(f"created_at {record['created_at']!r} is not an ISO 8601 date-time")
+
+    return (
+        listing_id,
+        text("seller"),
+        text("category"),
+        text("title"),
+        text("description"),
+        price,
+        (text("currency") or "ETB").upper(),
+        text("location"),
+        status,
+        created_at,
+    )
+
+
+# Stage 3: write
+
+class ListingWriter:
+    """Collects cleaned rows and writes them in transactions of ``transaction_rows``."""
+
+    def __init__(self, batch_size=1000, transaction_rows=10000, dry_run=False):
+        self.batch_size = batch_size
+        self.transaction_rows = transaction_rows
+        self.dry_run = dry_run
+        self.pending = []
+        self.errors = []
+        self.created = self.updated = 0
+        self._sellers = {}
+        self._categories = {}
+
+    def add(self, rows):
+        self.pending.extend(rows)
+        if len(self.pending) >= self.transaction_rows:
+            self.flush()
+
+    def flush(self):
+        rows, self.pending = self.pending, []
+        if not rows:
+            return
+        self._resolve(self._sellers, Seller, {row[1] for _, row, _ in rows})
+        self._resolve(self._categories, Category, {row[2] for _, row, _ in rows})
+        existing = set(
+            Listing.objects.filter(pk__in=[row[0] for _, row, _ in rows if row[0] is not None])
+            .values_list("pk", flat=True)
+        )
+
+        now = timezone.now()
+        to_create, to_update = [], defaultdict(list)  # updates grouped by the columns they carry
+        for line_no, row, columns in rows:
+            listing_id, seller, category, *_ = row
+            if seller not in self._sellers:
+                self.errors.append((line_no, f"unknown seller {seller!r}"))
+                continue
+            if category not in self._categories:
+                self.errors.append((line_no, f"unknown category {category!r}"))
+                continue
+            if listing_id is not None and listing_id not in existing:
+                self.errors.append((line_no, f"no listing with id {listing_id}"))
+                continue
+            listing = self._listing(row, now)
+            if listing_id is None:
+                to_create.append(listing)
+            else:
+                to_update[columns].append(listing)
+
+        updated = sum(len(listings) for listings in to_update.values())
+        if self.dry_run:
+            self.created += len(to_create)
+            self.updated += updated
+            return
+        with transaction.atomic():
+            Listing.objects.bulk_create(to_create, batch_size=self.batch_size)
+            for columns, listings in to_update.items():
+                fields = UPDATE_FIELDS + tuple(name for name in OPTIONAL_FIELDS if name in columns)
+                Listing.objects.bulk_update(listings, fields, batch_size=max(1, self.batch_size // 4))
+        reset_queries()  # with DEBUG on, the logged INSERTs would otherwise pile up
+        self.created += len(to_create)
+        self.updated += updated
+
+    def _listing(self, row, now):
+        listing_id, seller, category, title, description, price, currency, location, status, created_at = row
+        listing = Listing(
+            id=listing_id,
+            seller_id=self._sellers[seller],
+            category_id=self._categories[category],
+            title=title,
+            description=description,
+            price=price,
+            currency=currency,
+            location=location,
+            status=status,
+            updated_at=now,
+        )
+        if created_at is not None:
+            listing.created_at = timezone.make_aware(created_at) if timezone.is_naive(created_at) else created_at
+        return listing
+
+    @staticmethod
+    def _resolve(known, model, slugs):
+        missing = [slug for slug in slugs if slug not in known]
+        if missing:
+            known.update(model.objects.filter(slug__in=missing).values_list("slug", "pk"))
+
+
+# Export
+
+EXPORT_COLUMNS = (
+    "id", "seller__slug", "category__slug", "title", "description", "price",
+    "currency", "location", "status", "created_at",
+)
+
+
+def export_rows(queryset, chunk_size=2000):
+    """Yield listing rows in ``FIELDS`` order, ``chunk_size`` rows per query."""
+    queryset = queryset.order_by("pk").values_list(*EXPORT_COLUMNS)
+    last_id = 0
+    while True:
+        chunk = list(queryset.filter(pk__gt=last_id)[:chunk_size])
+        if not chunk:
+            return
+        yield from chunk
+        last_id = chunk[-1][0]
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def export_lines(rows, fmt):
+    """Yield the export file line by line."""
+    if fmt == "csv":
+        writer = csv.writer(_Echo())
+        yield writer.writerow(FIELDS)
+        for row in rows:
+            yield writer.writerow(_export_values(row))
+    else:
+        for row in rows:
+            yield json.dumps(dict(zip(FIELDS, _export_values(row))), ensure_ascii=False) + "\n"
+
+
+def _export_values(row):
+    values = list(row)
+    values[5] = str(values[5])
+    values[9] = values[9].isoformat()
+    return values
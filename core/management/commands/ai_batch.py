@@ -0,0 +1,90 @@
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ai.batch import BatchRunner
+
+
+class Command(BaseCommand):
+    help = (
+        "Run a JSONL file of AI payloads through the proxy with bounded concurrency. "
+        "Each input line is a create_response payload (optionally with a custom_id); "
+        "each output line is {\"key\", \"success\", \"response\"}. Re-running with the "
+        "same output resumes after the last completed item."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("input", help="JSONL file of payloads, or - for stdin.")
+        parser.add_argument("output", help="JSONL file results are appended to.")
+        parser.add_argument("--concurrency", type=int, default=8, help="Requests in flight at once.")
+        parser.add_argument("--rate", type=float, default=None, help="Max submissions per second.")
+        parser.add_argument("--burst", type=float, default=None, help="Token bucket burst size.")
+        parser.add_argument(
+            "--checkpoint",
+            default=None,
+            help="Checkpoint file (default: <output>.ckpt).",
+        )
+        parser.add_argument("--poll-timeout", type=int, default=300)
+        parser.add_argument("--poll-interval", type=int, default=5)
+
+    def handle(self, *args, **options):
+        checkpoint = options["checkpoint"] or f"{options['output']}.ckpt"
+        runner = BatchRunner(
+            concurrency=options["concurrency"],
+            rate=options["rate"],
+            burst=options["burst"],
+            checkpoint_path=checkpoint,
+            options={
+                "poll_timeout": options["poll_timeout"],
+                "poll_interval": options["poll_interval"],
+            },
+        )
+
+        source = sys.stdin if options["input"] == "-" else self._open(options["input"])
+        try:
+            with open(options["output"], "a", encoding="utf-8") as out:
+                for result in runner.run(self._payloads(source)):
+                    success = bool(result["response"].get("success"))
+                    out.write(json.dumps({
+                        "key": result["key"],
+                        "success": success,
+                        "response": result["response"],
+                    }, ensure_ascii=False) + "\n")
+                    out.flush()
+                    runner.mark_done(result["key"], success)  # only once the row is on disk
+                    done = runner.stats["succeeded"] + runner.stats["failed"]
+                    if done % 100 == 0:
+                        self.stderr.write(f"{done} done ({runner.stats['failed']} failed)")
+        finally:
+            if source is not sys.stdin:
+                source.close()
+
+        stats = runner.stats
+        self.stdout.write(self.style.SUCCESS(
+            f"Submitted {stats['submitted']}, succeeded {stats['succeeded']}, "
+            f"failed {stats['failed']}, skipped {stats['skipped']} in {stats['elapsed']}s."
+        ))
+
+    @staticmethod
+    def _open(path):
+        try:
+            return open(path, "r", encoding="utf-8")
+        except OSError as exc:
+            raise CommandError(f"Cannot read {path}: {exc}") from exc
+
+    @staticmethod
+    def _payloads(source):
+        for line_no, line in enumerate(source, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                payload = json.loads(line)
+            except json.JSONDecodeError as exc:
+                raise CommandError(f"Line {line_no}: invalid JSON ({exc})") from exc
+            if not isinstance(payload, dict):
+                raise CommandError(f"Line {line_no}: expected a JSON object")
+            # Default the key to the line number so resume works without custom_id.
+            payload.setdefault("custom_id", str(line_no))
+            yield payload
@@ -0,0 +1,81 @@
+import os
+import signal
+import socket
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, close_old_connections
+
+from ai.local_ai_api import submit_response
+from core.jobs import claim, complete
+
+
+class Command(BaseCommand):
+    help = (
+        "Run queued AI jobs. Claims rows with SELECT ... FOR UPDATE SKIP LOCKED, so any "
+        "number of workers can run side by side; each keeps up to --concurrency "
+        "requests in flight on the shared poll scheduler."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", type=int, default=32, help="AI requests in flight per worker.")
+        parser.add_argument("--idle-sleep", type=float, default=1.0, help="Seconds to wait when the queue is empty.")
+        parser.add_argument(
+            "--lease",
+            type=int,
+            default=600,
+            help="Seconds after which a running job whose worker vanished is claimed again.",
+        )
+        parser.add_argument("--once", action="store_true", help="Exit once the queue is drained.")
+
+    def handle(self, *args, **options):
+        worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        concurrency = max(1, options["concurrency"])
+        self._stopping = False
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+
+        in_flight = {}
+        done_count = 0
+        self.stdout.write(f"AI worker {worker_id} started (concurrency {concurrency}).")
+        while True:
+            free = concurrency - len(in_flight)
+            jobs = []
+            if free and not self._stopping:
+                close_old_connections()
+                try:
+                    jobs = claim(worker_id, limit=free, lease=options["lease"])
+                except DatabaseError as exc:
+                    # Keep in-flight requests alive; the claim is retried next round.
+                    self.stderr.write(f"Claim failed: {exc}")
+                for job in jobs:
+                    in_flight[submit_response(job.payload, job.options)] = job
+
+            if not in_flight:
+                if self._stopping or (options["once"] and not jobs):
+                    break
+                time.sleep(options["idle_sleep"])
+                continue
+
+            finished, _ = wait(list(in_flight), timeout=options["idle_sleep"], return_when=FIRST_COMPLETED)
+            for future in finished:
+                job = in_flight.pop(future)
+                try:
+                    stored = complete(job, future.result())
+                except DatabaseError as exc:
+                    # The row stays "running" and is picked up again once the lease expires.
+                    self.stderr.write(f"Could not store result of job {job.uuid}: {exc}")
+                    continue
+                if stored is None:
+                    self.stderr.write(f"Dropped result of job {job.uuid}: its lease passed to another worker.")
+                    continue
+                done_count += 1
+
+        self.stdout.write(self.style.SUCCESS(f"AI worker {worker_id} stopped after {done_count} job(s)."))
+
+    def _stop(self, signum, frame):
+        if self._stopping:
+            raise KeyboardInterrupt
+        self.stderr.write("Finishing in-flight jobs; signal again to abort.")
+        self._stopping = True
@@ -0,0 +1,63 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.listing_io import ListingFileError, detect_format, export_lines, export_rows
+from core.models import Listing
+
+PROGRESS_EVERY = 100000
+
+
+class Command(BaseCommand):
+    help = "Export listings as CSV or JSONL in the format import_listings reads."
+
+    def add_arguments(self, parser):
+        parser.add_argument("output", help="File to write, or - for stdout.")
+        parser.add_argument("--format", choices=("csv", "jsonl"), default=None)
+        parser.add_argument("--status", action="append", choices=Listing.Status.values,
+                            help="Only listings with this status (repeatable).")
+        parser.add_argument("--seller", default=None, help="Only this seller's listings (slug).")
+        parser.add_argument("--category", default=None, help="Only this category's listings (slug).")
+        parser.add_argument("--chunk-size", type=int, default=5000, help="Rows fetched per query.")
+
+    def handle(self, *args, **options):
+        path = options["output"]
+        try:
+            fmt = detect_format(path, options["format"] or ("csv" if path == "-" else None))
+        except ListingFileError as exc:
+            raise CommandError(str(exc)) from exc
+
+        listings = Listing.objects.all()
+        if options["status"]:
+            listings = listings.filter(status__in=options["status"])
+        if options["seller"]:
+            listings = listings.filter(seller__slug=options["seller"])
+        if options["category"]:
+            listings = listings.filter(category__slug=options["category"])
+
+        out = sys.stdout if path == "-" else self._open(path)
+        rows = 0
+        started = time.perf_counter()
+        try:
+            for line in export_lines(export_rows(listings, max(1, options["chunk_size"])), fmt):
+                out.write(line)
+                rows += 1
+                if rows % PROGRESS_EVERY == 0:
+                    self.stderr.write(f"{rows} rows written ({rows / (time.perf_counter() - started):.0f}/s)")
+        finally:
+            if out is not sys.stdout:
+                out.close()
+        if fmt == "csv":
+            rows -= 1  # header
+        elapsed = time.perf_counter() - started
+        self.stderr.write(self.style.SUCCESS(
+            f"Exported {rows} listings in {elapsed:.1f}s ({rows / elapsed if elapsed else 0:.0f} rows/s)."
+        ))
+
+    @staticmethod
+    def _open(path):
+        try:
+            return open(path, "w", encoding="utf-8", newline="")
+        except OSError as exc:
+            raise CommandError(f"Cannot write {path}: {exc}") from exc
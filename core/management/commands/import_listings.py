@@ -0,0 +1,124 @@
+import multiprocessing
+import os
+import sys
+import threading
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from core.cache import CATALOG, bump_content_version
+from core.listing_io import ListingFileError, ListingWriter, detect_format, parse_chunk, read_chunks, read_header
+
+PROGRESS_EVERY = 50000
+
+
+class Command(BaseCommand):
+    help = (
+        "Import listings from a CSV or JSONL file. Columns: id, seller, category, title, description, "
+        "price, currency, location, status, created_at (seller and category are slugs). Rows with an id "
+        "update that listing; rows without one are created."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("input", help="CSV or JSONL file, or - for stdin (with --format).")
+        parser.add_argument("--format", choices=("csv", "jsonl"), default=None)
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                            help="Processes that parse and validate rows (1 parses in-process).")
+        parser.add_argument("--chunk-rows", type=int, default=5000, help="Rows handed to a worker at a time.")
+        parser.add_argument("--batch-size", type=int, default=1000, help="Rows per INSERT statement.")
+        parser.add_argument("--transaction-rows", type=int, default=20000, help="Rows committed per transaction.")
+        parser.add_argument("--max-errors", type=int, default=100,
+                            help="Stop after this many invalid rows (rows already committed stay).")
+        parser.add_argument("--dry-run", action="store_true", help="Validate only; write nothing.")
+        parser.add_argument("--no-reindex", action="store_true",
+                            help="Skip rebuilding the search index and catalog aggregates afterwards "
+                                 "(run rebuild_search_index and reconcile_aggregates later).")
+
+    def handle(self, *args, **options):
+        path = options["input"]
+        try:
+            fmt = detect_format(path, options["format"])
+        except ListingFileError as exc:
+            raise CommandError(str(exc)) from exc
+        source = sys.stdin if path == "-" else self._open(path)
+        writer = ListingWriter(
+            batch_size=max(1, options["batch_size"]),
+            transaction_rows=max(1, options["transaction_rows"]),
+            dry_run=options["dry_run"],
+        )
+        parse_errors = []
+        rows_read = 0
+        started = time.perf_counter()
+        try:
+            header = read_header(source) if fmt == "csv" else None
+            chunks = read_chunks(source, fmt, max(1, options["chunk_rows"]), header)
+            for rows, errors in self._parse(chunks, options["workers"]):
+                writer.add(rows)
+                parse_errors.extend(errors)
+                before, rows_read = rows_read, rows_read + len(rows) + len(errors)
+                if rows_read // PROGRESS_EVERY > before // PROGRESS_EVERY:
+                    self.stderr.write(f"{rows_read} rows read ({rows_read / (time.perf_counter() - started):.0f}/s)")
+                if len(parse_errors) + len(writer.errors) > options["max_errors"]:
+                    break
+            else:
+                writer.flush()
+        except ListingFileError as exc:
+            raise CommandError(str(exc)) from exc
+        finally:
+            if source is not sys.stdin:
+                source.close()
+        elapsed = time.perf_counter() - started
+
+        errors = sorted(parse_errors + writer.errors)
+        for line_no, message in errors[:options["max_errors"]]:
+            self.stderr.write(f"Line {line_no}: {message}")
+        written = writer.created + writer.updated
+        if written and not options["dry_run"]:
+            bump_content_version(CATALOG)
+            if not options["no_reindex"]:
+                call_command("rebuild_search_index", stdout=self.stderr)
+                call_command("reconcile_aggregates", stdout=self.stderr)
+        summary = (
+            f"{'Validated' if options['dry_run'] else 'Imported'} {written} listings "
+            f"({writer.created} created, {writer.updated} updated), {len(errors)} invalid, "
+            f"in {elapsed:.1f}s ({written / elapsed if elapsed else 0:.0f} rows/s)."
+        )
+        if len(errors) > options["max_errors"]:
+            raise CommandError(f"Stopped after {options['max_errors']} invalid rows. {summary}")
+        self.stdout.write(self.style.SUCCESS(summary))
+
+    @staticmethod
+    def _parse(chunks, workers):
+        if workers <= 1:
+            yield from map(parse_chunk, chunks)
+            return
+        # Workers are forked from this set-up process; they must not share its database sockets.
+        connections.close_all()
+        slots = threading.Semaphore(workers * 2)
+        stopping = False
+
+        def throttled():
+            # Pool.imap drains its input eagerly; this caps the chunks held in memory.
+            for chunk in chunks:
+                slots.acquire()
+                if stopping:
+                    return
+                yield chunk
+
+        with multiprocessing.get_context("fork").Pool(workers) as pool:
+            try:
+                for result in pool.imap(parse_chunk, throttled()):
+                    slots.release()
+                    yield result
+            finally:
+                stopping = True
+                slots.release()  # unblock the feeder so the pool can shut down
+
+    @staticmethod
+    def _open(path):
+        try:
+            return open(path, "r", encoding="utf-8", newline="")
+        except OSError as exc:
+            raise CommandError(f"Cannot read {path}: {exc}") from exc
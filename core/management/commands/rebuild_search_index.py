@@ -0,0 +1,61 @@
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.models import Listing, SearchPosting, SearchTerm
+from core.search import listing_terms, price_bucket, reset_autocomplete
+
+
+class Command(BaseCommand):
+    help = "Rebuild the listing search index (postings and term counts) from scratch."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000, help="Rows per bulk insert.")
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options["batch_size"])
+        listings = (
+            Listing.objects.filter(status=Listing.Status.ACTIVE)
+            .select_related("category")
+            .only("id", "title", "description", "price", "status", "category_id", "category__name")
+        )
+
+        doc_counts = Counter()
+        indexed = postings = 0
+        with transaction.atomic():
+            SearchPosting.objects.all().delete()
+            SearchTerm.objects.all().delete()
+
+            batch = []
+            for listing in listings.iterator(chunk_size=2000):
+                terms = listing_terms(listing)
+                doc_counts.update(terms.keys())
+                bucket = price_bucket(listing.price)
+                batch.extend(
+                    SearchPosting(
+                        term=term,
+                        listing_id=listing.pk,
+                        weight=weight,
+                        category_id=listing.category_id,
+                        price_bucket=bucket,
+                    )
+                    for term, weight in terms.items()
+                )
+                indexed += 1
+                if len(batch) >= batch_size:
+                    SearchPosting.objects.bulk_create(batch)
+                    postings += len(batch)
+                    batch = []
+            SearchPosting.objects.bulk_create(batch)
+            postings += len(batch)
+
+            SearchTerm.objects.bulk_create(
+                (SearchTerm(term=term, doc_count=count) for term, count in doc_counts.items()),
+                batch_size=batch_size,
+            )
+
+        reset_autocomplete()
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {indexed} listings: {postings} postings, {len(doc_counts)} terms."
+        ))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from core.aggregates import reconcile
+
+
+class Command(BaseCommand):
+    help = "Recompute the catalog aggregates (category counts, prices, recent activity) from the listings."
+
+    def handle(self, *args, **options):
+        result = reconcile()
+        self.stdout.write(self.style.SUCCESS(
+            f"Reconciled {result['categories']} categories: {result['fixed_counts']} counts and "
+            f"{result['fixed_activity']} activity rows corrected."
+        ))
@@ -0,0 +1,67 @@
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from core.media import render_thumbnails, thumbnail_targets
+from core.models import ListingImage
+from core.thumbnails import render_all
+
+
+class Command(BaseCommand):
+    help = "Render missing thumbnails for listing images (all of them with --all)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--all", action="store_true", help="Re-render images already marked ready.")
+        parser.add_argument("--workers", type=int, default=settings.THUMBNAIL_WORKERS)
+        parser.add_argument("--batch-size", type=int, default=20, help="Images per worker task.")
+
+    def handle(self, *args, **options):
+        images = ListingImage.objects.order_by("content_hash")
+        if not options["all"]:
+            images = images.filter(thumbnails_ready=False)
+        # One render per distinct photo, however many listings share it.
+        unique = {}
+        for image in images.only("content_hash", "original", "width", "height").iterator(chunk_size=2000):
+            unique.setdefault(image.content_hash, image)
+        pending = list(unique.values())
+        if not pending:
+            self.stdout.write("All thumbnails are ready.")
+            return
+
+        started = time.perf_counter()
+        failed = 0
+        if options["workers"] <= 1:
+            for image in pending:
+                try:
+                    render_thumbnails(image)
+                except OSError as exc:
+                    failed += 1
+                    self.stderr.write(f"{image.content_hash}: {exc}")
+        else:
+            failed = self._render_in_pool(pending, options["workers"], max(1, options["batch_size"]))
+        elapsed = time.perf_counter() - started
+        done = len(pending) - failed
+        self.stdout.write(self.style.SUCCESS(
+            f"Rendered {done} images ({failed} failed) in {elapsed:.1f}s ({done / elapsed if elapsed else 0:.1f} images/s)."
+        ))
+
+    def _render_in_pool(self, images, workers, batch_size):
+        failed = 0
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {}
+            for start in range(0, len(images), batch_size):
+                batch = images[start:start + batch_size]
+                jobs = [(default_storage.path(image.original), thumbnail_targets(image)) for image in batch]
+                futures[pool.submit(render_all, jobs)] = batch
+            for future in as_completed(futures):
+                batch = futures[future]
+                hashes = [image.content_hash for image in batch]
+                if future.exception() is not None:
+                    failed += len(batch)
+                    self.stderr.write(f"{', '.join(hashes)}: {future.exception()}")
+                    continue
+                ListingImage.objects.filter(content_hash__in=hashes).update(thumbnails_ready=True)
+        return failed
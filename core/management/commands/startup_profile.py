@@ -0,0 +1,129 @@
+"""
+How long a fresh worker takes to become ready, and which imports it spends that on.
+
+The measurement runs in a new interpreter started with ``python -X importtime``.
+This process has already imported everything, so it could not measure
+itself.  The child goes through the phases a WSGI worker goes through:
+
+    settings   import DJANGO_SETTINGS_MODULE
+    setup      django.setup(): app registry, models, AppConfig.ready()
+    urls       import the URLconf and every view module it references
+    wsgi       get_wsgi_application(): load the middleware chain
+    request    one GET through the handler (only with --path)
+
+The import times the child writes to stderr are then grouped per top-level
+package.
+"""
+
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+CHILD = r"""
+import json, os, sys, time
+from wsgiref.util import setup_testing_defaults
+
+marks = [("start", time.perf_counter())]
+from django.conf import settings
+settings.INSTALLED_APPS
+marks.append(("settings", time.perf_counter()))
+import django
+django.setup()
+marks.append(("setup", time.perf_counter()))
+from django.urls import get_resolver
+get_resolver().url_patterns
+marks.append(("urls", time.perf_counter()))
+from django.core.wsgi import get_wsgi_application
+application = get_wsgi_application()
+marks.append(("wsgi", time.perf_counter()))
+path = sys.argv[1]
+if path:
+    environ = {"PATH_INFO": path, "REQUEST_METHOD": "GET"}
+    setup_testing_defaults(environ)
+    status = []
+    body = application(environ, lambda line, headers, exc_info=None: status.append(line))
+    b"".join(body)
+    getattr(body, "close", lambda: None)()
+    marks.append(("request", time.perf_counter()))
+phases = {name: round((at - marks[i][1]) * 1000, 1) for i, (name, at) in enumerate(marks[1:])}
+sys.stdout.write(json.dumps({"phases": phases, "status": status[0] if path else None}))
+"""
+
+
+def parse_importtime(stderr):
+    """``[(module, self_us, cumulative_us)]`` from ``-X importtime`` output."""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|", 2)
+        modules.append((name.strip(), int(own), int(cumulative)))
+    return modules
+
+
+class Command(BaseCommand):
+    help = "Time a fresh worker's start-up phase by phase and list the costliest imports."
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument("--path", default="", help="Also time a first GET of this path, e.g. /.")
+        parser.add_argument("--top", type=int, default=15, help="Modules and packages to list (default 15).")
+        parser.add_argument("--budget", type=float, default=None, metavar="SECONDS",
+                            help="Fail if start-up (all phases) takes longer than this.")
+        parser.add_argument("--json", action="store_true", help="Print the report as JSON.")
+
+    def handle(self, *args, **options):
+        environ = {**os.environ, "DJANGO_SETTINGS_MODULE": settings.SETTINGS_MODULE}
+        child = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", CHILD, options["path"]],
+            capture_output=True, text=True, env=environ, cwd=settings.BASE_DIR, check=False,
+        )
+        if child.returncode:
+            errors = [line for line in child.stderr.splitlines() if not line.startswith("import time:")]
+            raise CommandError("Start-up failed in the child process:\n" + "\n".join(errors[-20:]))
+        report = json.loads(child.stdout)
+        modules = parse_importtime(child.stderr)
+
+        packages = defaultdict(int)
+        for name, own, _ in modules:
+            packages[name.split(".")[0]] += own
+        top = options["top"]
+        report["total_ms"] = round(sum(report["phases"].values()), 1)
+        report["import_ms"] = round(sum(own for _, own, _ in modules) / 1000, 1)
+        report["modules_imported"] = len(modules)
+        report["packages"] = {
+            name: round(us / 1000, 1) for name, us in sorted(packages.items(), key=lambda item: -item[1])[:top]
+        }
+        report["modules"] = [
+            {"module": name, "self_ms": round(own / 1000, 1), "cumulative_ms": round(cumulative / 1000, 1)}
+            for name, own, cumulative in sorted(modules, key=lambda module: -module[1])[:top]
+        ]
+
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+        else:
+            self._print(report)
+        if options["budget"] is not None and report["total_ms"] > options["budget"] * 1000:
+            raise CommandError(f"Start-up took {report['total_ms']:.0f} ms, over the {options['budget']:g} s budget.")
+
+    def _print(self, report):
+        self.stdout.write("Phase         ms")
+        for name, ms in report["phases"].items():
+            self.stdout.write(f"{name:<10}{ms:>8.1f}")
+        self.stdout.write(f"{'total':<10}{report['total_ms']:>8.1f}")
+        if report["status"]:
+            self.stdout.write(f"First request: {report['status']}")
+        self.stdout.write(
+            f"\n{report['modules_imported']} modules imported in {report['import_ms']:.1f} ms (self time).\n"
+        )
+        self.stdout.write("Package                        self ms")
+        for name, ms in report["packages"].items():
+            self.stdout.write(f"{name:<30}{ms:>8.1f}")
+        self.stdout.write("\nModule                                        self ms  cumulative ms")
+        for entry in report["modules"]:
+            self.stdout.write(f"{entry['module']:<44}{entry['self_ms']:>9.1f}{entry['cumulative_ms']:>15.1f}")
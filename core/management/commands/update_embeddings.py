@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.embeddings import EmbeddingError, EmbeddingIndex, update_index, writer
+
+
+class Command(BaseCommand):
+    help = "Embed new and changed listings into the semantic search index."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--full", action="store_true", help="Re-embed every listing into a fresh index.")
+        parser.add_argument("--prune", action="store_true", help="Also drop listings deleted since the last sync.")
+        parser.add_argument("--train", type=int, default=0, metavar="N",
+                            help="Cluster the index into N coarse clusters afterwards (about sqrt(rows)).")
+        parser.add_argument("--compact", action="store_true", help="Rewrite the files without removed rows.")
+
+    def handle(self, *args, **options):
+        try:
+            stats = update_index(full=options["full"], prune=options["prune"], log=self.stdout.write)
+            if options["compact"] or options["train"]:
+                with writer() as directory:
+                    if not (directory / "meta.json").exists():
+                        raise CommandError("The index is empty; nothing to compact or train.")
+                    index = EmbeddingIndex(directory)
+                    if options["compact"]:
+                        self.stdout.write(f"Compacted {index.compact()} removed rows.")
+                        index.save_meta()
+                        index = EmbeddingIndex(directory)
+                    if options["train"]:
+                        index.train(options["train"])
+                        index.save_meta()
+                        self.stdout.write(f"Trained {index.meta['nlist']} clusters.")
+        except EmbeddingError as exc:
+            raise CommandError(str(exc)) from exc
+        self.stdout.write(self.style.SUCCESS(
+            f"Embedded {stats['embedded']} listings, {stats['skipped']} unchanged, {stats['removed']} removed."
+        ))
@@ -0,0 +1,228 @@
+"""
+Listing photos: content-addressed storage, background thumbnails, URLs.
+
+An upload is streamed to a temporary file in chunks while it is hashed,
+checked with Pillow and stored once under its SHA-256:
+
+    listings/originals/3f/3f2a…c1.jpg
+    listings/thumbs/3f/3f2a…c1-320.webp     one per THUMBNAIL_WIDTHS x THUMBNAIL_FORMATS
+
+A name never changes meaning, so every media file is served with immutable
+caching.  The same photo uploaded twice is stored once.
+
+Thumbnails are rendered after the upload commits, in a process pool of
+``THUMBNAIL_WORKERS`` spawned processes (see ``core.thumbnails``).  A
+thumbnail requested before it exists, or after it was deleted, is rendered
+on that request by :func:`serve_media`.  ``manage.py render_thumbnails``
+backfills anything the pool did not finish.
+"""
+
+import hashlib
+import logging
+import os
+import re
+import tempfile
+import threading
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.http import Http404
+
+from . import thumbnails
+from .admission import admit
+from .models import ListingImage
+from .static import IMMUTABLE, serve
+
+logger = logging.getLogger(__name__)
+
+ORIGINALS = "listings/originals"
+THUMBS = "listings/thumbs"
+EXTENSIONS = {"JPEG": "jpg", "PNG": "png", "WEBP": "webp"}
+CHUNK_SIZE = 256 * 1024
+THUMB_NAME_RE = re.compile(
+    rf"^{THUMBS}/[0-9a-f]{{2}}/(?P<hash>[0-9a-f]{{64}})-(?P<width>[0-9]+)\.(?P<fmt>{'|'.join(thumbnails.FORMATS)})$"
+)
+
+
+class ImageUploadError(ValueError):
+    pass
+
+
+def original_name(content_hash, extension):
+    return f"{ORIGINALS}/{content_hash[:2]}/{content_hash}.{extension}"
+
+
+def thumbnail_name(content_hash, width, fmt):
+    return f"{THUMBS}/{content_hash[:2]}/{content_hash}-{width}.{fmt}"
+
+
+# Uploads
+
+def store_upload(uploaded):
+    """Store an ``UploadedFile``; returns ``(content_hash, name, width, height)``."""
+    if uploaded.size and uploaded.size > settings.IMAGE_UPLOAD_MAX_BYTES:
+        raise ImageUploadError(f"Images must be smaller than {settings.IMAGE_UPLOAD_MAX_BYTES // 2**20} MB.")
+    digest = hashlib.sha256()
+    with tempfile.TemporaryFile() as tmp:
+        size = 0
+        for chunk in uploaded.chunks(CHUNK_SIZE):
+            size += len(chunk)
+            if size > settings.IMAGE_UPLOAD_MAX_BYTES:
+                raise ImageUploadError(f"Images must be smaller than {settings.IMAGE_UPLOAD_MAX_BYTES // 2**20} MB.")
+            digest.update(chunk)
+            tmp.write(chunk)
+        tmp.seek(0)
+        extension, width, height = _inspect(tmp)
+        content_hash = digest.hexdigest()
+        name = original_name(content_hash, extension)
+        if not default_storage.exists(name):
+            tmp.seek(0)
+            name = default_storage.save(name, File(tmp, name=name))
+    return content_hash, name, width, height
+
+
+def _inspect(handle):
+    from PIL import Image, UnidentifiedImageError  # pylint: disable=import-outside-toplevel
+
+    try:
+        with Image.open(handle) as image:
+            extension = EXTENSIONS.get(image.format)
+            if extension is None:
+                raise ImageUploadError("Upload a JPEG, PNG or WebP image.")
+            if image.size[0] * image.size[1] > settings.IMAGE_MAX_PIXELS:
+                raise ImageUploadError("The image has too many pixels.")
+            width, height = thumbnails.oriented_size(image)
+            image.verify()
+    except (UnidentifiedImageError, OSError, SyntaxError, Image.DecompressionBombError) as exc:
+        raise ImageUploadError("The file is not a readable image.") from exc
+    return extension, width, height
+
+
+@transaction.atomic
+def add_listing_image(listing, uploaded):
+    content_hash, name, width, height = store_upload(uploaded)
+    position = ListingImage.objects.filter(listing=listing).count()
+    image = ListingImage.objects.create(
+        listing=listing, content_hash=content_hash, original=name, width=width, height=height, position=position,
+    )
+    transaction.on_commit(lambda: schedule_thumbnails([image]))
+    return image
+
+
+# Thumbnails
+
+def thumbnail_widths(image):
+    """Configured widths worth offering for ``image``; never wider than the original."""
+    widths = [width for width in settings.THUMBNAIL_WIDTHS if width < image.width]
+    if image.width <= max(settings.THUMBNAIL_WIDTHS):
+        widths.append(image.width)  # a small original is offered at its own size
+    return widths
+
+
+def thumbnail_targets(image, widths=None, formats=None):
+    return [
+        (width, fmt, default_storage.path(thumbnail_name(image.content_hash, width, fmt)))
+        for width in widths or thumbnail_widths(image)
+        for fmt in formats or settings.THUMBNAIL_FORMATS
+    ]
+
+
+def render_thumbnails(image):
+    """Render every thumbnail of ``image`` in this process."""
+    thumbnails.render(default_storage.path(image.original), thumbnail_targets(image))
+    ListingImage.objects.filter(content_hash=image.content_hash).update(thumbnails_ready=True)
+
+
+_executor = None
+_executor_lock = threading.Lock()
+_executor_pid = None
+
+
+def thumbnail_executor():
+    """This process's thumbnail pool, created on first use (and again after a fork)."""
+    global _executor, _executor_pid
+    # Imported here: most workers never render, and multiprocessing is slow to import.
+    import multiprocessing  # pylint: disable=import-outside-toplevel
+    from concurrent.futures import ProcessPoolExecutor  # pylint: disable=import-outside-toplevel
+
+    with _executor_lock:
+        if _executor is None or _executor_pid != os.getpid():
+            # Spawned, not forked: forking a threaded server can copy held locks.
+            _executor = ProcessPoolExecutor(
+                max_workers=settings.THUMBNAIL_WORKERS, mp_context=multiprocessing.get_context("spawn")
+            )
+            _executor_pid = os.getpid()
+        return _executor
+
+
+def schedule_thumbnails(images):
+    """Queue thumbnail rendering in the background pool; failures are logged, not raised."""
+    images = list(images)
+    if not images:
+        return None
+    hashes = [image.content_hash for image in images]
+    jobs = [(default_storage.path(image.original), thumbnail_targets(image)) for image in images]
+    future = thumbnail_executor().submit(thumbnails.render_all, jobs)
+    future.add_done_callback(lambda done: _thumbnails_done(done, hashes))
+    return future
+
+
+def _thumbnails_done(future, hashes):
+    error = future.exception()
+    if error is not None:
+        logger.error("Thumbnail rendering failed for %s: %s", ", ".join(hashes), error)
+        return
+    try:
+        ListingImage.objects.filter(content_hash__in=hashes).update(thumbnails_ready=True)
+    finally:
+        connection.close()  # this callback ran on the pool's management thread
+
+
+# URLs and serving
+
+def thumbnail_url(image, width, fmt):
+    return default_storage.url(thumbnail_name(image.content_hash, width, fmt))
+
+
+def srcset(image, fmt):
+    """``srcset`` value listing each thumbnail width of ``image`` in ``fmt``."""
+    return ", ".join(
+        f"{thumbnail_url(image, width, fmt)} {width}w" for width in thumbnail_widths(image)
+    )
+
+
+@admit("assets")
+def serve_media(request, path):
+    """Serve ``MEDIA_ROOT``, rendering a missing thumbnail on the spot."""
+    match = THUMB_NAME_RE.match(path)
+    if match and not default_storage.exists(path):
+        width = int(match["width"])
+        image = ListingImage.objects.filter(content_hash=match["hash"]).first()
+        if image is None or width not in thumbnail_widths(image):
+            raise Http404("Not found")  # only configured sizes: no resizing on demand for arbitrary widths
+        thumbnails.render(default_storage.path(image.original), thumbnail_targets(image, [width], [match["fmt"]]))
+    response = serve(request, path, document_root=settings.MEDIA_ROOT)
+    response["Cache-Control"] = IMMUTABLE  # every media name is content-addressed
+    return response
+
+
+def attach_covers(listings):
+    """Set ``listing.cover`` to each listing's first image (or ``None``) with one query."""
+    _set_covers(listings, ListingImage.objects.filter(listing_id__in=[listing.pk for listing in listings]))
+    return listings
+
+
+async def aattach_covers(listings):
+    images = ListingImage.objects.filter(listing_id__in=[listing.pk for listing in listings])
+    _set_covers(listings, [image async for image in images])
+    return listings
+
+
+def _set_covers(listings, images):
+    covers = {}
+    for image in images:  # ordered by position
+        covers.setdefault(image.listing_id, image)
+    for listing in listings:
+        listing.cover = covers.get(listing.pk)
@@ -0,0 +1,326 @@
+"""
+Conditional GET, compression, replica stickiness, admission control and profiling.
+
+``VersionETagMiddleware`` gives views marked with ``core.cache.depends_on``
+an ETag built from content version stamps, so a matching ``If-None-Match``
+is answered with 304 before the view (or its template) runs.  The rendered
+body is never hashed.
+
+``CompressionMiddleware`` gzips or brotli-compresses HTML and JSON bodies of
+at least ``COMPRESS_MIN_SIZE`` bytes; ``COMPRESS_GZIP_LEVEL`` and
+``COMPRESS_BROTLI_QUALITY`` trade CPU for bytes.
+
+``ReadYourWritesMiddleware`` keeps a client that just wrote on the primary
+database for ``REPLICA_PIN_SECONDS`` (see ``core.routers``).
+
+``AdmissionMiddleware`` sheds requests over a client's rate limit (429) or
+over the worker's concurrency caps (503) before the view runs (see
+``core.admission``); a streamed response holds its slot until it is closed.
+
+``ProfilingMiddleware`` adds a ``Server-Timing`` header and samples slow
+requests under cProfile when ``PROFILING`` is on (see ``core.profiling``).
+
+All run natively in sync and async stacks, so under ASGI a request reaches
+an async view without a thread hop through them.
+"""
+
+import gzip
+from contextlib import nullcontext
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
+
+from . import admission, profiling
+from .cache import version_etag
+from .routers import pin_primary, replica_aliases
+from .static import accepted_encodings
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+COMPRESSIBLE_TYPES = frozenset({
+    "text/html",
+    "text/plain",
+    "application/json",
+    "application/xml",
+    "text/xml",
+})
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS", "TRACE")
+PIN_COOKIE = "primary_pin"
+
+
+class VersionETagMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+            # The handler would run a sync process_view in a thread.
+            self.process_view = self.aprocess_view
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.add_etag(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.add_etag(request, await self.get_response(request))
+
+    def add_etag(self, request, response):
+        etag = getattr(request, "version_etag", None)
+        if etag and response.status_code == 200 and not response.has_header("ETag"):
+            response["ETag"] = etag
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        return self.not_modified(request, view_func)
+
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        return self.not_modified(request, view_func)
+
+    def not_modified(self, request, view_func):
+        """304 if the client's copy is current, else ``None`` (and remember the ETag)."""
+        namespace = getattr(view_func, "content_namespace", None)
+        if namespace is None or request.method not in ("GET", "HEAD"):
+            return None
+        etag = version_etag(request, namespace, getattr(view_func, "content_ttl", None))
+        request.version_etag = etag
+        if _etag_matches(request.headers.get("If-None-Match"), etag):
+            response = HttpResponseNotModified()
+            response["ETag"] = etag
+            return response
+        return None
+
+
+def _etag_matches(header, etag):
+    if not header:
+        return False
+    candidates = parse_etags(header)
+    if "*" in candidates:
+        return True
+    # If-None-Match uses weak comparison (RFC 9110 13.1.2).
+    target = etag.removeprefix("W/")
+    return any(candidate.removeprefix("W/") == target for candidate in candidates)
+
+
+class CompressionMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.min_size = getattr(settings, "COMPRESS_MIN_SIZE", 1024)
+        self.gzip_level = getattr(settings, "COMPRESS_GZIP_LEVEL", 6)
+        self.brotli_quality = getattr(settings, "COMPRESS_BROTLI_QUALITY", 5)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.compress(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.compress(request, await self.get_response(request))
+
+    def compress(self, request, response):
+        if response.streaming or response.has_header("Content-Encoding"):
+            return response
+        content_type = response.get("Content-Type", "").split(";", 1)[0].strip().lower()
+        if content_type not in COMPRESSIBLE_TYPES or len(response.content) < self.min_size:
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        accepted = accepted_encodings(request.headers.get("Accept-Encoding", ""))
+        if brotli is not None and "br" in accepted:
+            encoding, body = "br", brotli.compress(response.content, quality=self.brotli_quality)
+        elif "gzip" in accepted:
+            encoding, body = "gzip", gzip.compress(response.content, compresslevel=self.gzip_level, mtime=0)
+        else:
+            return response
+        if len(body) >= len(response.content):
+            return response
+
+        response.content = body
+        response["Content-Length"] = str(len(body))
+        response["Content-Encoding"] = encoding
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response["ETag"] = "W/" + etag  # the bytes differ from the identity body
+        return response
+
+
+class ReadYourWritesMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.active = bool(replica_aliases())
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with self.pinning(request):
+            response = self.get_response(request)
+        return self.remember_write(request, response)
+
+    async def __acall__(self, request):
+        with self.pinning(request):
+            response = await self.get_response(request)
+        return self.remember_write(request, response)
+
+    def pinning(self, request):
+        if self.active and (request.method not in SAFE_METHODS or PIN_COOKIE in request.COOKIES):
+            return pin_primary()
+        return nullcontext()
+
+    def remember_write(self, request, response):
+        if self.active and request.method not in SAFE_METHODS:
+            response.set_cookie(
+                PIN_COOKIE,
+                "1",
+                max_age=settings.REPLICA_PIN_SECONDS,
+                secure=settings.SESSION_COOKIE_SECURE,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
+
+
+class AdmissionMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, "ADMISSION_ENABLED", False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.policies = admission.load_policies()
+        self.limiter = admission.RateLimiter(getattr(settings, "ADMISSION_CACHE", "default"))
+        self.gate = admission.Gate(
+            getattr(settings, "ADMISSION_MAX_IN_FLIGHT", 0),
+            getattr(settings, "ADMISSION_LOW_PRIORITY_SHARE", 0.5),
+        )
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+            self.process_view = self.aprocess_view
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        try:
+            response = self.get_response(request)
+        except BaseException:
+            self.release(request)
+            raise
+        return self.hold(request, response)
+
+    async def __acall__(self, request):
+        try:
+            response = await self.get_response(request)
+        except BaseException:
+            self.release(request)
+            raise
+        return self.hold(request, response)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        return self.admit(request, view_func)
+
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        policy = self.policy(view_func)
+        user = await request.auser() if policy.limit and hasattr(request, "auser") else None
+        return self.admit(request, view_func, user)
+
+    def policy(self, view_func):
+        name = getattr(view_func, "admission_class", admission.DEFAULT)
+        return self.policies.get(name) or self.policies[admission.DEFAULT]
+
+    def admit(self, request, view_func, user=None):
+        """``None`` to let the request through, else the 429 or 503 response."""
+        policy = self.policy(view_func)
+        if policy.limit:
+            retry_after = self.limiter.hit(policy, admission.client_id(request, user))
+            if retry_after is not None:
+                return admission.rate_limited(retry_after)
+        if not self.gate.enter(policy):
+            return admission.overloaded()
+        request.admission_policy = policy
+        return None
+
+    def hold(self, request, response):
+        """Release the slot now, or once the server has sent a streaming body."""
+        if response.streaming:
+            # FileResponse / StreamingHttpResponse bodies are produced after
+            # the middleware returns; the server closes the response when done.
+            response._resource_closers.append(lambda: self.release(request))  # pylint: disable=protected-access
+        else:
+            self.release(request)
+        return response
+
+    def release(self, request):
+        policy = getattr(request, "admission_policy", None)
+        if policy is not None:
+            request.admission_policy = None  # exactly once
+            self.gate.leave(policy)
+
+
+class ProfilingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not profiling.enabled():
+            raise MiddlewareNotUsed  # out of the chain entirely: no per-request cost
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        profile, token = profiling.begin()
+        profiler = profiling.start_sampling()
+        try:
+            response = self.get_response(request)
+        finally:
+            profiling.end(profile, token)
+            if profiler is not None:
+                profiling.finish_sampling(profiler, request, profile)
+        return self.report(request, response, profile)
+
+    async def __acall__(self, request):
+        profile, token = profiling.begin()
+        profiler = profiling.start_sampling()
+        try:
+            response = await self.get_response(request)
+        finally:
+            profiling.end(profile, token)
+            if profiler is not None:
+                profiling.finish_sampling(profiler, request, profile)
+        return self.report(request, response, profile)
+
+    def report(self, request, response, profile):
+        response["Server-Timing"] = profile.server_timing()
+        profiling.logger.debug(
+            "%s %s %.1f ms, %d queries (%.1f ms), templates %.1f ms, cache %d/%d hits",
+            request.method,
+            request.path,
+            profile.wall * 1000,
+            profile.queries,
+            profile.sql_time * 1000,
+            profile.template_time * 1000,
+            profile.cache_hits,
+            profile.cache_hits + profile.cache_misses,
+        )
+        return response
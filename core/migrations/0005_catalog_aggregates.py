@@ -0,0 +1,41 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_listing_images'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategoryStats',
+            fields=[
+                ('category', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='core.category')),
+                ('active_count', models.PositiveIntegerField(default=0)),
+                ('price_min', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('price_median', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('price_max', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'category stats',
+            },
+        ),
+        migrations.CreateModel(
+            name='CategoryActivity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('new_listings', models.PositiveIntegerField(default=0)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.category')),
+            ],
+            options={
+                'verbose_name_plural': 'category activity',
+                'constraints': [models.UniqueConstraint(fields=('category', 'day'), name='category_activity_day_uniq')],
+            },
+        ),
+    ]
@@ -1,3 +1,226 @@
+import uuid
+
+from django.conf import settings
 from django.db import models
+from django.urls import reverse
+from django.utils import timezone
+
+
+class Category(models.Model):
+    name = models.CharField(max_length=120)
+    slug = models.SlugField(max_length=120, unique=True)
+    parent = models.ForeignKey("self", null=True, blank=True, on_delete=models.SET_NULL, related_name="children")
+    position = models.PositiveSmallIntegerField(default=0)
+
+    class Meta:
+        ordering = ["position", "name"]
+        verbose_name_plural = "categories"
+
+    def __str__(self):
+        return self.name
+
+    def get_absolute_url(self):
+        return reverse("listing_category", args=[self.slug])
+
+
+class Seller(models.Model):
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL, related_name="seller"
+    )
+    name = models.CharField(max_length=120)
+    slug = models.SlugField(max_length=120, unique=True)
+    phone = models.CharField(max_length=32, blank=True)
+    location = models.CharField(max_length=120, blank=True)
+    is_verified = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.name
+
+    def get_absolute_url(self):
+        return reverse("listing_seller", args=[self.slug])
+
+
+class Listing(models.Model):
+    class Status(models.TextChoices):
+        DRAFT = "draft", "Draft"
+        ACTIVE = "active", "Active"
+        SOLD = "sold", "Sold"
+        ARCHIVED = "archived", "Archived"
+
+    seller = models.ForeignKey(Seller, on_delete=models.CASCADE, related_name="listings")
+    category = models.ForeignKey(Category, on_delete=models.PROTECT, related_name="listings")
+    title = models.CharField(max_length=200)
+    description = models.TextField(blank=True)
+    price = models.DecimalField(max_digits=12, decimal_places=2)
+    currency = models.CharField(max_length=3, default="ETB")
+    location = models.CharField(max_length=120, blank=True)
+    status = models.CharField(max_length=16, choices=Status.choices, default=Status.ACTIVE)
+    created_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        # Each index leads with the equality filters of a browse query and ends
+        # with its sort key plus id, so keyset pages are index range scans.
+        indexes = [
+            models.Index(fields=["status", "-created_at", "-id"], name="listing_recent_idx"),
+            models.Index(fields=["status", "category", "-created_at", "-id"], name="listing_cat_recent_idx"),
+            models.Index(fields=["status", "category", "price", "id"], name="listing_cat_price_idx"),
+            models.Index(fields=["status", "price", "id"], name="listing_price_idx"),
+            models.Index(fields=["seller", "status", "-created_at", "-id"], name="listing_seller_idx"),
+        ]
+
+    def __str__(self):
+        return self.title
+
+    def get_absolute_url(self):
+        return reverse("listing_detail", args=[self.pk])
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # The row as read, so core.signals knows the previous state of a save without a query.
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def refresh_from_db(self, *args, **kwargs):
+        self.__dict__.pop("_loaded_values", None)  # in-memory edits may be kept: no longer the row
+        super().refresh_from_db(*args, **kwargs)
+
+
+class ListingImage(models.Model):
+    """
+    A photo of a listing, stored once under its SHA-256 (see ``core.media``).
+
+    Thumbnails are derived files named after the same hash; ``thumbnails_ready``
+    only records that the background render finished, since a missing
+    thumbnail is rendered on first request anyway.
+    """
+
+    listing = models.ForeignKey(Listing, on_delete=models.CASCADE, related_name="images")
+    content_hash = models.CharField(max_length=64, db_index=True)
+    original = models.CharField(max_length=200)  # storage name of the uploaded file
+    width = models.PositiveIntegerField()
+    height = models.PositiveIntegerField()
+    position = models.PositiveSmallIntegerField(default=0)
+    thumbnails_ready = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["position", "id"]
+        indexes = [
+            models.Index(fields=["listing", "position", "id"], name="listing_image_order_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.content_hash[:12]} ({self.width}x{self.height})"
+
+
+class SearchTerm(models.Model):
+    """Vocabulary of the listing search index with per-term document counts."""
+
+    term = models.CharField(max_length=64, unique=True)
+    doc_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return self.term
+
+
+class SearchPosting(models.Model):
+    """
+    One (term, listing) entry of the inverted index maintained by ``core.search``.
+
+    Category and price bucket are copied in so facet counts come straight from
+    the postings that matched.
+    """
+
+    term = models.CharField(max_length=64)
+    listing = models.ForeignKey(Listing, on_delete=models.CASCADE, related_name="search_postings")
+    weight = models.PositiveSmallIntegerField()
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name="+", db_index=False)
+    price_bucket = models.PositiveSmallIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["term", "listing"], name="search_posting_term_listing_uniq"),
+        ]
+
+    def __str__(self):
+        return f"{self.term} -> {self.listing_id}"
+
+
+class CategoryStats(models.Model):
+    """
+    Materialized aggregates over a category's active listings (see ``core.aggregates``).
+
+    ``active_count`` is kept exact by deltas in the same transaction as the
+    listing change.  The price figures are recomputed from the category's
+    price index after the change commits.
+    """
+
+    category = models.OneToOneField(Category, primary_key=True, on_delete=models.CASCADE, related_name="stats")
+    active_count = models.PositiveIntegerField(default=0)
+    price_min = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    price_median = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    price_max = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "category stats"
+
+    def __str__(self):
+        return f"{self.category_id}: {self.active_count} active"
+
+
+class CategoryActivity(models.Model):
+    """Listings created in a category per day (UTC), for "new this week" counts."""
+
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name="+")
+    day = models.DateField()
+    new_listings = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = "category activity"
+        constraints = [
+            models.UniqueConstraint(fields=["category", "day"], name="category_activity_day_uniq"),
+        ]
+
+    def __str__(self):
+        return f"{self.category_id} {self.day}: {self.new_listings}"
+
+
+class AIJob(models.Model):
+    """An AI request queued by a view and executed by ``manage.py ai_worker``."""
+
+    class Status(models.TextChoices):
+        QUEUED = "queued", "Queued"
+        RUNNING = "running", "Running"
+        SUCCEEDED = "succeeded", "Succeeded"
+        FAILED = "failed", "Failed"
+
+    uuid = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    status = models.CharField(max_length=16, choices=Status.choices, default=Status.QUEUED)
+    payload = models.JSONField()
+    options = models.JSONField(default=dict, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    error = models.CharField(max_length=255, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=64, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Workers scan for claimable rows by status, oldest first.
+            models.Index(fields=["status", "run_after"], name="core_aijob_claim_idx"),
+        ]
+
+    def __str__(self):
+        return f"AIJob {self.uuid} ({self.status})"
 
-# Create your models here.
+    @property
+    def is_finished(self):
+        return self.status in (self.Status.SUCCEEDED, self.Status.FAILED)
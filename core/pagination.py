@@ -0,0 +1,140 @@
+"""
+Keyset (seek) pagination.
+
+``OFFSET 10000`` makes the database read and discard 10 000 rows; a keyset
+page instead continues from the sort key of the last row shown
+(``WHERE (created_at, id) < (:t, :id) ORDER BY created_at DESC, id DESC
+LIMIT n``), which an index on the sort columns answers in the same time on
+page 500 as on page 1.  The ordering must end in a unique column (``id``)
+so the cursor identifies exactly one position.
+
+    page = keyset_paginate(qs, ("-created_at", "-id"), request.GET.get("after"), per_page=24)
+    page.items, page.next_cursor, page.previous_cursor
+"""
+
+import base64
+import json
+from dataclasses import dataclass, field
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+@dataclass
+class KeysetPage:
+    items: list = field(default_factory=list)
+    next_cursor: str = ""
+    previous_cursor: str = ""
+
+    @property
+    def has_next(self):
+        return bool(self.next_cursor)
+
+    @property
+    def has_previous(self):
+        return bool(self.previous_cursor)
+
+
+def keyset_paginate(queryset, ordering, cursor=None, per_page=24, backwards=False):
+    """
+    Return the page after ``cursor`` (or before it when ``backwards``).
+
+    ``ordering`` is a tuple like ``("-created_at", "-id")`` whose columns
+    should be covered by an index together with the queryset's filters.
+    """
+    queryset, fields, values = _seek(queryset, ordering, cursor, per_page, backwards)
+    return _page(list(queryset), fields, values, per_page, backwards)
+
+
+async def akeyset_paginate(queryset, ordering, cursor=None, per_page=24, backwards=False):
+    """Async variant of :func:`keyset_paginate` for async views."""
+    queryset, fields, values = _seek(queryset, ordering, cursor, per_page, backwards)
+    return _page([row async for row in queryset], fields, values, per_page, backwards)
+
+
+def _seek(queryset, ordering, cursor, per_page, backwards):
+    ordering = tuple(ordering)
+    fields = [name.lstrip("-") for name in ordering]
+    values = decode_cursor(queryset.model, fields, cursor) if cursor else None
+
+    if backwards:
+        seek_ordering = tuple(name[1:] if name.startswith("-") else f"-{name}" for name in ordering)
+    else:
+        seek_ordering = ordering
+    if values is not None:
+        queryset = queryset.filter(_seek_filter(seek_ordering, values))
+    return queryset.order_by(*seek_ordering)[: per_page + 1], fields, values
+
+
+def _page(rows, fields, values, per_page, backwards):
+    more = len(rows) > per_page
+    rows = rows[:per_page]
+    if backwards:
+        rows.reverse()
+
+    page = KeysetPage(items=rows)
+    if rows:
+        # Seeking forward, the extra row means there is a next page and a cursor means
+        # there is a previous one; seeking backwards the roles swap.
+        has_next = values is not None if backwards else more
+        has_previous = more if backwards else values is not None
+        if has_next:
+            page.next_cursor = encode_cursor(rows[-1], fields)
+        if has_previous:
+            page.previous_cursor = encode_cursor(rows[0], fields)
+    return page
+
+
+def encode_cursor(obj, fields):
+    values = [_attr(obj, name) for name in fields]
+    blob = json.dumps(values, default=str, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(blob).decode("ascii").rstrip("=")
+
+
+def decode_cursor(model, fields, cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, TypeError) as exc:
+        raise InvalidCursor("Malformed cursor.") from exc
+    if not isinstance(raw, list) or len(raw) != len(fields):
+        raise InvalidCursor("Cursor does not match the ordering.")
+    values = []
+    for name, value in zip(fields, raw):
+        # Only what encode_cursor writes: JSON strings and numbers (booleans are ints to Python).
+        if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+            raise InvalidCursor("Malformed cursor value.")
+        try:
+            values.append(_resolve_field(model, name).to_python(value))
+        except (ValidationError, TypeError, ValueError) as exc:
+            raise InvalidCursor("Malformed cursor value.") from exc
+    return values
+
+
+def _seek_filter(ordering, values):
+    """Row-value comparison ``(a, b, c) > (x, y, z)`` expanded into OR-ed prefixes."""
+    condition = Q()
+    equal_prefix = {}
+    for name, value in zip(ordering, values):
+        column = name.lstrip("-")
+        lookup = "lt" if name.startswith("-") else "gt"
+        condition |= Q(**equal_prefix, **{f"{column}__{lookup}": value})
+        equal_prefix[column] = value
+    return condition
+
+
+def _attr(obj, dotted):
+    for part in dotted.split("__"):
+        obj = getattr(obj, part)
+    return obj
+
+
+def _resolve_field(model, dotted):
+    parts = dotted.split("__")
+    for part in parts[:-1]:
+        model = model._meta.get_field(part).related_model
+    return model._meta.get_field(parts[-1])
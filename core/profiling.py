@@ -0,0 +1,227 @@
+"""
+Per-request profiling: SQL, template and cache time, plus sampled cProfile dumps.
+
+Everything here is opt-in.  With ``PROFILING`` on, :func:`install` (called
+from ``CoreConfig.ready``) hooks the database connections, the template
+backend and the cache backends.  ``core.middleware.ProfilingMiddleware``
+then collects, for each request:
+
+- wall time, query count and total SQL time
+- template render time
+- cache hits and misses
+
+and reports them in a ``Server-Timing`` header.  A ``PROFILE_SAMPLE_RATE``
+fraction of requests also runs under cProfile; a run is written to
+``PROFILE_DIR`` only if the request took at least ``PROFILE_SLOW_MS``.
+
+Independently, any statement slower than ``SLOW_QUERY_MS`` is logged to the
+``core.slow_queries`` logger with the project frame that issued it.
+
+When neither is enabled nothing is hooked.  When they are, a hook outside a
+profiled request costs one context-variable lookup.
+"""
+
+import cProfile
+import logging
+import os
+import random
+import re
+import threading
+import time
+import traceback
+from contextvars import ContextVar
+from dataclasses import dataclass
+from functools import wraps
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+slow_query_logger = logging.getLogger("core.slow_queries")
+
+_current = ContextVar("request_profile", default=None)
+_profiler_lock = threading.Lock()  # cProfile allows one active profiler at a time
+_installed = False
+_MISSING = object()
+
+
+@dataclass
+class RequestProfile:
+    started: float = 0.0
+    wall: float = 0.0
+    queries: int = 0
+    sql_time: float = 0.0
+    template_time: float = 0.0
+    template_depth: int = 0
+    cache_hits: int = 0
+    cache_misses: int = 0
+
+    def server_timing(self):
+        return ", ".join([
+            f"total;dur={self.wall * 1000:.1f}",
+            f'db;dur={self.sql_time * 1000:.1f};desc="{self.queries} queries"',
+            f"tpl;dur={self.template_time * 1000:.1f}",
+            f'cache;desc="{self.cache_hits} hits, {self.cache_misses} misses"',
+        ])
+
+
+def enabled():
+    return getattr(settings, "PROFILING", False)
+
+
+def slow_query_threshold():
+    return getattr(settings, "SLOW_QUERY_MS", 0) / 1000
+
+
+def install():
+    """Hook SQL, templates and caches once per process, if anything needs it."""
+    global _installed
+    if _installed or not (enabled() or slow_query_threshold()):
+        return
+    _installed = True
+    connection_created.connect(_hook_connection)
+    for connection in connections.all(initialized_only=True):
+        _hook_connection(connection=connection)
+    if enabled():
+        _hook_templates()
+        _hook_caches()
+
+
+def begin():
+    profile = RequestProfile(started=time.perf_counter())
+    return profile, _current.set(profile)
+
+
+def end(profile, token):
+    profile.wall = time.perf_counter() - profile.started
+    _current.reset(token)
+
+
+def start_sampling():
+    """A running ``cProfile.Profile`` for this request, or ``None`` if not sampled."""
+    rate = getattr(settings, "PROFILE_SAMPLE_RATE", 0.0)
+    if rate <= 0 or random.random() >= rate or not _profiler_lock.acquire(blocking=False):
+        return None
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:  # another tool is profiling this process
+        _profiler_lock.release()
+        return None
+    return profiler
+
+
+def finish_sampling(profiler, request, profile):
+    profiler.disable()
+    _profiler_lock.release()
+    if profile.wall * 1000 < getattr(settings, "PROFILE_SLOW_MS", 500):
+        return None
+    directory = getattr(settings, "PROFILE_DIR", "/var/tmp/jimma-profiles")
+    os.makedirs(directory, exist_ok=True)
+    slug = re.sub(r"[^A-Za-z0-9]+", "-", request.path).strip("-")[:60] or "root"
+    name = f"{time.strftime('%Y%m%d-%H%M%S')}-{request.method}-{slug}-{profile.wall * 1000:.0f}ms.prof"
+    path = os.path.join(directory, name)
+    profiler.dump_stats(path)
+    logger.info("Profiled slow request %s %s (%.0f ms): %s", request.method, request.path, profile.wall * 1000, path)
+    return path
+
+
+def _hook_connection(sender=None, connection=None, **kwargs):
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+def _record_query(execute, sql, params, many, context):
+    profile = _current.get()
+    threshold = slow_query_threshold()
+    if profile is None and not threshold:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - started
+        if profile is not None:
+            profile.queries += 1
+            profile.sql_time += elapsed
+        if threshold and elapsed >= threshold:
+            slow_query_logger.warning(
+                "Slow query (%.1f ms) on %s at %s: %s",
+                elapsed * 1000,
+                context["connection"].alias,
+                _call_site(),
+                sql,
+            )
+
+
+def _call_site():
+    """Innermost stack frame in project code, outside this module."""
+    base_dir = str(settings.BASE_DIR)
+    for frame in reversed(traceback.extract_stack()[:-2]):
+        filename = frame.filename
+        if filename.startswith(base_dir) and filename != __file__ and "site-packages" not in filename:
+            return f"{os.path.relpath(filename, base_dir)}:{frame.lineno} in {frame.name}"
+    return "unknown"
+
+
+def _hook_templates():
+    from django.template.backends.django import Template  # pylint: disable=import-outside-toplevel
+
+    render = Template.render
+
+    @wraps(render)
+    def timed_render(self, context=None, request=None):
+        profile = _current.get()
+        if profile is None:
+            return render(self, context, request)
+        profile.template_depth += 1
+        started = time.perf_counter()
+        try:
+            return render(self, context, request)
+        finally:
+            profile.template_depth -= 1
+            if not profile.template_depth:  # render_to_string inside a template is counted once
+                profile.template_time += time.perf_counter() - started
+
+    Template.render = timed_render
+
+
+def _hook_caches():
+    backends = {import_string(config["BACKEND"]) for config in settings.CACHES.values()}
+    for backend in backends:
+        _wrap_cache_backend(backend)
+
+
+def _wrap_cache_backend(backend):
+    get = backend.get
+
+    @wraps(get)
+    def counted_get(self, key, default=None, version=None):
+        profile = _current.get()
+        if profile is None:
+            return get(self, key, default, version)
+        value = get(self, key, _MISSING, version)
+        if value is _MISSING:
+            profile.cache_misses += 1
+            return default
+        profile.cache_hits += 1
+        return value
+
+    backend.get = counted_get
+    if "get_many" not in backend.__dict__:
+        return  # BaseCache.get_many goes through get()
+    get_many = backend.get_many
+
+    @wraps(get_many)
+    def counted_get_many(self, keys, version=None):
+        keys = list(keys)
+        found = get_many(self, keys, version=version)
+        profile = _current.get()
+        if profile is not None:
+            profile.cache_hits += len(found)
+            profile.cache_misses += len(keys) - len(found)
+        return found
+
+    backend.get_many = counted_get_many
@@ -0,0 +1,79 @@
+"""
+Read-replica routing with read-your-writes stickiness.
+
+Catalog reads (listings and their images, categories, sellers, the search
+index and the catalog aggregates) go to a random replica — any ``DATABASES``
+entry whose ``TEST["MIRROR"]`` is ``"default"``.  Everything else, all writes and every read inside a
+transaction on the primary stay on ``default``.
+
+A user who just wrote would otherwise read their own change back from a
+lagging replica.  ``core.middleware.ReadYourWritesMiddleware`` therefore pins
+the rest of a POST (or other unsafe) request, and that client's requests for
+the next ``REPLICA_PIN_SECONDS``, to the primary through :func:`pin_primary`.
+"""
+
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+REPLICA_MODELS = frozenset({
+    "core.category",
+    "core.seller",
+    "core.listing",
+    "core.listingimage",
+    "core.searchterm",
+    "core.searchposting",
+    "core.categorystats",
+    "core.categoryactivity",
+})
+
+_pinned = ContextVar("pinned_to_primary", default=False)
+
+
+def replica_aliases():
+    return [
+        alias
+        for alias, config in settings.DATABASES.items()
+        if alias != DEFAULT_DB_ALIAS and config.get("TEST", {}).get("MIRROR") == DEFAULT_DB_ALIAS
+    ]
+
+
+@contextmanager
+def pin_primary():
+    """Send every read in this block (and its async/sync hops) to the primary."""
+    token = _pinned.set(True)
+    try:
+        yield
+    finally:
+        _pinned.reset(token)
+
+
+def is_pinned():
+    return _pinned.get()
+
+
+class ReplicaRouter:
+    def __init__(self):
+        self.replicas = replica_aliases()
+
+    def db_for_read(self, model, **hints):
+        if not self.replicas or model._meta.label_lower not in REPLICA_MODELS or _pinned.get():
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS  # read-modify-write must see the primary's rows
+        return random.choice(self.replicas)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *self.replicas}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
@@ -0,0 +1,274 @@
+"""
+Listing search: an inverted index kept in the database plus an in-memory trie.
+
+Every active listing is tokenized (title, category name, description, with
+title words weighted highest) into ``SearchPosting`` rows — one per
+(term, listing) — and ``SearchTerm`` keeps each term's document count.
+Signals in ``core.signals`` keep both up to date on save/delete;
+``manage.py rebuild_search_index`` rebuilds them in bulk.
+
+A query reads only the postings of its own terms, rarest term first, each
+later term restricted in SQL to the listings carrying the earlier ones (AND
+semantics). Matches are ranked with BM25-style term saturation and IDF, and
+the category / price-bucket facet counts are tallied from the same postings,
+so no query scans or GROUP BYs the listing table.
+
+Autocomplete is answered from a trie of the vocabulary held in process
+memory; it is loaded from ``SearchTerm`` on first use, patched as this
+process indexes listings, and reloaded every ``TRIE_TTL`` seconds to pick up
+other processes' changes.
+"""
+
+import math
+import re
+import threading
+import time
+from bisect import bisect_right
+from collections import Counter
+from dataclasses import dataclass, field
+
+from django.db import transaction
+from django.db.models import F
+
+from .aggregates import catalog_stats
+from .models import Listing, SearchPosting, SearchTerm
+
+TOKEN_RE = re.compile(r"\w+")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from in is it of on or the to with".split()
+)
+FIELD_WEIGHTS = (("title", 3), ("category", 2), ("description", 1))
+MAX_TERM_LENGTH = 64
+
+# Lower bounds (ETB) of the price facet buckets.
+PRICE_BUCKETS = (0, 100, 500, 1000, 5000, 10000, 50000)
+
+BM25_K1 = 1.2
+MAX_RESULTS = 1000
+TRIE_TTL = 300
+
+
+def tokenize(text):
+    tokens = []
+    for token in TOKEN_RE.findall((text or "").lower()):
+        if len(token) > 1 and token not in STOPWORDS:
+            tokens.append(token[:MAX_TERM_LENGTH])
+    return tokens
+
+
+def price_bucket(price):
+    return max(0, bisect_right(PRICE_BUCKETS, price) - 1)
+
+
+def price_bucket_label(bucket):
+    low = PRICE_BUCKETS[bucket]
+    if bucket + 1 < len(PRICE_BUCKETS):
+        return f"{low:,}–{PRICE_BUCKETS[bucket + 1]:,}"
+    return f"{low:,}+"
+
+
+def listing_terms(listing):
+    """Weighted term frequencies for one listing."""
+    counts = Counter()
+    for attr, weight in FIELD_WEIGHTS:
+        text = listing.category.name if attr == "category" else getattr(listing, attr)
+        for token in tokenize(text):
+            counts[token] += weight
+    return {term: min(count, 32767) for term, count in counts.items()}
+
+
+def index_listing(listing):
+    """Replace one listing's postings; inactive listings are dropped from the index."""
+    terms = listing_terms(listing) if listing.status == Listing.Status.ACTIVE else {}
+    bucket = price_bucket(listing.price)
+    with transaction.atomic():
+        postings = SearchPosting.objects.filter(listing_id=listing.pk)
+        old_terms = set(postings.values_list("term", flat=True))
+        postings.delete()
+        SearchPosting.objects.bulk_create([
+            SearchPosting(
+                term=term,
+                listing_id=listing.pk,
+                weight=weight,
+                category_id=listing.category_id,
+                price_bucket=bucket,
+            )
+            for term, weight in terms.items()
+        ])
+        _adjust_doc_counts(set(terms) - old_terms, old_terms - set(terms))
+
+
+def remove_listing(listing_id):
+    with transaction.atomic():
+        postings = SearchPosting.objects.filter(listing_id=listing_id)
+        old_terms = set(postings.values_list("term", flat=True))
+        postings.delete()
+        _adjust_doc_counts(set(), old_terms)
+
+
+def _adjust_doc_counts(added, removed):
+    if added:
+        # Create missing rows at zero first so concurrent writers both increment.
+        SearchTerm.objects.bulk_create([SearchTerm(term=term) for term in added], ignore_conflicts=True)
+        SearchTerm.objects.filter(term__in=added).update(doc_count=F("doc_count") + 1)
+    if removed:
+        SearchTerm.objects.filter(term__in=removed, doc_count__gt=0).update(doc_count=F("doc_count") - 1)
+    if added or removed:
+        transaction.on_commit(lambda: _TRIE.patch(added, removed))
+
+
+@dataclass
+class SearchResults:
+    query: str
+    total: int = 0
+    hits: list = field(default_factory=list)  # [(listing_id, score)], best first
+    category_counts: list = field(default_factory=list)  # [(category_id, count)]
+    price_counts: list = field(default_factory=list)  # [(bucket, count)]
+
+
+def search(query, category_id=None, bucket=None, limit=MAX_RESULTS):
+    """Rank active listings matching every term of ``query``; facets ignore the filters."""
+    results = SearchResults(query=query)
+    terms = list(dict.fromkeys(tokenize(query)))
+    if not terms:
+        return results
+    doc_counts = dict(SearchTerm.objects.filter(term__in=terms, doc_count__gt=0).values_list("term", "doc_count"))
+    if len(doc_counts) < len(terms):
+        return results
+
+    total_docs = max(_active_listing_count(), *doc_counts.values())  # counts may lag the postings
+    matches = None  # listing_id -> (score, category_id, bucket)
+    postings = SearchPosting.objects.all()
+    for term in sorted(terms, key=doc_counts.__getitem__):
+        df = doc_counts[term]
+        idf = math.log(1 + (total_docs - df + 0.5) / (df + 0.5))
+        narrowed = {}
+        for listing_id, weight, category, price in postings.filter(term=term).values_list(
+            "listing_id", "weight", "category_id", "price_bucket"
+        ):
+            if matches is not None and listing_id not in matches:
+                continue  # indexed after the rarer terms were read
+            score = matches[listing_id][0] if matches else 0.0
+            narrowed[listing_id] = (score + idf * weight * (BM25_K1 + 1) / (weight + BM25_K1), category, price)
+        matches = narrowed
+        if not matches:
+            return results
+        # Intersect in SQL: later terms only read postings of listings that
+        # also carry this one, without shipping the candidate ids back.
+        postings = postings.filter(
+            listing_id__in=SearchPosting.objects.filter(term=term).values("listing_id")
+        )
+
+    categories, prices = Counter(), Counter()
+    hits = []
+    for listing_id, (score, category, price) in matches.items():
+        categories[category] += 1
+        prices[price] += 1
+        if (category_id is None or category == category_id) and (bucket is None or price == bucket):
+            hits.append((listing_id, score))
+    hits.sort(key=lambda hit: (-hit[1], -hit[0]))
+
+    results.total = len(hits)
+    results.hits = hits[:limit]
+    results.category_counts = categories.most_common()
+    results.price_counts = sorted(prices.items())
+    return results
+
+
+def _active_listing_count():
+    # The materialized per-category counts: no COUNT(*) over the listing table.
+    return catalog_stats().active_total
+
+
+class _Node:
+    __slots__ = ("children", "count")
+
+    def __init__(self):
+        self.children = {}
+        self.count = 0
+
+
+class Trie:
+    """Prefix tree of terms with their document counts."""
+
+    def __init__(self):
+        self.root = _Node()
+        self.size = 0
+
+    def add(self, term, delta):
+        node = self.root
+        for char in term:
+            node = node.children.setdefault(char, _Node())
+        before = node.count
+        node.count = max(0, node.count + delta)
+        self.size += (node.count > 0) - (before > 0)
+
+    def complete(self, prefix, limit=10):
+        """Most frequent terms starting with ``prefix``."""
+        node = self.root
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return []
+        found = []
+        stack = [(node, prefix)]
+        while stack:
+            node, term = stack.pop()
+            if node.count:
+                found.append((term, node.count))
+            stack.extend((child, term + char) for char, child in node.children.items())
+        found.sort(key=lambda item: (-item[1], item[0]))
+        return found[:limit]
+
+
+class _SharedTrie:
+    def __init__(self):
+        self._trie = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self):
+        if self._trie is None or time.monotonic() - self._loaded_at > TRIE_TTL:
+            with self._lock:
+                if self._trie is None or time.monotonic() - self._loaded_at > TRIE_TTL:
+                    trie = Trie()
+                    rows = SearchTerm.objects.filter(doc_count__gt=0).values_list("term", "doc_count")
+                    for term, count in rows.iterator(chunk_size=5000):
+                        trie.add(term, count)
+                    self._trie, self._loaded_at = trie, time.monotonic()
+        return self._trie
+
+    def patch(self, added, removed):
+        with self._lock:
+            if self._trie is None:
+                return
+            for term in added:
+                self._trie.add(term, 1)
+            for term in removed:
+                self._trie.add(term, -1)
+
+    def reset(self):
+        with self._lock:
+            self._trie = None
+
+
+_TRIE = _SharedTrie()
+
+
+def autocomplete(text, limit=10):
+    """Complete the last word of ``text``, keeping the words before it."""
+    words = (text or "").lower().split()
+    if not words or text[-1:].isspace():
+        return []
+    tokens = TOKEN_RE.findall(words[-1])
+    if not tokens:
+        return []
+    head = " ".join(words[:-1])
+    return [
+        f"{head} {term}" if head else term
+        for term, _ in _TRIE.get().complete(tokens[-1], limit)
+    ]
+
+
+def reset_autocomplete():
+    _TRIE.reset()
@@ -0,0 +1,32 @@
+"""
+Session engine: cache first, database behind it, and no redundant writes.
+
+``SESSION_ENGINE = "core.sessions"`` reads sessions from the cache (falling
+back to the ``django_session`` table, like ``cached_db``) and skips the
+database UPDATE when a request marked the session modified but left its
+data as it was loaded — e.g. re-assigning the same value.
+"""
+
+import copy
+
+from django.conf import settings
+from django.contrib.sessions.backends.cached_db import SessionStore as CachedDBStore
+
+
+class SessionStore(CachedDBStore):
+    def load(self):
+        data = super().load()
+        self._loaded = copy.deepcopy(data)
+        return data
+
+    def save(self, must_create=False):
+        unchanged = (
+            not must_create
+            and self.session_key is not None
+            and getattr(self, "_loaded", None) == self._session
+            and not settings.SESSION_SAVE_EVERY_REQUEST  # that setting exists to refresh the expiry
+        )
+        if unchanged:
+            return
+        super().save(must_create=must_create)
+        self._loaded = copy.deepcopy(self._session)
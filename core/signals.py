@@ -0,0 +1,65 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .aggregates import listing_state, loaded_state, record_change, remember_saved_state, stored_state, touches_state
+from .auth import forget_user
+from .cache import CATALOG, bump_content_version
+from .models import Category, Listing, ListingImage, Seller
+from .search import index_listing, remove_listing
+
+
+@receiver(post_save, sender=Listing)
+def index_saved_listing(sender, instance, raw=False, **kwargs):
+    if raw:
+        return  # fixtures: run rebuild_search_index afterwards
+    transaction.on_commit(lambda: index_listing(instance))
+
+
+@receiver(pre_delete, sender=Listing)
+def unindex_deleted_listing(sender, instance, **kwargs):
+    remove_listing(instance.pk)
+
+
+@receiver(pre_save, sender=Listing)
+def remember_listing_state(sender, instance, raw=False, using=None, update_fields=None, **kwargs):
+    if raw or instance._state.adding or not touches_state(update_fields):
+        return
+    # A full save of a listing read in full knows its old state; otherwise ask the database.
+    old = loaded_state(instance) if update_fields is None else None
+    instance._aggregate_state = old or stored_state(instance.pk, using)
+
+
+@receiver(post_save, sender=Listing)
+def update_saved_listing_aggregates(sender, instance, raw=False, using=None, update_fields=None, **kwargs):
+    if raw:
+        return  # fixtures: run reconcile_aggregates afterwards
+    if not touches_state(update_fields):
+        return
+    record_change(instance.__dict__.pop("_aggregate_state", None), listing_state(instance), using)
+    remember_saved_state(instance, update_fields)
+
+
+@receiver(post_delete, sender=Listing)
+def update_deleted_listing_aggregates(sender, instance, using=None, **kwargs):
+    record_change(listing_state(instance), None, using)
+
+
+@receiver(post_save, sender=Listing)
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Seller)
+@receiver(post_save, sender=ListingImage)
+@receiver(post_delete, sender=Listing)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Seller)
+@receiver(post_delete, sender=ListingImage)
+def invalidate_catalog_pages(sender, **kwargs):
+    transaction.on_commit(lambda: bump_content_version(CATALOG))
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def invalidate_cached_user(sender, instance, **kwargs):
+    user_id = instance.pk
+    transaction.on_commit(lambda: forget_user(user_id))
@@ -0,0 +1,67 @@
+"""
+Serve collected static files with far-future caching and precompressed bodies.
+
+Content-hashed names (``app.3f2a9c1b04e7.css``) never change meaning, so they
+are sent with ``Cache-Control: public, max-age=31536000, immutable``; anything
+else gets a short max-age.  When the client accepts it, the ``.br`` or
+``.gz`` sibling written by ``core.storage`` at collectstatic time is sent
+as-is with ``Content-Encoding`` — no compression work per request.
+"""
+
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+from .admission import admit
+
+HASHED_NAME_RE = re.compile(r"\.[0-9a-f]{12}\.[A-Za-z0-9]+$")
+IMMUTABLE = "public, max-age=31536000, immutable"
+SHORT_LIVED = "public, max-age=300"
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+@admit("assets")
+def serve(request, path, document_root=None):
+    try:
+        fullpath = safe_join(document_root or settings.STATIC_ROOT, path)
+    except SuspiciousFileOperation as exc:
+        raise Http404("Not found") from exc
+    if not os.path.isfile(fullpath):
+        raise Http404("Not found")
+
+    stat = os.stat(fullpath)
+    if not was_modified_since(request.headers.get("If-Modified-Since"), stat.st_mtime):
+        response = HttpResponseNotModified()
+    else:
+        body_path, encoding = fullpath, None
+        accepted = accepted_encodings(request.headers.get("Accept-Encoding", ""))
+        for name, suffix in ENCODINGS:
+            if name in accepted and os.path.isfile(fullpath + suffix):
+                body_path, encoding = fullpath + suffix, name
+                break
+        content_type, _ = mimetypes.guess_type(fullpath)
+        response = FileResponse(open(body_path, "rb"), content_type=content_type or "application/octet-stream")
+        response["Last-Modified"] = http_date(stat.st_mtime)
+        if encoding:
+            response["Content-Encoding"] = encoding
+    response["Vary"] = "Accept-Encoding"
+    response["Cache-Control"] = IMMUTABLE if HASHED_NAME_RE.search(path) else SHORT_LIVED
+    return response
+
+
+def accepted_encodings(header):
+    accepted = set()
+    for item in header.split(","):
+        name, _, params = item.strip().partition(";")
+        if params.strip().replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        if name:
+            accepted.add(name.strip().lower())
+    return accepted
@@ -0,0 +1,66 @@
+"""
+Static files storage: content-hashed names plus precompressed siblings.
+
+``collectstatic`` writes ``app.3f2a9c1b.css`` next to ``app.css`` (via
+Django's manifest storage) and then ``.gz`` and, when the optional
+``brotli`` package is installed, ``.br`` copies of every compressible
+file.  ``core.static.serve`` (or the web server) sends the precompressed
+copy directly, so compression costs nothing per request.
+"""
+
+import gzip
+import os
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:  # optional: .gz siblings are still written
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = frozenset({
+    ".css", ".js", ".mjs", ".map", ".json", ".svg", ".txt", ".html", ".xml", ".ico", ".eot", ".ttf", ".otf",
+})
+MIN_COMPRESS_SIZE = 256
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+        if dry_run:
+            return
+        for name in self._compressible_names():
+            for compressed in self._write_compressed(name):
+                yield name, compressed, True
+
+    def _compressible_names(self):
+        for original, hashed in self.hashed_files.items():
+            for name in (original, hashed):
+                if os.path.splitext(name)[1].lower() in COMPRESSIBLE_EXTENSIONS:
+                    yield name
+
+    def _write_compressed(self, name):
+        path = self.path(name)
+        try:
+            with open(path, "rb") as handle:
+                data = handle.read()
+        except FileNotFoundError:
+            return
+        if len(data) < MIN_COMPRESS_SIZE:
+            return
+        encoders = [(".gz", lambda raw: gzip.compress(raw, compresslevel=9, mtime=0))]
+        if brotli is not None:
+            encoders.append((".br", lambda raw: brotli.compress(raw, quality=11)))
+        for suffix, encode in encoders:
+            target = path + suffix
+            if os.path.exists(target) and os.path.getmtime(target) >= os.path.getmtime(path):
+                continue
+            encoded = encode(data)
+            if len(encoded) >= len(data) * 0.95:
+                # Not worth a sibling; drop any stale one so the original is served.
+                if os.path.exists(target):
+                    os.remove(target)
+                continue
+            with open(target, "wb") as handle:
+                handle.write(encoded)
+            yield name + suffix
@@ -0,0 +1,11 @@
+from django import template
+
+from core.cache import content_version as _content_version
+
+register = template.Library()
+
+
+@register.simple_tag
+def content_version(namespace):
+    """Current version of ``namespace``, for use in ``{% cache %}`` vary-on arguments."""
+    return _content_version(namespace)
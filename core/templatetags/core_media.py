@@ -0,0 +1,40 @@
+from django import template
+from django.conf import settings
+from django.utils.html import format_html, format_html_join
+
+from core.media import srcset, thumbnail_url, thumbnail_widths
+
+register = template.Library()
+
+MIME_TYPES = {"webp": "image/webp", "jpg": "image/jpeg"}
+FALLBACK_WIDTH = 320
+
+
+@register.simple_tag
+def listing_image(image, sizes="100vw", alt="", loading="lazy"):
+    """
+    A lazy-loading ``<picture>`` offering every thumbnail width of ``image``.
+
+    Browsers pick the smallest file that fills ``sizes`` at their pixel density;
+    WebP is preferred and JPEG is the fallback.  Pass ``loading="eager"`` for
+    an image in the first screenful.
+    """
+    widths = thumbnail_widths(image)
+    fallback = max([width for width in widths if width <= FALLBACK_WIDTH] or widths[:1])
+    sources = format_html_join(
+        "",
+        '<source type="{}" srcset="{}" sizes="{}">',
+        ((MIME_TYPES[fmt], srcset(image, fmt), sizes) for fmt in settings.THUMBNAIL_FORMATS if fmt != "jpg"),
+    )
+    return format_html(
+        '<picture>{}<img src="{}" srcset="{}" sizes="{}" width="{}" height="{}" alt="{}" '
+        'loading="{}" decoding="async"></picture>',
+        sources,
+        thumbnail_url(image, fallback, "jpg"),
+        srcset(image, "jpg"),
+        sizes,
+        fallback,
+        round(image.height * fallback / image.width),
+        alt,
+        loading,
+    )
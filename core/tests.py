@@ -1,3 +1,387 @@
-from django.test import TestCase
+import base64
+import datetime
+import io
+import json
+import os
+import tempfile
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import F
+from django.http import StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .admission import Gate, Policy, RateLimiter, client_ip
+from .jobs import claim, complete, enqueue
+from .middleware import AdmissionMiddleware
+from .models import AIJob, Category, CategoryStats, Listing, Seller
+from .pagination import keyset_paginate
+from .search import autocomplete, reset_autocomplete, search
+
+# The hashed-name manifest only exists after collectstatic.
+PLAIN_STATIC_STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+}
+
+
+# The session's user is only cached when the cache is shared between workers.
+@override_settings(STORAGES=PLAIN_STATIC_STORAGES, CACHE_SHARED=True)
+class AuthenticatedRequestQueryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user("buyer", password="secret-password")
+        self.client.force_login(self.user)
+
+    def warm(self):
+        response = self.client.get(reverse("home"))  # caches the page and the session
+        self.assertTrue(response.wsgi_request.user.is_authenticated)  # caches the user
+
+    def test_home_on_warm_cache_issues_no_queries(self):
+        self.warm()
+
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse("home"))
+            self.assertTrue(response.wsgi_request.user.is_authenticated)  # resolve the lazy user inside the block
+        self.assertEqual(response.status_code, 200)
+
+    def test_unchanged_session_is_not_written(self):
+        session = self.client.session
+        session["cart"] = [1, 2]
+        session.save()
+
+        session = self.client.session
+        session["cart"] = [1, 2]
+        with self.assertNumQueries(0):
+            session.save()
+
+    def test_saving_user_invalidates_cached_user(self):
+        self.warm()
+        self.user.first_name = "Abebe"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+
+        response = self.client.get(reverse("home"))
+        self.assertEqual(response.wsgi_request.user.first_name, "Abebe")
+
+
+@override_settings(STORAGES=PLAIN_STATIC_STORAGES, CACHE_SHARED=False)
+class ProcessLocalCacheTests(TestCase):
+    def test_user_is_not_cached_without_a_shared_cache(self):
+        cache.clear()
+        user = get_user_model().objects.create_user("seller", password="secret-password")
+        self.client.force_login(user)
+        self.assertTrue(self.client.get(reverse("home")).wsgi_request.user.is_authenticated)
+
+        # As if another worker deactivated the user: this process's cache never hears of it.
+        get_user_model().objects.filter(pk=user.pk).update(is_active=False)
+
+        response = self.client.get(reverse("home"))
+        self.assertFalse(response.wsgi_request.user.is_authenticated)
+
+
+@override_settings(STORAGES=PLAIN_STATIC_STORAGES, ADMISSION_ENABLED=True)
+class AdmissionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    async def test_signed_in_async_request_resolves_user_off_the_event_loop(self):
+        user = await get_user_model().objects.acreate_user("buyer", password="secret-password")
+        await self.async_client.aforce_login(user)
+        cache.clear()  # cold session and user cache: resolving the user queries the database
+
+        response = await self.async_client.get(reverse("listing_list"))
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(ADMISSION_CLASSES={"default": {"rate": "2/m"}})
+    def test_client_over_its_rate_gets_429(self):
+        statuses = [self.client.get(reverse("listing_list")).status_code for _ in range(3)]
+        self.assertEqual(statuses, [200, 200, 429])
+        response = self.client.get(reverse("listing_list"))
+        self.assertGreaterEqual(int(response["Retry-After"]), 1)
+
+
+class AdmissionUnitTests(SimpleTestCase):
+    def test_bucket_refills_over_its_window(self):
+        cache.clear()
+        limiter, policy = RateLimiter("default"), Policy("test", limit=2, window=60.0)
+        self.assertIsNone(limiter.hit(policy, "ip:1", now=600.0))
+        self.assertIsNone(limiter.hit(policy, "ip:1", now=601.0))
+        self.assertIsNotNone(limiter.hit(policy, "ip:1", now=602.0))
+        self.assertIsNone(limiter.hit(policy, "ip:2", now=602.0))  # buckets are per client
+        self.assertIsNone(limiter.hit(policy, "ip:1", now=780.0))
+
+    def test_low_priority_classes_leave_room_for_pages(self):
+        gate = Gate(max_in_flight=4, low_priority_share=0.5)
+        ai, page = Policy("ai", low_priority=True), Policy("default")
+        self.assertTrue(gate.enter(ai))
+        self.assertTrue(gate.enter(ai))
+        self.assertFalse(gate.enter(ai))
+        self.assertTrue(gate.enter(page))
+        self.assertTrue(gate.enter(page))
+        self.assertFalse(gate.enter(page))
+        gate.leave(ai)
+        self.assertTrue(gate.enter(page))
+
+    @override_settings(ADMISSION_ENABLED=True, ADMISSION_MAX_IN_FLIGHT=1)
+    def test_streamed_response_holds_its_slot_until_closed(self):
+        cache.clear()
+        middleware = AdmissionMiddleware(lambda request: StreamingHttpResponse(iter([b"chunk"])))
+        request = RequestFactory().get("/")
+        self.assertIsNone(middleware.process_view(request, lambda request: None, (), {}))
+        response = middleware(request)
+        self.assertEqual(middleware.gate.in_flight, 1)
+        self.assertEqual(b"".join(response), b"chunk")
+        response.close()
+        self.assertEqual(middleware.gate.in_flight, 0)
+        response.close()
+        self.assertEqual(middleware.gate.in_flight, 0)
+
+    def test_forwarded_for_is_ignored_without_a_trusted_proxy(self):
+        request = RequestFactory().get("/", REMOTE_ADDR="10.0.0.7", HTTP_X_FORWARDED_FOR="1.2.3.4, 192.0.2.1")
+        with self.settings(ADMISSION_PROXY_COUNT=0):
+            self.assertEqual(client_ip(request), "10.0.0.7")
+        with self.settings(ADMISSION_PROXY_COUNT=1):
+            self.assertEqual(client_ip(request), "192.0.2.1")
+
+
+def make_catalog(count=5):
+    """A category and seller with ``count`` active listings, newest last."""
+    category = Category.objects.create(name="Phones", slug="phones")
+    seller = Seller.objects.create(name="Abebe", slug="abebe")
+    start = datetime.datetime(2026, 1, 1, tzinfo=datetime.timezone.utc)
+    listings = [
+        Listing.objects.create(
+            seller=seller,
+            category=category,
+            title=f"Phone {index}",
+            price=100 + index,
+            created_at=start + datetime.timedelta(hours=index),
+        )
+        for index in range(count)
+    ]
+    return category, seller, listings
+
+
+@override_settings(STORAGES=PLAIN_STATIC_STORAGES)
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.listings = make_catalog(5)[2]
+
+    def test_pages_forward_and_back(self):
+        ordering = ("-created_at", "-id")
+        first = keyset_paginate(Listing.objects.all(), ordering, per_page=2)
+        second = keyset_paginate(Listing.objects.all(), ordering, first.next_cursor, per_page=2)
+        back = keyset_paginate(Listing.objects.all(), ordering, second.previous_cursor, per_page=2, backwards=True)
+
+        newest = self.listings[::-1]
+        self.assertEqual(first.items, newest[:2])
+        self.assertEqual(second.items, newest[2:4])
+        self.assertEqual(back.items, first.items)
+        self.assertFalse(first.has_previous)
+
+    def test_malformed_cursor_shows_first_page(self):
+        cursors = ["not a cursor", "[1,1]", "[[1],2]", "[true,1]", "[null,1]", '{"a":1}']
+        for param in ("after", "before"):
+            for raw in cursors:
+                cursor = base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+                with self.subTest(param=param, cursor=raw):
+                    response = self.client.get(reverse("listing_list"), {param: cursor})
+                    self.assertEqual(response.status_code, 200)
+                    self.assertEqual(len(response.context["page"].items), 5)
+
+
+class ListingAggregateTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category = make_catalog(3)[0]
+        self.listing = Listing.objects.get(title="Phone 2")
+
+    def stats(self):
+        return CategoryStats.objects.get(category=self.category)
+
+    def listing_selects(self, queries):
+        return [query for query in queries if query["sql"].startswith("SELECT") and "core_listing" in query["sql"]]
+
+    def test_full_save_of_a_loaded_listing_reads_nothing_back(self):
+        self.listing.status = Listing.Status.SOLD
+        with CaptureQueriesContext(connection) as queries:
+            self.listing.save()
+        self.assertEqual(self.listing_selects(queries), [])
+        self.assertEqual(self.stats().active_count, 2)
+
+    def test_save_of_other_columns_skips_the_aggregates(self):
+        self.listing.title = "Phone two"
+        with CaptureQueriesContext(connection) as queries:
+            self.listing.save(update_fields=["title", "updated_at"])
+        self.assertEqual(len(queries), 1)
+
+    def test_repeated_saves_track_the_saved_state(self):
+        self.listing.status = Listing.Status.SOLD
+        self.listing.save()
+        self.assertEqual(self.stats().active_count, 2)
+        self.listing.status = Listing.Status.ACTIVE
+        self.listing.save()
+        self.assertEqual(self.stats().active_count, 3)
+
+    def test_refresh_falls_back_to_the_stored_row(self):
+        Listing.objects.filter(pk=self.listing.pk).update(status=Listing.Status.SOLD)
+        CategoryStats.objects.filter(category=self.category).update(active_count=2)
+        self.listing.refresh_from_db()
+        self.listing.status = Listing.Status.ACTIVE
+        self.listing.save()
+        self.assertEqual(self.stats().active_count, 3)
+
+
+class AIJobQueueTests(TestCase):
+    def expire_lease(self, job):
+        AIJob.objects.filter(pk=job.pk).update(locked_at=F("locked_at") - datetime.timedelta(seconds=601))
+
+    def test_claimed_job_is_completed(self):
+        job = enqueue({"input": "hello"})
+        [claimed] = claim("worker-a")
+        self.assertEqual((claimed.pk, claimed.status, claimed.attempts), (job.pk, AIJob.Status.RUNNING, 1))
+        self.assertEqual(claim("worker-b"), [])
+
+        self.assertIsNotNone(complete(claimed, {"success": True, "data": {"text": "hi"}}))
+        job.refresh_from_db()
+        self.assertEqual(job.status, AIJob.Status.SUCCEEDED)
+        self.assertEqual(job.result["data"], {"text": "hi"})
+
+    def test_result_of_an_expired_lease_is_dropped(self):
+        enqueue({"input": "hello"})
+        [slow] = claim("worker-a")
+        self.expire_lease(slow)
+        [fast] = claim("worker-b")
+        self.assertEqual(fast.attempts, 2)
+
+        complete(fast, {"success": True, "data": "fast"})
+        self.assertIsNone(complete(slow, {"success": True, "data": "slow"}))
+        self.assertEqual(AIJob.objects.get(pk=fast.pk).result["data"], "fast")
+
+    def test_job_that_outlives_every_lease_fails(self):
+        job = enqueue({"input": "hello"}, max_attempts=2)
+        for worker in ("worker-a", "worker-b"):
+            [claimed] = claim(worker)
+            self.expire_lease(claimed)
+
+        self.assertEqual(claim("worker-c"), [])
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (AIJob.Status.FAILED, 2))
+
+
+class ListingImportTests(TestCase):
+    def setUp(self):
+        self.category, self.seller, [self.listing] = make_catalog(1)
+        Listing.objects.filter(pk=self.listing.pk).update(
+            description="Barely used", location="Jimma", currency="USD", status=Listing.Status.SOLD
+        )
+
+    def import_file(self, suffix, text):
+        handle, path = tempfile.mkstemp(suffix=suffix)
+        self.addCleanup(os.remove, path)
+        with os.fdopen(handle, "w", encoding="utf-8") as output:
+            output.write(text)
+        call_command("import_listings", path, "--workers", "1", "--no-reindex", stdout=io.StringIO(), stderr=io.StringIO())
+        return Listing.objects.get(pk=self.listing.pk)
+
+    def assert_optional_columns_kept(self, listing):
+        self.assertEqual(listing.price, 250)
+        self.assertEqual(
+            (listing.description, listing.location, listing.currency, listing.status),
+            ("Barely used", "Jimma", "USD", Listing.Status.SOLD),
+        )
+
+    def test_csv_update_leaves_missing_columns_alone(self):
+        self.assert_optional_columns_kept(
+            self.import_file(".csv", f"id,seller,category,title,price\n{self.listing.pk},abebe,phones,Phone 0,250\n")
+        )
+
+    def test_jsonl_update_leaves_missing_keys_alone(self):
+        record = {"id": self.listing.pk, "seller": "abebe", "category": "phones", "title": "Phone 0", "price": "250"}
+        self.assert_optional_columns_kept(self.import_file(".jsonl", json.dumps(record) + "\n"))
+
+    def test_present_columns_are_written(self):
+        listing = self.import_file(
+            ".csv", f"id,seller,category,title,price,description\n{self.listing.pk},abebe,phones,Phone 0,250,\n"
+        )
+        self.assertEqual((listing.description, listing.location), ("", "Jimma"))
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        reset_autocomplete()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.phones, self.seller, self.listings = make_catalog(3)
+            self.laptops = Category.objects.create(name="Laptops", slug="laptops")
+            self.samsung = Listing.objects.create(
+                seller=self.seller, category=self.phones, title="Samsung phone", price=600
+            )
+            self.charger = Listing.objects.create(
+                seller=self.seller, category=self.laptops, title="Lenovo charger",
+                description="Also charges a phone.", price=50,
+            )
+
+    def hit_ids(self, results):
+        return [listing_id for listing_id, _ in results.hits]
+
+    def test_every_term_must_match(self):
+        self.assertEqual(search("phone").total, 5)
+        self.assertEqual(self.hit_ids(search("samsung phone")), [self.samsung.pk])
+        self.assertEqual(search("samsung charger").total, 0)
+        self.assertEqual(search("samsung unknownword").total, 0)
+
+    def test_title_matches_rank_first(self):
+        self.assertEqual(self.hit_ids(search("phone"))[-1], self.charger.pk)
+
+    def test_facets_ignore_the_filters(self):
+        results = search("phone", category_id=self.laptops.pk)
+        self.assertEqual(self.hit_ids(results), [self.charger.pk])
+        self.assertEqual(dict(results.category_counts), {self.phones.pk: 4, self.laptops.pk: 1})
+        self.assertEqual(results.price_counts, [(0, 1), (1, 3), (2, 1)])
+        self.assertEqual(self.hit_ids(search("phone", bucket=2)), [self.samsung.pk])
+
+    def test_saving_reindexes_the_listing(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.samsung.title = "Nokia phone"
+            self.samsung.save()
+        self.assertEqual(search("samsung").total, 0)
+        self.assertEqual(self.hit_ids(search("nokia")), [self.samsung.pk])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.samsung.status = Listing.Status.SOLD
+            self.samsung.save()
+        self.assertEqual(search("nokia").total, 0)
+        self.assertEqual(search("phone").total, 4)
+
+    def test_autocomplete_completes_the_last_word(self):
+        autocomplete("ph")  # load the trie before the next write patches it
+        self.assertEqual(autocomplete("ph"), ["phone", "phones"])
+        self.assertEqual(autocomplete("used SAMS"), ["used samsung"])
+        self.assertEqual(autocomplete("zz"), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Listing.objects.create(seller=self.seller, category=self.laptops, title="Photocopier", price=9000)
+        self.assertEqual(autocomplete("ph"), ["phone", "phones", "photocopier"])
+
+
+@override_settings(STORAGES=PLAIN_STATIC_STORAGES)
+class ListingDetailTests(TestCase):
+    def test_cached_fragment_skips_the_image_query(self):
+        cache.clear()
+        listing = make_catalog(1)[2][0]
+        url = reverse("listing_detail", args=[listing.pk])
+        first = self.client.get(url)
+        self.assertContains(first, "Phone 0")
+
+        with CaptureQueriesContext(connection) as queries:
+            second = self.client.get(url)
+        self.assertEqual(second.content.split(), first.content.split())
+        self.assertFalse([query for query in queries if "listingimage" in query["sql"].lower()])
@@ -0,0 +1,96 @@
+"""
+Thumbnail rendering with Pillow.
+
+Only Pillow and the standard library are used here, so that the
+functions can run in spawned worker processes without Django.  Pillow is
+imported on first use: web workers import this module for ``FORMATS``
+but rarely render.
+``core.media`` decides what to render and where.  This module does the
+pixel work.
+"""
+
+import os
+import tempfile
+
+# Pillow save arguments per output format.
+FORMATS = {
+    "webp": ("WEBP", {"quality": 75, "method": 4}),
+    "jpg": ("JPEG", {"quality": 80, "optimize": True, "progressive": True}),
+}
+EXIF_ORIENTATION = 0x0112
+ROTATED = frozenset({5, 6, 7, 8})  # orientations that swap width and height
+
+
+def oriented_size(image):
+    """``(width, height)`` as displayed, after the EXIF orientation is applied."""
+    width, height = image.size
+    if image.getexif().get(EXIF_ORIENTATION) in ROTATED:
+        return height, width
+    return width, height
+
+
+def render(source_path, targets):
+    """
+    Write each ``(width, format, path)`` in ``targets`` from one decode of the source.
+
+    Widths larger than the source are clamped to it, so nothing is upscaled.
+    Returns ``[(path, width, height)]``.
+    """
+    from PIL import Image, ImageOps  # pylint: disable=import-outside-toplevel
+
+    with Image.open(source_path) as image:
+        width, height = oriented_size(image)
+        largest = min(max(target[0] for target in targets), width)
+        if image.format == "JPEG":
+            # Decode at the smallest 1/2, 1/4 or 1/8 scale that still covers the
+            # largest output: far less work than decoding a 12 MP photo in full.
+            scale = largest / width
+            request = (round(image.size[0] * scale), round(image.size[1] * scale))
+            image.draft("RGB", request)
+        image = ImageOps.exif_transpose(image)
+        image = _flatten(image)
+
+        written = []
+        current = image
+        for target_width, fmt, path in sorted(targets, key=lambda target: -target[0]):
+            target_width = min(target_width, width)
+            size = (target_width, max(1, round(height * target_width / width)))
+            if current.size != size:
+                # Each size is resized from the next larger one, not the full image.
+                current = current.resize(size, Image.Resampling.LANCZOS, reducing_gap=3.0)
+            _save(current, fmt, path)
+            written.append((path, size[0], size[1]))
+        return written
+
+
+def render_all(jobs):
+    """``render`` for several ``(source_path, targets)`` jobs; a worker-process entry point."""
+    return [render(source_path, targets) for source_path, targets in jobs]
+
+
+def _flatten(image):
+    from PIL import Image  # pylint: disable=import-outside-toplevel
+
+    if image.mode in ("RGB", "L"):
+        return image
+    if image.mode in ("RGBA", "LA", "P", "PA"):
+        image = image.convert("RGBA")
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel("A"))
+        return background
+    return image.convert("RGB")
+
+
+def _save(image, fmt, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    pillow_format, options = FORMATS[fmt]
+    # A temp name of its own per call: threads of one process may render the same file.
+    with tempfile.NamedTemporaryFile(dir=os.path.dirname(path), suffix=".tmp", delete=False) as tmp:
+        try:
+            image.save(tmp, pillow_format, **options)
+        except BaseException:
+            tmp.close()
+            os.unlink(tmp.name)
+            raise
+    os.chmod(tmp.name, 0o644)  # mkstemp creates 0600; the web server must read it
+    os.replace(tmp.name, path)  # readers never see a half-written file
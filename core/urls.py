@@ -1,7 +1,25 @@
 from django.urls import path
 
-from .views import home
+from .views import (
+    ai_job_create,
+    ai_job_status,
+    home,
+    listing_detail,
+    listing_image_upload,
+    listing_list,
+    listing_search,
+    search_autocomplete,
+)
 
 urlpatterns = [
     path("", home, name="home"),
+    path("listings/", listing_list, name="listing_list"),
+    path("listings/<int:pk>/", listing_detail, name="listing_detail"),
+    path("listings/<int:pk>/images/", listing_image_upload, name="listing_image_upload"),
+    path("categories/<slug:category_slug>/", listing_list, name="listing_category"),
+    path("sellers/<slug:seller_slug>/", listing_list, name="listing_seller"),
+    path("search/", listing_search, name="listing_search"),
+    path("search/autocomplete/", search_autocomplete, name="search_autocomplete"),
+    path("ai/jobs/", ai_job_create, name="ai_job_create"),
+    path("ai/jobs/<uuid:job_id>/", ai_job_status, name="ai_job_status"),
 ]
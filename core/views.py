@@ -1,12 +1,70 @@
-import os
+import asyncio
+import json
 import platform
+from decimal import Decimal, InvalidOperation
 
 from django import get_version as django_version
-from django.shortcuts import render
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.http import JsonResponse
+from django.shortcuts import aget_object_or_404, get_object_or_404, render
+from django.urls import reverse
 from django.utils import timezone
+from django.views.decorators.http import require_GET, require_POST
 
+from config.env import env
 
-def home(request):
+from .admission import admit
+from .aggregates import acatalog_stats
+from .cache import CATALOG, cache_page_per_host, content_version, depends_on
+from .jobs import await_for, enqueue, job_state
+from .media import ImageUploadError, aattach_covers, add_listing_image, attach_covers, srcset
+from .models import AIJob, Category, Listing, Seller
+from .pagination import InvalidCursor, akeyset_paginate
+from .search import MAX_RESULTS, SearchResults, autocomplete, price_bucket_label, search
+
+DJANGO_VERSION = django_version()
+PYTHON_VERSION = platform.python_version()
+
+# Rendered pages are reused for this long unless the catalog changes first.
+HOME_CACHE_SECONDS = 60
+LISTING_CACHE_SECONDS = 60
+
+# Upper bound for ?wait= long-polls. Under ASGI they wait on the event loop; how
+# many a worker holds at once is capped by the "ai_status" admission concurrency.
+JOB_STATUS_MAX_WAIT = 20
+
+LISTINGS_PER_PAGE = 24
+
+SIMILAR_LISTINGS = 6
+
+# Sort key -> keyset ordering; each one matches a Listing index.
+LISTING_SORTS = {
+    "recent": ("-created_at", "-id"),
+    "price": ("price", "id"),
+    "price_desc": ("-price", "-id"),
+}
+
+# Columns a listing card renders; everything else stays in the database.
+LISTING_CARD_FIELDS = (
+    "id",
+    "title",
+    "price",
+    "currency",
+    "location",
+    "created_at",
+    "category__name",
+    "category__slug",
+    "seller__name",
+    "seller__slug",
+    "seller__is_verified",
+)
+
+
+@depends_on(CATALOG, ttl=HOME_CACHE_SECONDS)  # shows the current time
+@cache_page_per_host(HOME_CACHE_SECONDS, CATALOG)
+async def home(request):
     """Render the landing screen with loader and environment details."""
     host_name = request.get_host().lower()
     agent_brand = "AppWizzy" if host_name == "appwizzy.com" else "Flatlogic"
@@ -15,11 +73,256 @@ def home(request):
     context = {
         "project_name": "New Style",
         "agent_brand": agent_brand,
-        "django_version": django_version(),
-        "python_version": platform.python_version(),
+        "django_version": DJANGO_VERSION,
+        "python_version": PYTHON_VERSION,
         "current_time": now,
         "host_name": host_name,
-        "project_description": os.getenv("PROJECT_DESCRIPTION", ""),
-        "project_image_url": os.getenv("PROJECT_IMAGE_URL", ""),
+        "project_description": env.str("PROJECT_DESCRIPTION", ""),
+        "project_image_url": env.str("PROJECT_IMAGE_URL", ""),
+        "catalog": await acatalog_stats(),
     }
     return render(request, "core/index.html", context)
+
+
+@cache_page_per_host(LISTING_CACHE_SECONDS, CATALOG)
+async def listing_list(request, category_slug=None, seller_slug=None):
+    """
+    Browse active listings, optionally by category or seller and price range.
+
+    Pages are keyset-paginated (``?after=`` / ``?before=`` cursors), so every
+    page costs one indexed query plus at most one category/seller lookup.
+    """
+    listings = Listing.objects.filter(status=Listing.Status.ACTIVE)
+    category = seller = None
+    if category_slug:
+        category = await aget_object_or_404(Category.objects.only("id", "name", "slug"), slug=category_slug)
+        listings = listings.filter(category=category)
+    if seller_slug:
+        seller = await aget_object_or_404(
+            Seller.objects.only("id", "name", "slug", "location", "is_verified"), slug=seller_slug
+        )
+        listings = listings.filter(seller=seller)
+
+    min_price = _price_param(request, "min_price")
+    max_price = _price_param(request, "max_price")
+    if min_price is not None:
+        listings = listings.filter(price__gte=min_price)
+    if max_price is not None:
+        listings = listings.filter(price__lte=max_price)
+
+    sort = request.GET.get("sort")
+    if sort not in LISTING_SORTS:
+        sort = "recent"
+    listings = listings.select_related("category", "seller").only(*LISTING_CARD_FIELDS)
+
+    before = request.GET.get("before")
+    cursor = before or request.GET.get("after")
+    try:
+        page = await akeyset_paginate(
+            listings, LISTING_SORTS[sort], cursor, LISTINGS_PER_PAGE, backwards=bool(before)
+        )
+    except InvalidCursor:
+        page = await akeyset_paginate(listings, LISTING_SORTS[sort], None, LISTINGS_PER_PAGE)
+
+    await aattach_covers(page.items)
+    catalog = await acatalog_stats()
+    context = {
+        "catalog": catalog,
+        "category_stats": catalog.get(category.pk) if category else None,
+        "category": category,
+        "seller": seller,
+        "page": page,
+        "sort": sort,
+        "min_price": min_price,
+        "max_price": max_price,
+        "next_query": _page_query(request, "after", page.next_cursor),
+        "previous_query": _page_query(request, "before", page.previous_cursor),
+    }
+    return render(request, "core/listing_list.html", context)
+
+
+@depends_on(CATALOG)
+async def listing_detail(request, pk):
+    listing = await aget_object_or_404(
+        Listing.objects.select_related("category", "seller").exclude(status=Listing.Status.DRAFT),
+        pk=pk,
+    )
+    # Imported on first use: numpy and the AI client are not needed to start a worker.
+    from .embeddings import similar_listing_ids  # pylint: disable=import-outside-toplevel
+
+    # Outside the page's fragment cache: the embedding index syncs on its own schedule.
+    # Loading the index reads files and the lookup scans it, so both run off the event loop.
+    similar_ids = await asyncio.to_thread(similar_listing_ids, listing.pk, SIMILAR_LISTINGS)
+    similar = Listing.objects.select_related("category", "seller").only(*LISTING_CARD_FIELDS)
+    by_id = {item.pk: item async for item in similar.filter(pk__in=similar_ids, status=Listing.Status.ACTIVE)}
+    similar_listings = [by_id[similar_id] for similar_id in similar_ids if similar_id in by_id]
+    await aattach_covers(similar_listings)
+    # The template renders synchronously, so it cannot query images itself.  Look
+    # the fragment up here instead and only fetch the images when it is missing.
+    catalog_version = content_version(CATALOG)
+    body = cache.get(make_template_fragment_key("listing_detail", [listing.pk, catalog_version]))
+    context = {
+        "listing": listing,
+        "listing_body": body,
+        "catalog_version": catalog_version,
+        "images": [] if body is not None else [image async for image in listing.images.all()],
+        "similar_listings": similar_listings,
+    }
+    return render(request, "core/listing_detail.html", context)
+
+
+@admit("search")
+@depends_on(CATALOG)
+def listing_search(request):
+    """Ranked full-text search with category and price facets, or ``mode=semantic`` by meaning."""
+    query = request.GET.get("q", "").strip()[:200]
+    semantic = request.GET.get("mode") == "semantic"
+    category = None
+    if request.GET.get("category"):
+        category = Category.objects.only("id", "name", "slug").filter(slug=request.GET["category"]).first()
+    try:
+        bucket = int(request.GET["price"]) if request.GET.get("price") else None
+    except ValueError:
+        bucket = None
+    try:
+        page_number = max(1, int(request.GET.get("page") or 1))
+    except ValueError:
+        page_number = 1
+
+    results = None
+    if semantic:
+        from .embeddings import semantic_search  # pylint: disable=import-outside-toplevel
+
+        hits = semantic_search(query, MAX_RESULTS)
+        if hits:  # no index yet, or the AI call failed: fall back to keywords
+            results = SearchResults(query=query, total=len(hits), hits=hits)
+    if results is None:
+        semantic = False
+        results = search(query, category.pk if category else None, bucket)
+    start = (page_number - 1) * LISTINGS_PER_PAGE
+    page_ids = [listing_id for listing_id, _ in results.hits[start:start + LISTINGS_PER_PAGE]]
+    by_id = (
+        Listing.objects.select_related("category", "seller")
+        .only(*LISTING_CARD_FIELDS)
+        .filter(status=Listing.Status.ACTIVE)
+        .in_bulk(page_ids)
+    )
+    facet_categories = Category.objects.only("id", "name", "slug").in_bulk(
+        [category_id for category_id, _ in results.category_counts]
+    )
+
+    params = request.GET.copy()
+    params.pop("page", None)
+    context = {
+        "query": query,
+        "semantic": semantic,
+        "results": results,
+        "listings": attach_covers([by_id[listing_id] for listing_id in page_ids if listing_id in by_id]),
+        "selected_category": category,
+        "selected_price": bucket,
+        "category_facets": [
+            (facet_categories[category_id], count)
+            for category_id, count in results.category_counts
+            if category_id in facet_categories
+        ],
+        "price_facets": [(price, price_bucket_label(price), count) for price, count in results.price_counts],
+        "page_number": page_number,
+        "has_next": start + LISTINGS_PER_PAGE < len(results.hits),
+        "base_query": params.urlencode(),
+    }
+    return render(request, "core/search.html", context)
+
+
+@require_GET
+def search_autocomplete(request):
+    suggestions = autocomplete(request.GET.get("q", "")[:100], limit=10)
+    response = JsonResponse({"suggestions": suggestions})
+    response["Cache-Control"] = "public, max-age=60"
+    return response
+
+
+def _price_param(request, name):
+    value = request.GET.get(name)
+    if not value:
+        return None
+    try:
+        price = Decimal(value)
+    except InvalidOperation:
+        return None
+    return price if price.is_finite() and price >= 0 else None
+
+
+def _page_query(request, direction, cursor):
+    if not cursor:
+        return ""
+    params = request.GET.copy()
+    params.pop("after", None)
+    params.pop("before", None)
+    params[direction] = cursor
+    return params.urlencode()
+
+
+@admit("upload")
+@require_POST
+def listing_image_upload(request, pk):
+    """Attach a photo (multipart field ``image``) to one of the user's listings (201)."""
+    if not request.user.is_authenticated:
+        return JsonResponse({"error": "authentication_required"}, status=401)
+    listing = get_object_or_404(Listing.objects.select_related("seller"), pk=pk)
+    if not request.user.is_staff and listing.seller.user_id != request.user.pk:
+        return JsonResponse({"error": "forbidden"}, status=403)
+    uploaded = request.FILES.get("image")
+    if uploaded is None:
+        return JsonResponse({"error": "image_missing", "message": 'Upload the photo as field "image".'}, status=400)
+    try:
+        image = add_listing_image(listing, uploaded)
+    except ImageUploadError as exc:
+        return JsonResponse({"error": "invalid_image", "message": str(exc)}, status=400)
+    return JsonResponse(
+        {
+            "id": image.pk,
+            "content_hash": image.content_hash,
+            "width": image.width,
+            "height": image.height,
+            "srcset": {fmt: srcset(image, fmt) for fmt in settings.THUMBNAIL_FORMATS},
+        },
+        status=201,
+    )
+
+
+@admit("ai")
+@require_POST
+def ai_job_create(request):
+    """Queue a create_response payload for the AI worker and return its job ID (202)."""
+    if not request.user.is_authenticated:
+        return JsonResponse({"error": "authentication_required"}, status=401)
+    try:
+        params = json.loads(request.body or b"{}")
+    except ValueError:
+        return JsonResponse({"error": "invalid_json"}, status=400)
+    if not isinstance(params, dict) or not isinstance(params.get("input"), list) or not params["input"]:
+        return JsonResponse(
+            {"error": "input_missing", "message": 'Parameter "input" is required and must be a non-empty list.'},
+            status=400,
+        )
+
+    job = enqueue(params)
+    state = job_state(job)
+    state["status_url"] = reverse("ai_job_status", args=[job.uuid])
+    return JsonResponse(state, status=202)
+
+
+@admit("ai_status")
+@require_GET
+async def ai_job_status(request, job_id):
+    """Job state; ``?wait=N`` blocks up to N seconds (capped) for the job to finish."""
+    job = await aget_object_or_404(AIJob, uuid=job_id)
+    try:
+        wait = min(float(request.GET.get("wait") or 0), JOB_STATUS_MAX_WAIT)
+    except ValueError:
+        wait = 0
+    if wait > 0 and not job.is_finished:
+        await await_for(job, wait)
+    response = JsonResponse(job_state(job))
+    response["Cache-Control"] = "no-store"
+    return response